@@ -1,32 +1,165 @@
 from abc import ABC, abstractmethod
 from app.services.bedrock_service import bedrock_client
 from app.core.redis_client import redis_client
+from app.core.near_cache import context_cache, MISSING
+from app.core.events import emit, is_streaming
+from app.core.config import settings
+from app.core.json_extract import IncrementalJSONParser, ModelOutputError, extract_json
+from app.core.metrics import MODEL_ESCALATIONS
+from pydantic import BaseModel
+from typing import Optional, Type
+from app.core.tracing import tracer
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 class BaseAgent(ABC):
+    # Whether model output should be forwarded as "delta" events to streaming clients
+    streams_output = True
+
     def __init__(self, agent_name: str):
         self.agent_name = agent_name
         self.bedrock = bedrock_client
         self.redis = redis_client
+        self.cache = context_cache
 
     async def save_context(self, session_id: str, key: str, value: any, expire: int = 3600):
         """Saves context to Redis (Short-term memory)"""
-        full_key = f"agent:{self.agent_name}:{session_id}:{key}"
-        await self.redis.set(full_key, json.dumps(value), ex=expire)
+        full_key = self._context_key(session_id, key)
+        with tracer.start_as_current_span("agent.save_context", attributes={"agent": self.agent_name, "context.key": key}):
+            await self.redis.set(full_key, json.dumps(value), ex=expire)
+            self.cache.put(full_key, value, expire)
+            await self.cache.publish_invalidation([full_key])
 
     async def get_context(self, session_id: str, key: str):
-        """Retrieves context from Redis"""
-        full_key = f"agent:{self.agent_name}:{session_id}:{key}"
-        data = await self.redis.get(full_key)
-        return json.loads(data) if data else None
-
-    async def call_claude(self, prompt: str, system_prompt: str = None, temperature: float = 0.5):
-        """Wrapper to call Claude with agent-specific logging"""
-        logger.info(f"Agent {self.agent_name} invoking Claude...")
-        return await self.bedrock.invoke_claude(prompt, system_prompt, temperature=temperature)
+        """Retrieves context from the near cache, falling back to Redis"""
+        full_key = self._context_key(session_id, key)
+        with tracer.start_as_current_span("agent.get_context", attributes={"agent": self.agent_name, "context.key": key}) as span:
+            value = self.cache.get(full_key, self.agent_name)
+            span.set_attribute("cache.hit", value is not MISSING)
+            if value is not MISSING:
+                return value
+            data = await self.redis.get(full_key)
+            value = json.loads(data) if data else None
+            if value is not None:
+                self.cache.put(full_key, value)
+            return value
+
+    async def save_contexts(self, session_id: str, values: dict, expire: int = 3600):
+        """Saves several context keys in one pipelined round trip"""
+        full_values = {self._context_key(session_id, key): value for key, value in values.items()}
+        await self.redis.mset(
+            {full_key: json.dumps(value) for full_key, value in full_values.items()},
+            ex=expire
+        )
+        for full_key, value in full_values.items():
+            self.cache.put(full_key, value, expire)
+        await self.cache.publish_invalidation(list(full_values))
+
+    async def get_contexts(self, session_id: str, keys: list[str]) -> dict:
+        """Retrieves several context keys, fetching near-cache misses in one round trip"""
+        result = {}
+        missing = []
+        for key in keys:
+            value = self.cache.get(self._context_key(session_id, key), self.agent_name)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                result[key] = value
+
+        raw = await self.redis.mget([self._context_key(session_id, key) for key in missing])
+        for key, data in zip(missing, raw):
+            value = json.loads(data) if data else None
+            if value is not None:
+                self.cache.put(self._context_key(session_id, key), value)
+            result[key] = value
+        return result
+
+    def _context_key(self, session_id: str, key: str) -> str:
+        return f"agent:{self.agent_name}:{session_id}:{key}"
+
+    async def call_claude(self, prompt: str, system_prompt: str = None, temperature: float = 0.5, stream: bool = True, model_id: str = None):
+        """
+        Wrapper to call Claude with agent-specific logging.
+        ``stream=False`` keeps this call's output off the client stream (e.g. text that is post-processed).
+        ``model_id`` overrides the agent's model from AGENT_MODELS.
+        """
+        logger.debug(f"Agent {self.agent_name} invoking Claude...")
+        streaming = stream and self.streams_output and is_streaming()
+        with tracer.start_as_current_span("agent.call_claude", attributes={"agent": self.agent_name, "streaming": streaming}) as span:
+            if not streaming:
+                return await self.bedrock.invoke_claude(
+                    prompt, system_prompt, temperature=temperature, agent=self.agent_name, model_id=model_id
+                )
+
+            chunks = []
+            # Top-level JSON fields are also sent as "field" events the moment they complete
+            parser = IncrementalJSONParser()
+            async for chunk in self.bedrock.stream_claude(
+                prompt, system_prompt, temperature=temperature, agent=self.agent_name, model_id=model_id
+            ):
+                if not chunks:
+                    span.add_event("first_token")
+                chunks.append(chunk)
+                await emit("delta", {"agent": self.agent_name, "text": chunk})
+                for key, value in parser.feed(chunk):
+                    await emit("field", {"agent": self.agent_name, "key": key, "value": value})
+            return "".join(chunks)
+
+    async def call_structured(
+        self,
+        prompt: str,
+        system_prompt: str,
+        schema: Type[BaseModel],
+        temperature: float = 0.5,
+        stream: bool = True,
+        confidence_key: str = None
+    ) -> tuple[Optional[dict], str]:
+        """
+        Call the agent's model and parse its reply against ``schema``.
+        If the agent runs on a smaller model and the reply doesn't validate,
+        or reports ``confidence_key`` below MODEL_ESCALATION_CONFIDENCE, the
+        call is repeated once on the large model.
+        A smaller model's reply is buffered rather than streamed, so clients
+        never see an answer that is then replaced; once accepted it is sent
+        as a single "delta" (plus its "field" events).
+        Returns ``(parsed reply or None, raw text of the last reply)``.
+        """
+        model_id = self.bedrock.model_for(self.agent_name)
+        escalates = model_id != self.bedrock.model_id
+        response_text = await self.call_claude(prompt, system_prompt, temperature, stream and not escalates, model_id)
+        reason = None
+        try:
+            data = extract_json(response_text, schema)
+            if confidence_key and float(data.get(confidence_key) or 0) < settings.MODEL_ESCALATION_CONFIDENCE:
+                reason = "low_confidence"
+        except ModelOutputError as e:
+            logger.debug(f"Agent {self.agent_name} output failed validation: {e}")
+            data, reason = None, "invalid_output"
+        if reason is None or not escalates:
+            if escalates and stream:
+                await self._emit_buffered(response_text)
+            return data, response_text
+
+        MODEL_ESCALATIONS.labels(self.agent_name, reason).inc()
+        logger.info(f"Agent {self.agent_name} escalating to {self.bedrock.model_id} ({reason})")
+        await emit("status", "escalating")
+        response_text = await self.call_claude(prompt, system_prompt, temperature, stream, self.bedrock.model_id)
+        try:
+            return extract_json(response_text, schema), response_text
+        except ModelOutputError:
+            # A low-confidence answer still beats none
+            return data, response_text
+
+    async def _emit_buffered(self, text: str):
+        """Send a reply that was generated without streaming as if it had streamed"""
+        if not (self.streams_output and is_streaming()):
+            return
+        await emit("delta", {"agent": self.agent_name, "text": text})
+        parser = IncrementalJSONParser()
+        for key, value in parser.feed(text):
+            await emit("field", {"agent": self.agent_name, "key": key, "value": value})
 
     @abstractmethod
     async def process(self, input_data: dict, session_id: str) -> dict:
@@ -1,9 +1,31 @@
+from typing import Optional
 from app.agents.base_agent import BaseAgent
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.schemas.agent_output_schema import SherpaOutput
+from app.services.code_index import code_index
+from app.services.learning_paths import learning_paths, module_of
+from app.services.translation_service import translation_service
+import asyncio
+import hashlib
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_language(language: Optional[str]) -> str:
+    """A supported language name in its canonical spelling, or the pivot language"""
+    for supported in settings.SHERPA_LANGUAGES:
+        if language and language.strip().lower() == supported.lower():
+            return supported
+    return settings.SHERPA_PIVOT_LANGUAGE
+
 
 class CodebaseSherpaAgent(BaseAgent):
     def __init__(self):
         super().__init__("codebase_sherpa")
+        self._generating: dict[tuple[str, str, str], asyncio.Future] = {}
         self.system_prompt = """You are 'Codebase Sherpa', a friendly mentor and guide for developers.
         
         Your Goal: Explain complex code, generate learning paths, and help developers navigate the codebase.
@@ -32,13 +54,68 @@ class CodebaseSherpaAgent(BaseAgent):
             "action": "explain" | "learning_path",
             "code_snippet": "...",
             "file_path": "...",
+            "repo": "owner/name",  # optional, adds context from the repository's code index
+            "module": "app/services",  # optional for learning_path; defaults to file_path's directory
             "target_language": "English" | "Hindi" | "Hinglish"
         }
         """
+        language = normalize_language(input_data.get("target_language"))
+        pivot = settings.SHERPA_PIVOT_LANGUAGE
+        if not settings.SHERPA_TRANSLATE_RESPONSES or language == pivot:
+            return await self._answer(input_data, language)
+
+        # The pivot answer is cached by its input and the translation by the answer,
+        # so repeat questions cost neither a generation nor a translation
+        result = await self._answer(input_data, pivot, stream=False, cache=True)
+        if "error" in result:
+            return result
+        translated = await translation_service.translate(result, language)
+        await self._emit_buffered(json.dumps(translated, ensure_ascii=False))
+        return translated
+
+    async def _answer(self, input_data: dict, language: str, stream: bool = True, cache: bool = False) -> dict:
         action = input_data.get("action", "explain")
         code = input_data.get("code_snippet", "")
-        language = input_data.get("target_language", "English")
-        
+        repo = input_data.get("repo")
+
+        if action == "learning_path" and repo and (input_data.get("module") or input_data.get("file_path")):
+            # Precomputed per module; generated once and shared when missing or out of date
+            module = input_data.get("module") or module_of(input_data["file_path"])
+            result = await self.learning_path_for(repo, module, language)
+            if result is not None:
+                return result
+
+        repo_context = ""
+        if repo:
+            repo_context = await code_index.context_for(repo, code, input_data.get("file_path"))
+        if repo_context:
+            repo_context = f"""
+            Related code from the repository ({repo}), for navigation and architecture questions:
+            ```
+            {repo_context}
+            ```
+            """
+        if action not in ("explain", "learning_path"):
+            return {"error": "Unknown action"}
+        return await self._generate(action, code, language, repo_context, stream, cache)
+
+    async def _generate(
+        self,
+        action: str,
+        code: str,
+        language: str,
+        repo_context: str = "",
+        stream: bool = True,
+        cache: bool = False
+    ) -> dict:
+        cache_key = None
+        if cache:
+            digest = hashlib.sha256(json.dumps([action, code, language, repo_context]).encode("utf-8")).hexdigest()
+            cache_key = f"sherpa:answer:{digest}"
+            cached = await redis_client.get(cache_key)
+            if cached:
+                return json.loads(cached)
+
         if action == "explain":
             prompt = f"""
             Task: Explain the following code snippet.
@@ -49,9 +126,10 @@ class CodebaseSherpaAgent(BaseAgent):
             {code}
             ```
             
+            {repo_context}
             Provide a detailed breakdown, key concepts, and a local analogy to help understanding.
             """
-        elif action == "learning_path":
+        else:
             prompt = f"""
             Task: Create a learning path for this code module.
             Target Language: {language}
@@ -61,22 +139,18 @@ class CodebaseSherpaAgent(BaseAgent):
             {code}
             ```
             
+            {repo_context}
             Suggest a step-by-step path to understand and master this pattern/technology.
             """
-        else:
-            return {"error": "Unknown action"}
 
-        response_text = await self.call_claude(
-            prompt=prompt,
-            system_prompt=self.system_prompt,
-            temperature=0.7 # Higher temperature for creative teaching
+        result_data, response_text = await self.call_structured(
+            prompt,
+            self.system_prompt,
+            SherpaOutput,
+            temperature=0.7, # Higher temperature for creative teaching
+            stream=stream
         )
-        
-        try:
-            clean_text = response_text.replace("```json", "").replace("```", "").strip()
-            result_data = json.loads(clean_text)
-            return result_data
-        except json.JSONDecodeError:
+        if result_data is None:
              # If Claude fails to give JSON (sometimes happens in creative mode), wrap raw text
             return {
                 "explanation": response_text,
@@ -84,3 +158,52 @@ class CodebaseSherpaAgent(BaseAgent):
                 "key_concepts": [],
                 "analogy": "N/A"
             }
+        if cache_key:
+            await redis_client.set(
+                cache_key,
+                json.dumps(result_data, ensure_ascii=False),
+                ex=settings.SHERPA_ANSWER_CACHE_TTL_SECONDS
+            )
+        return result_data
+
+    async def learning_path_for(self, repo: str, module: str, language: str) -> Optional[dict]:
+        """
+        Learning path for a module of an indexed repository, or None if the
+        module isn't indexed. Concurrent requests for the same path share one
+        generation.
+        """
+        key = (repo, module, language)
+        task = self._generating.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._learning_path(repo, module, language))
+            self._generating[key] = task
+            task.add_done_callback(lambda _: self._generating.pop(key, None))
+        # Shielded, so one caller going away doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    async def _learning_path(self, repo: str, module: str, language: str) -> Optional[dict]:
+        stored, content_hash = await learning_paths.lookup(repo, module, language)
+        if stored is not None or content_hash is None:
+            return stored
+
+        logger.info(f"Generating learning path for {repo}:{module} ({language})")
+        context = await learning_paths.context(repo, module)
+        result = await self._generate("learning_path", f"Module: {module}\n\n{context}", language, stream=False)
+        if result.get("learning_steps"):
+            await learning_paths.save(repo, module, language, content_hash, result)
+        return result
+
+    async def precompute_learning_paths(self, repo: str) -> int:
+        """Generate paths for modules whose content changed; returns how many were generated"""
+        stale = (await learning_paths.stale(repo, settings.LEARNING_PATH_LANGUAGES))[:settings.LEARNING_PATH_MAX_MODULES]
+        semaphore = asyncio.Semaphore(settings.LEARNING_PATH_CONCURRENCY)
+
+        async def generate(module: str, language: str):
+            async with semaphore:
+                await self.learning_path_for(repo, module, language)
+
+        results = await asyncio.gather(*(generate(m, l) for m, l in stale), return_exceptions=True)
+        for (module, _), result in zip(stale, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Learning path for {repo}:{module} failed: {result}")
+        return len(stale)
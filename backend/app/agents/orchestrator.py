@@ -2,9 +2,17 @@ from app.agents.base_agent import BaseAgent
 from app.agents.review_monk import ReviewMonkAgent
 from app.agents.codebase_sherpa import CodebaseSherpaAgent
 from app.core.demo_data import DEMO_PR_REVIEW, DEMO_HINDI_EXPLANATION
-import json
+from app.core.events import emit
+from app.core.json_extract import ModelOutputError
+from app.core.metrics import ORCHESTRATOR_STAGE_SECONDS
+from app.core.tracing import tracer
+from app.schemas.agent_output_schema import IntentOutput
+from opentelemetry import trace
 
 class OrchestratorAgent(BaseAgent):
+    # Classification JSON is internal; only the routing decision is surfaced
+    streams_output = False
+
     def __init__(self):
         super().__init__("orchestrator")
         self.review_monk = ReviewMonkAgent()
@@ -26,6 +34,11 @@ class OrchestratorAgent(BaseAgent):
         """
 
     async def process(self, input_data: dict, session_id: str) -> dict:
+        with tracer.start_as_current_span("orchestrator.process", attributes={"session.id": session_id}):
+            return await self._route(input_data, session_id)
+
+    async def _route(self, input_data: dict, session_id: str) -> dict:
+        """Classify intent and hand off to the specialist agent"""
         user_message = input_data.get("message", "")
         
         # DEMO MODE CHECK
@@ -36,33 +49,50 @@ class OrchestratorAgent(BaseAgent):
                 return DEMO_HINDI_EXPLANATION
         
         # 1. Intent Classification
+        await emit("status", "classifying")
         classification_prompt = f"User Message: '{user_message}'\n\nClassify the intent and choose the best agent."
         
-        response_text = await self.call_claude(classification_prompt, self.system_prompt, temperature=0.1)
+        with ORCHESTRATOR_STAGE_SECONDS.labels("classification", self.agent_name).time():
+            # Small model first; unclear or low-confidence classifications escalate
+            intent_data, _ = await self.call_structured(
+                classification_prompt, self.system_prompt, IntentOutput,
+                temperature=0.1, confidence_key="confidence"
+            )
         
         try:
-            intent_data = json.loads(response_text.replace("```json", "").replace("```", "").strip())
+            if intent_data is None:
+                raise ModelOutputError("No valid classification")
             target_agent = intent_data.get("target_agent")
+            trace.get_current_span().set_attribute("orchestrator.target_agent", str(target_agent))
+            await emit("routing", {
+                "target_agent": target_agent,
+                "confidence": intent_data.get("confidence"),
+                "reasoning": intent_data.get("reasoning")
+            })
             
             # 2. Routing
             if target_agent == "review_monk":
                 # In a real scenario, we'd extract the diff or PR URL here. 
                 # For now, we assume the input might contain code or we ask for it.
                 # Passing raw message for now.
-                return await self.review_monk.process(
-                    {"diff": input_data.get("code_context", user_message), "pr_title": "User Query"},
-                    session_id
-                )
+                with ORCHESTRATOR_STAGE_SECONDS.labels("agent", target_agent).time():
+                    return await self.review_monk.process(
+                        {"diff": input_data.get("code_context", user_message), "pr_title": "User Query"},
+                        session_id
+                    )
                 
             elif target_agent == "codebase_sherpa":
-                return await self.codebase_sherpa.process(
-                    {
-                        "action": "explain", 
-                        "code_snippet": input_data.get("code_context", user_message),
-                        "target_language": "English" # Default to English, can extract from message later
-                    },
-                    session_id
-                )
+                with ORCHESTRATOR_STAGE_SECONDS.labels("agent", target_agent).time():
+                    return await self.codebase_sherpa.process(
+                        {
+                            "action": "explain", 
+                            "code_snippet": input_data.get("code_context", user_message),
+                            "file_path": input_data.get("file_path"),
+                            "repo": input_data.get("repo"),
+                            "target_language": input_data.get("language")
+                        },
+                        session_id
+                    )
             
             else:
                 # General chat fallback
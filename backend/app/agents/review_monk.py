@@ -1,5 +1,10 @@
 from app.agents.base_agent import BaseAgent
-import json
+from app.core.config import settings
+from app.schemas.agent_output_schema import ReviewOutput
+from app.services.static_analysis import static_analyzer
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ReviewMonkAgent(BaseAgent):
     def __init__(self):
@@ -50,6 +55,26 @@ class ReviewMonkAgent(BaseAgent):
         if not diff:
             return {"error": "No diff provided"}
 
+        # Cheap local checks first: their findings are hints for the model and are always reported
+        static = {"findings": [], "trivial": None}
+        if settings.STATIC_ANALYSIS_ENABLED:
+            static = await static_analyzer.analyze(diff)
+        if static["trivial"] and settings.STATIC_ANALYSIS_SKIP_TRIVIAL:
+            return {
+                "summary": f"No model review needed: {static['trivial']}.",
+                "findings": [],
+                "quality_score": 10,
+                "security_risk": "None",
+                "skipped": static["trivial"]
+            }
+
+        hints = ""
+        if static["findings"]:
+            hints = "\n        Local static analysis already flagged (confirm, refine or dismiss each; do not just repeat them):\n"
+            hints += "\n".join(
+                f"        - [{f['severity']}] {f['file']}:{f['line']} {f['issue']}" for f in static["findings"]
+            ) + "\n"
+
         prompt = f"""
         Please review the following Pull Request:
         Title: {pr_title}
@@ -59,27 +84,38 @@ class ReviewMonkAgent(BaseAgent):
         {diff[:20000]}  # Truncate if too long to avoid token limits mostly for demo
         ```
         
+        {hints}
         Analyze this diff and provide a structured JSON review as specified in your system prompt.
         """
         
-        response_text = await self.call_claude(
-            prompt=prompt,
-            system_prompt=self.system_prompt,
+        # Parsed tolerantly (prose, code fences, truncation); escalates if a small model is configured
+        review_data, response_text = await self.call_structured(
+            prompt,
+            self.system_prompt,
+            ReviewOutput,
             temperature=0.2 # Lower temperature for analytical tasks
         )
-        
-        # Parse JSON from response (handling potential markdown code blocks)
-        try:
-            clean_text = response_text.replace("```json", "").replace("```", "").strip()
-            review_data = json.loads(clean_text)
-            
-            # Save to memory
-            await self.save_context(session_id, "last_review", review_data)
-            
-            return review_data
-        except json.JSONDecodeError:
+        if review_data is None:
+            logger.warning("Unusable Review Monk output")
             return {"error": "Failed to parse AI response", "raw_response": response_text}
 
+        self._merge_static(review_data, static["findings"])
+        
+        # Save to memory
+        await self.save_context(session_id, "last_review", review_data)
+        
+        return review_data
+
+    @staticmethod
+    def _merge_static(review_data: dict, findings: list[dict]):
+        """Add local findings the model didn't report on the same file and line"""
+        if not findings or not isinstance(review_data, dict):
+            return
+        reported = {(f.get("file"), f.get("line")) for f in review_data.get("findings") or [] if isinstance(f, dict)}
+        review_data["findings"] = (review_data.get("findings") or []) + [
+            f for f in findings if (f["file"], f["line"]) not in reported
+        ]
+
     async def analyze_github_pr(self, repo_url: str, pr_number: int, github_service):
         """Helper to integration with actual GitHub service later"""
         # Placeholder for Phase 4
@@ -1,79 +1,228 @@
-from fastapi import APIRouter, Request, BackgroundTasks
+from fastapi import APIRouter, Request, BackgroundTasks, HTTPException, status
 import hashlib
 import hmac
+import json
 from app.core.config import settings
+from app.core.metrics import GITHUB_WEBHOOKS
+from app.core.redis_client import redis_client
 from app.services.github_service import github_service
-from app.agents.review_monk import ReviewMonkAgent
+from app.services.review_publisher import publish_review
+from app.services.code_index import code_index
+from app.core.container import get_orchestrator
+from app.core.tracing import capture_context, span_from_context
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-review_monk = ReviewMonkAgent()
 
-async def process_pr_review(repo_full_name: str, pr_number: int, pr_title: str):
-    """Background task to review code and post comments"""
+if not settings.GITHUB_WEBHOOK_SECRET:
+    logger.warning("GITHUB_WEBHOOK_SECRET not set. Webhook signatures will not be verified.")
+
+async def process_pr_review(
+    repo_full_name: str,
+    pr_number: int,
+    pr_title: str,
+    head_sha: str = "",
+    trace_context: dict = None,
+    claims: list[str] = None
+):
+    """
+    Background task to review code and post the review.
+    On failure the webhook's dedupe ``claims`` are released, so a
+    redelivery of the event retries the review.
+    """
+    with span_from_context("github.pr_review", trace_context, repo=repo_full_name, pr_number=pr_number):
+        try:
+            reviewed = await _review_pr(repo_full_name, pr_number, pr_title, head_sha)
+        except Exception as e:
+            logger.error(f"Review of {repo_full_name}#{pr_number} failed: {e}")
+            reviewed = False
+        if not reviewed:
+            await release(claims)
+
+
+async def _review_pr(repo_full_name: str, pr_number: int, pr_title: str, head_sha: str) -> bool:
+    """Review a PR; False when the review could not be completed and posted"""
     logger.info(f"Starting review for {repo_full_name}#{pr_number}")
     
     # 1. Fetch Diff
-    diff = await github_service.get_pr_diff(repo_full_name, pr_number)
+    diff = await github_service.get_pr_review_diff(repo_full_name, pr_number)
     
-    if not diff:
+    if diff is None:
         logger.error("Could not fetch diff. Aborting.")
-        return
+        return False
+    if not diff:
+        logger.info(f"No reviewable changes in {repo_full_name}#{pr_number}. Skipping.")
+        return True
 
     # 2. Run AI Analysis
+    review_monk = get_orchestrator().review_monk
     review_result = await review_monk.process(
         {"diff": diff, "pr_title": pr_title},
         session_id=f"gh-{repo_full_name}-{pr_number}"
     )
     
-    # 3. Format Comment
-    if "error" in review_result:
-        body = f"⚠️ **Review Monk Error**: {review_result['error']}"
-    else:
-        # Construct markdown from JSON
-        summary = review_result.get("summary", "No summary.")
-        flaws = review_result.get("findings", [])
-        score = review_result.get("quality_score", "?")
-        
-        body = f"## 🐵 Review Monk Analysis\n\n"
-        body += f"**Quality Score**: {score}/10\n\n"
-        body += f"### Summary\n{summary}\n\n"
-        
-        if flaws:
-            body += "### 🚨 Key Findings\n"
-            for flaw in flaws:
-                icon = "🔴" if flaw['severity'] == "CRITICAL" else "🟠" if flaw['severity'] == "HIGH" else "🔵"
-                body += f"- {icon} **{flaw['severity']}**: {flaw['issue']} (File: `{flaw['file']}`)\n"
-                body += f"  > Suggestion: {flaw['suggestion']}\n\n"
-        
-        body += "\n---\n*Generated by CodeSherpa AI 🇮🇳*"
-
-    # 4. Post back to GitHub
-    await github_service.post_comment(repo_full_name, pr_number, body)
+    # 3. Post back to GitHub as one review with inline comments (errors are posted too)
+    if not await publish_review(repo_full_name, pr_number, head_sha, review_result, diff):
+        logger.error(f"Could not post review for {repo_full_name}#{pr_number}")
+        return False
     logger.info(f"Posted review for {repo_full_name}#{pr_number}")
+    return "error" not in review_result
+
+
+# Events we act on; anything else is acknowledged without reading the body
+HANDLED_EVENTS = {"pull_request", "push", "ping"}
+REVIEW_ACTIONS = {"opened", "synchronize", "reopened"}
+
+
+async def index_push(repo_full_name: str, sha: str, trace_context: dict = None, claims: list[str] = None):
+    """Background task to bring the repository's code index up to a pushed commit, then refresh learning paths"""
+    with span_from_context("github.index_push", trace_context, repo=repo_full_name):
+        try:
+            await code_index.sync(repo_full_name, sha)
+        except Exception as e:
+            logger.error(f"Indexing {repo_full_name}@{sha} failed: {e}")
+            await release(claims)  # Let a redelivery retry
+            return
+        if settings.LEARNING_PATH_PRECOMPUTE:
+            generated = await get_orchestrator().codebase_sherpa.precompute_learning_paths(repo_full_name)
+            logger.info(f"Precomputed {generated} learning paths for {repo_full_name}")
+
+
+def _handle_push(payload: dict, background_tasks: BackgroundTasks, claims: list[str]) -> dict:
+    """Re-index the default branch on push (only the changed blobs are re-read)"""
+    repo = payload.get("repository") or {}
+    default_ref = f"refs/heads/{repo.get('default_branch', '')}"
+    if not settings.CODE_INDEX_ENABLED or payload.get("ref") != default_ref or payload.get("deleted"):
+        GITHUB_WEBHOOKS.labels("push", "ignored").inc()
+        return {"status": "ignored"}
+    if not repo.get("full_name") or not payload.get("after"):
+        GITHUB_WEBHOOKS.labels("push", "rejected").inc()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed push payload")
+
+    background_tasks.add_task(
+        index_push,
+        repo_full_name=repo["full_name"],
+        sha=payload["after"],
+        trace_context=capture_context(),
+        claims=claims
+    )
+    GITHUB_WEBHOOKS.labels("push", "accepted").inc()
+    return {"status": "accepted"}
+
+
+async def read_verified_body(request: Request) -> bytes:
+    """
+    Read the raw body while computing its HMAC-SHA256, then check it against
+    ``X-Hub-Signature-256``. Raises 401 on a bad signature and 413 when the
+    body exceeds the size cap, before any JSON parsing happens.
+    """
+    secret = settings.GITHUB_WEBHOOK_SECRET
+    digest = hmac.new(secret.encode(), digestmod=hashlib.sha256) if secret else None
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.GITHUB_WEBHOOK_MAX_BODY_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload too large")
+        if digest is not None:
+            digest.update(chunk)
+        chunks.append(chunk)
 
+    if digest is not None:
+        signature = request.headers.get("X-Hub-Signature-256", "")
+        if not hmac.compare_digest(signature, f"sha256={digest.hexdigest()}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
+    return b"".join(chunks)
 
-@router.post("/webhook")
+
+async def claim(key: str, ttl: int) -> bool:
+    """True the first time ``key`` is claimed within ``ttl`` seconds"""
+    return bool(await redis_client.set(key, "1", ex=ttl, nx=True))
+
+
+async def release(keys: list[str] = None):
+    """Drop claims taken for work that didn't complete"""
+    if keys:
+        await redis_client.delete(*keys)
+
+
+@router.post("/webhook", status_code=status.HTTP_202_ACCEPTED)
 async def github_webhook(request: Request, background_tasks: BackgroundTasks):
-    """endpoint to receive GitHub hooks"""
-    # Verify Signature (skipped for hackathon speed if secret missing, but good practice)
-    payload = await request.json()
-    
-    event = request.headers.get("X-GitHub-Event")
-    
-    if event == "pull_request":
-        action = payload.get("action")
-        if action in ["opened", "synchronize", "reopened"]:
-            pr = payload.get("pull_request")
-            repo = payload.get("repository")
-            
-            # Start background processing (don't block webhook)
-            background_tasks.add_task(
-                process_pr_review,
-                repo_full_name=repo["full_name"],
-                pr_number=pr["number"],
-                pr_title=pr["title"]
-            )
-            
+    """
+    Receive GitHub hooks.
+    Verifies the signature, drops redeliveries by ``X-GitHub-Delivery`` and
+    queues reviews in the background, acknowledging with 202 right away.
+    """
+    event = request.headers.get("X-GitHub-Event", "")
+    if event not in HANDLED_EVENTS:
+        GITHUB_WEBHOOKS.labels("other", "ignored").inc()
+        return {"status": "ignored"}
+
+    try:
+        body = await read_verified_body(request)
+    except HTTPException:
+        GITHUB_WEBHOOKS.labels(event, "rejected").inc()
+        raise
+
+    if event == "ping":
+        GITHUB_WEBHOOKS.labels(event, "accepted").inc()
+        return {"status": "pong"}
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        GITHUB_WEBHOOKS.labels(event, "rejected").inc()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+
+    review = event == "pull_request" and payload.get("action") in REVIEW_ACTIONS
+    pr = payload.get("pull_request")
+    repo = payload.get("repository")
+    if review and not (
+        isinstance(pr, dict) and isinstance(repo, dict) and repo.get("full_name") and pr.get("number")
+    ):
+        GITHUB_WEBHOOKS.labels(event, "rejected").inc()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed pull_request payload")
+
+    # Claims are released if the queued work fails, so a redelivery retries it
+    claims = []
+    delivery_id = request.headers.get("X-GitHub-Delivery")
+    if delivery_id:
+        delivery_key = f"gh:delivery:{delivery_id}"
+        if not await claim(delivery_key, settings.GITHUB_DELIVERY_TTL_SECONDS):
+            GITHUB_WEBHOOKS.labels(event, "duplicate").inc()
+            return {"status": "duplicate"}
+        claims.append(delivery_key)
+
+    if event == "push":
+        try:
+            return _handle_push(payload, background_tasks, claims)
+        except HTTPException:
+            await release(claims)
+            raise
+    if not review:
+        GITHUB_WEBHOOKS.labels(event, "ignored").inc()
+        return {"status": "ignored"}
+
+    # A reopen (or a manual redelivery under a new ID) of an already reviewed head is a no-op
+    head_sha = (pr.get("head") or {}).get("sha", "")
+    review_key = f"gh:review:{repo['full_name']}#{pr['number']}@{head_sha}"
+    if not await claim(review_key, settings.GITHUB_DELIVERY_TTL_SECONDS):
+        GITHUB_WEBHOOKS.labels(event, "duplicate").inc()
+        return {"status": "duplicate"}
+    claims.append(review_key)
+
+    # Runs after the 202 has been sent
+    background_tasks.add_task(
+        process_pr_review,
+        repo_full_name=repo["full_name"],
+        pr_number=pr["number"],
+        pr_title=pr.get("title", ""),
+        head_sha=head_sha,
+        trace_context=capture_context(),
+        claims=claims
+    )
+    GITHUB_WEBHOOKS.labels(event, "accepted").inc()
     return {"status": "accepted"}
@@ -1,11 +1,22 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, status
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.metrics import WHATSAPP_MESSAGES
+from app.core.tracing import capture_context
+from app.services.whatsapp_dispatcher import claim_message, release_messages, whatsapp_dispatcher
+import hashlib
+import hmac
+import json
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+if not settings.WHATSAPP_APP_SECRET:
+    logger.warning("WHATSAPP_APP_SECRET not set. Webhook signatures will not be verified.")
+
 # Verification token for WhatsApp Webhook setup (Meta requirement)
-VERIFY_TOKEN = "codesherpa_secure_verify_token" 
+VERIFY_TOKEN = settings.WHATSAPP_VERIFY_TOKEN
 
 @router.get("/webhook")
 async def verify_webhook(request: Request):
@@ -22,28 +33,76 @@ async def verify_webhook(request: Request):
             raise HTTPException(status_code=403, detail="Verification failed")
     return {"status": "error", "message": "Missing parameters"}
 
+
+def extract_messages(data: dict) -> list[dict]:
+    """Every message in a webhook payload, across all entries and changes"""
+    messages = []
+    for entry in data.get("entry", []):
+        for change in entry.get("changes", []):
+            value = change.get("value", {})
+            # Delivery/read receipts arrive as "statuses" and need no reply
+            for message in value.get("messages", []):
+                messages.append(message)
+    return messages
+
+
+def verify_signature(body: bytes, signature: str) -> bool:
+    """Check Meta's ``X-Hub-Signature-256`` (HMAC-SHA256 of the raw body with the app secret)"""
+    secret = settings.WHATSAPP_APP_SECRET
+    if not secret:
+        return True
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, f"sha256={expected}")
+
+
 @router.post("/webhook")
 async def whatsapp_webhook(request: Request):
-    """Receive messages from WhatsApp"""
-    data = await request.json()
-    
-    # Extract message (simplified for demo)
+    """
+    Receive messages from WhatsApp.
+    Messages are deduped and queued; replies are sent from the background,
+    so this returns as soon as the batch is enqueued. If the backlog is full,
+    rejected messages are un-claimed and a 503 makes Meta redeliver the batch
+    (messages that were queued are then skipped as duplicates).
+    Deliveries without a valid signature are rejected before anything is claimed.
+    """
+    body = await request.body()
+    if not verify_signature(body, request.headers.get("X-Hub-Signature-256", "")):
+        WHATSAPP_MESSAGES.labels("rejected").inc()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
     try:
-        entry = data['entry'][0]
-        changes = entry['changes'][0]
-        value = changes['value']
-        
-        if 'messages' in value:
-            message = value['messages'][0]
-            from_number = message['from']
-            msg_body = message['text']['body']
-            
-            logger.info(f"WhatsApp msg from {from_number}: {msg_body}")
-            
-            # Here we would route to Orchestrator -> Claude -> Send Reply
-            # For now, we just log it as the integration stub
-            
-    except Exception as e:
-        logger.error(f"Error parsing WhatsApp hook: {e}")
-
-    return {"status": "received"}
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        WHATSAPP_MESSAGES.labels("rejected").inc()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+    trace_context = capture_context()
+
+    queued = 0
+    rejected = []
+    for message in extract_messages(data):
+        message_id = message.get("id")
+        if not message_id or not await claim_message(message_id):
+            WHATSAPP_MESSAGES.labels("duplicate").inc()
+            continue
+        if message.get("type") != "text":
+            logger.info(f"Ignoring WhatsApp {message.get('type')} message {message_id}")
+            WHATSAPP_MESSAGES.labels("unsupported").inc()
+            continue
+        if whatsapp_dispatcher.submit({
+            "id": message_id,
+            "from": message.get("from"),
+            "text": message.get("text", {}).get("body", ""),
+            "trace_context": trace_context
+        }):
+            queued += 1
+        else:
+            rejected.append(message_id)
+
+    if rejected:
+        await release_messages(rejected)
+        return JSONResponse(
+            status_code=503,
+            content={"status": "busy", "queued": queued, "rejected": len(rejected)}
+        )
+    return {"status": "received", "queued": queued}
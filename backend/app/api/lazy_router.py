@@ -0,0 +1,42 @@
+"""
+Lazily imported routers for rarely used integrations.
+
+The module that defines a router (and everything it imports) is loaded on
+the first request under its mount prefix instead of at application import.
+Routes mounted this way are not listed in the main OpenAPI schema.
+"""
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+import asyncio
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LazyRouter:
+    """ASGI app that imports ``module:attribute`` (an APIRouter) on first use"""
+
+    def __init__(self, module: str, attribute: str = "router"):
+        self.module = module
+        self.attribute = attribute
+        self._app: ASGIApp = None
+        self._lock = asyncio.Lock()
+
+    async def _load(self) -> ASGIApp:
+        async with self._lock:
+            if self._app is None:
+                router = getattr(importlib.import_module(self.module), self.attribute)
+                sub_app = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
+                sub_app.include_router(router)
+                self._app = sub_app
+                logger.info(f"Loaded router {self.module}")
+        return self._app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        app = self._app or await self._load()
+        await app(scope, receive, send)
+
+
+__all__ = ["LazyRouter"]
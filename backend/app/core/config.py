@@ -26,12 +26,19 @@ class Settings(BaseSettings):
         "sqlite:///./codesherpa.db"  # Development: SQLite, Production: PostgreSQL
     )
     
+    DB_POOL_SIZE: int = 5  # Connections opened per worker at startup
+    DB_MAX_OVERFLOW: int = 10
+    DB_CREATE_TABLES: bool = True  # Disable when schema is managed by migrations
+    
     # === JWT Configuration ===
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production-12345")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Accounts allowed to use /api/v1/admin diagnostics
+    ADMIN_EMAILS: list = []
+    
     # === CORS Configuration ===
     CORS_ORIGINS: list = [
         "http://localhost:5173",
@@ -40,24 +47,159 @@ class Settings(BaseSettings):
         "http://127.0.0.1:5173"
     ]
     
+    # === HTTP Response Optimization ===
+    COMPRESSION_MINIMUM_SIZE: int = 500  # Bytes; smaller bodies are sent uncompressed
+    ETAG_PATHS: list = [
+        "/api/v1/chat",
+        "/api/v1/agents",
+        "/api/v1/projects",
+        "/api/v1/user/me"
+    ]
+    
     # === AWS Configuration ===
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     AWS_ACCESS_KEY_ID: Optional[str] = os.getenv("AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY: Optional[str] = os.getenv("AWS_SECRET_ACCESS_KEY")
+    BEDROCK_MODEL_ID: str = "anthropic.claude-3-5-sonnet-20241022-v2:0"  # "large" tier
+    BEDROCK_SMALL_MODEL_ID: str = "anthropic.claude-3-haiku-20240307-v1:0"  # "small" tier
+    # Tier ("small"/"large") or an explicit model ID per agent; unlisted agents use "large"
+    AGENT_MODELS: dict = {
+        "orchestrator": "small",
+        "translator": "small",
+        "review_monk": "large",
+        "codebase_sherpa": "large"
+    }
+    MODEL_ESCALATION_CONFIDENCE: float = 0.6  # Small-model answers below this are retried on the large model
+    # Streams read on their own thread pool (a thread each for the whole reply); more wait their turn
+    BEDROCK_STREAM_MAX_CONCURRENCY: int = 16
     
     # === GitHub Integration ===
     GITHUB_TOKEN: Optional[str] = os.getenv("GITHUB_TOKEN")
-    GITHUB_WEBHOOK_SECRET: Optional[str] = os.getenv("GITHUB_WEBHOOK_SECRET")
+    GITHUB_WEBHOOK_SECRET: Optional[str] = os.getenv("GITHUB_WEBHOOK_SECRET")  # Unsigned deliveries are accepted when unset
+    GITHUB_WEBHOOK_MAX_BODY_BYTES: int = 25 * 1024 * 1024  # GitHub caps payloads at 25 MB
+    GITHUB_DELIVERY_TTL_SECONDS: int = 3 * 24 * 3600  # How long delivery IDs are remembered
+    GITHUB_REVIEW_MAX_COMMENTS: int = 50  # Inline comments per review; the rest go in the summary
+    GITHUB_DIFF_MODE: str = "files"  # "files": paginated per-file patches, "diff": one raw diff
+    GITHUB_FILES_PAGE_CONCURRENCY: int = 4  # Parallel page fetches of the PR files list
+    # Paths never sent for review; "*/dir/*" matches the directory at any depth
+    GITHUB_REVIEW_EXCLUDE_GLOBS: list = [
+        "*/vendor/*", "*/node_modules/*", "*/third_party/*", "*/dist/*", "*/build/*",
+        "*.lock", "*/package-lock.json", "*/pnpm-lock.yaml", "*/go.sum",
+        "*.min.js", "*.min.css", "*.map", "*_pb2.py", "*.pb.go", "*/__generated__/*",
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.ico", "*.pdf", "*.zip", "*.gz",
+        "*.jar", "*.woff", "*.woff2", "*.ttf", "*.so", "*.dll", "*.exe"
+    ]
+    
+    # === Static Pre-analysis (Review Monk) ===
+    STATIC_ANALYSIS_ENABLED: bool = True
+    STATIC_ANALYZERS: list = []  # Analyzer names to run; empty runs every registered one
+    STATIC_ANALYSIS_WORKERS: int = 2  # Process-pool size for large diffs
+    STATIC_ANALYSIS_POOL_MIN_LINES: int = 5000  # Added lines before work moves to the pool
+    STATIC_ANALYSIS_SKIP_TRIVIAL: bool = True  # No model call for docs/lockfile/trailing-whitespace-only diffs
+    
+    # === Code Index (Codebase Sherpa) ===
+    CODE_INDEX_ENABLED: bool = False  # Index default-branch pushes of repositories that send webhooks
+    CODE_INDEX_DIR: str = os.getenv("CODE_INDEX_DIR", "./.code_index")  # Bare clones and SQLite indexes
+    CODE_INDEX_GIT_BASE_URL: str = "https://github.com"
+    CODE_INDEX_GIT_TIMEOUT_SECONDS: int = 600  # First clone of a large repository can take minutes
+    CODE_INDEX_MAX_FILE_BYTES: int = 512 * 1024  # Larger files are not indexed
+    CODE_INDEX_CHUNK_LINES: int = 60
+    CODE_INDEX_MAX_SYMBOLS: int = 8  # Definitions pulled into one answer
+    CODE_INDEX_CONTEXT_CHARS: int = 12000  # Repository context added to a Sherpa prompt
+    # User ID (JWT "sub") -> repositories ("owner/name") whose index that user may query
+    CODE_INDEX_REPO_ACCESS: dict = {}
+    VECTOR_INDEX_ENABLED: bool = True  # Embedding retrieval over indexed chunks (needs numpy)
+    VECTOR_INDEX_BACKEND: str = "bruteforce"  # "bruteforce" or "hnsw" (needs hnswlib)
+    EMBEDDING_DIM: int = 384
+    EMBEDDING_BATCH_SIZE: int = 256  # Chunks embedded per batch
+    VECTOR_TOP_K: int = 5  # Similar chunks added to a Sherpa prompt
+    LEARNING_PATH_PRECOMPUTE: bool = True  # Generate learning paths for changed modules after indexing
+    LEARNING_PATH_LANGUAGES: list = ["English"]  # Languages precomputed; others are generated on first request
+    LEARNING_PATH_MAX_MODULES: int = 50  # Generations per push, to bound model spend
+    LEARNING_PATH_CONCURRENCY: int = 2
+    
+    # === Multilingual Responses ===
+    SHERPA_TRANSLATE_RESPONSES: bool = True  # Generate in the pivot language and translate, instead of regenerating
+    SHERPA_PIVOT_LANGUAGE: str = "English"
+    SHERPA_LANGUAGES: list = ["English", "Hindi", "Hinglish"]  # Anything else is answered in the pivot language
+    SHERPA_ANSWER_CACHE_TTL_SECONDS: int = 24 * 3600  # Pivot-language answers shared by every target language
+    TRANSLATION_MAX_TOKENS: int = 4096  # Ceiling; also the budget of the retry after a cut-off translation
+    # Output tokens budgeted per character of the source JSON; Devanagari can take
+    # about a token per character, well above English's ~4 characters per token
+    TRANSLATION_TOKENS_PER_CHAR: float = 1.5
+    TRANSLATION_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    
+    # === WhatsApp Integration (Meta Cloud API) ===
+    WHATSAPP_ACCESS_TOKEN: Optional[str] = os.getenv("WHATSAPP_ACCESS_TOKEN")  # Replies are logged, not sent, when unset
+    WHATSAPP_PHONE_NUMBER_ID: Optional[str] = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
+    WHATSAPP_VERIFY_TOKEN: str = os.getenv("WHATSAPP_VERIFY_TOKEN", "codesherpa_secure_verify_token")
+    WHATSAPP_APP_SECRET: Optional[str] = os.getenv("WHATSAPP_APP_SECRET")  # Unsigned deliveries are accepted when unset
+    WHATSAPP_GRAPH_URL: str = "https://graph.facebook.com/v18.0"
+    WHATSAPP_DEFAULT_LANGUAGE: str = "English"  # Messages written in Devanagari are answered in Hindi
+    WHATSAPP_DEDUPE_TTL_SECONDS: int = 86400  # Meta retries deliveries for up to a day
+    WHATSAPP_MAX_CONCURRENCY: int = 16  # Numbers processed at once per worker
+    WHATSAPP_MAX_PENDING: int = 1000  # Queued messages per worker before Meta is asked to redeliver
+    WHATSAPP_SHUTDOWN_DRAIN_SECONDS: float = 10.0  # Time queued messages get to finish on shutdown
+    WHATSAPP_TEXT_LIMIT: int = 4096  # Characters per text message
+    WHATSAPP_CAPTION_LIMIT: int = 1024  # Characters per document caption
+    WHATSAPP_MAX_TEXT_CHUNKS: int = 3  # Longer replies are sent as a document
+    WHATSAPP_DOCUMENT_REPLIES: bool = True
+    WHATSAPP_MEDIA_TTL_SECONDS: int = 29 * 24 * 3600  # Meta keeps uploaded media for 30 days
     
     # === Redis Configuration ===
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    REDIS_MAX_CONNECTIONS: int = 50  # Pool size per worker
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+    REDIS_FAILURE_THRESHOLD: int = 3  # Consecutive errors before falling back
+    REDIS_RETRY_SECONDS: float = 5.0  # How long to stay on the fallback before re-probing
+    REDIS_FALLBACK_MAX_KEYS: int = 10000  # LRU bound of the in-memory fallback
+    
+    # === Agent Context Near Cache ===
+    CONTEXT_CACHE_MAX_ENTRIES: int = 5000  # Per worker
+    CONTEXT_CACHE_TTL_SECONDS: float = 30.0  # Upper bound on staleness
+    CONTEXT_CACHE_CHANNEL: str = "codesherpa:context-invalidate"
+    
+    # === WebSocket Configuration ===
+    WS_SEND_QUEUE_SIZE: int = 100  # Pending control frames per socket before eviction
+    WS_DELTA_QUEUE_SIZE: int = 200  # Pending (coalesced) token deltas per socket before eviction
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+    WS_PUBSUB_CHANNEL: str = "codesherpa:ws"
+    WS_MAX_IN_FLIGHT: int = 4  # Concurrent requests per socket
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = 25.0
+    WS_IDLE_TIMEOUT_SECONDS: float = 300.0
+    
+    # === Server-Sent Events ===
+    SSE_BUFFER_TTL_SECONDS: int = 300  # How long events stay resumable
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    
+    # === Tracing (OpenTelemetry) ===
+    OTEL_ENABLED: bool = False
+    OTEL_EXPORTER: str = "console"  # "console" or "otlp"
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    OTEL_SERVICE_NAME: str = "codesherpa-backend"
+    
+    # === Logging ===
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    # Fraction of sub-WARNING records kept per logger, e.g. {"app.services.bedrock_service": 0.1}
+    LOG_SAMPLE_RATES: dict = {}
+    
+    # === Event Loop Monitor ===
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.05
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.1  # Stalls longer than this are reported with a stack
+    
+    # === Sampling Profiler ===
+    PROFILER_MAX_SECONDS: float = 60.0
+    PROFILER_MIN_INTERVAL_SECONDS: float = 0.001
     
     # === DynamoDB Configuration ===
     DYNAMODB_TABLE_NAME: str = "codesherpa_memory"
     
     # === Email Configuration (Optional) ===
     SMTP_SERVER: Optional[str] = os.getenv("SMTP_SERVER")
-    SMTP_PORT: Optional[int] = os.getenv("SMTP_PORT", type=int)
+    SMTP_PORT: Optional[int] = None
     SMTP_USER: Optional[str] = os.getenv("SMTP_USER")
     SMTP_PASSWORD: Optional[str] = os.getenv("SMTP_PASSWORD")
     
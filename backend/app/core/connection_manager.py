@@ -0,0 +1,301 @@
+"""
+WebSocket connection registry with per-connection send queues.
+Delivers messages across workers and nodes through Redis pub/sub.
+"""
+
+from collections import deque
+from typing import Optional
+from fastapi import WebSocket, status
+from app.core.config import settings
+from app.core.redis_client import redis_client, NODE_ID
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Delta:
+    """Queued streaming text for one request; later deltas are appended until it is sent"""
+
+    __slots__ = ("request_id", "agent", "parts")
+
+    def __init__(self, request_id: Optional[str], agent: Optional[str], text: str):
+        self.request_id = request_id
+        self.agent = agent
+        self.parts = [text]
+
+    def render(self) -> str:
+        frame = {"type": "delta", "content": {"agent": self.agent, "text": "".join(self.parts)}}
+        if self.request_id is not None:
+            frame["request_id"] = self.request_id
+        return json.dumps(frame)
+
+
+class ClientConnection:
+    """
+    A single WebSocket client with its own bounded outbound queue.
+
+    A dedicated sender task drains the queue, so a slow client only ever
+    blocks itself. Token deltas are coalesced while they wait, so a slow
+    reader gets fewer, larger deltas instead of falling behind; they are
+    limited separately from control frames ("status", "response", ...).
+    Clients that exceed either limit, or stall a single send past
+    ``send_timeout``, are evicted.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        manager: "ConnectionManager",
+        user_id: Optional[str] = None,
+        queue_size: int = 100,
+        delta_queue_size: int = 200,
+        send_timeout: float = 10.0
+    ):
+        self.websocket = websocket
+        self.manager = manager
+        self.user_id = user_id
+        self.session_ids: set[str] = set()
+        self.queue_size = queue_size
+        self.delta_queue_size = delta_queue_size
+        self.pending: deque = deque()  # Rendered frames and _Delta records, in send order
+        self.frames = 0
+        self.deltas = 0
+        self.send_timeout = send_timeout
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._sender = asyncio.create_task(self._send_loop())
+
+    def enqueue(self, message: str) -> bool:
+        """Queue a message without blocking; evicts the client if it is too slow"""
+        if self.closed:
+            return False
+        if self.frames >= self.queue_size:
+            return self._overflow()
+        self.pending.append(message)
+        self.frames += 1
+        self._ready.set()
+        return True
+
+    def enqueue_delta(self, request_id: Optional[str], agent: Optional[str], text: str) -> bool:
+        """Queue streamed text, merging it into the previous delta if that is still unsent"""
+        if self.closed:
+            return False
+        tail = self.pending[-1] if self.pending else None
+        if isinstance(tail, _Delta) and tail.request_id == request_id and tail.agent == agent:
+            tail.parts.append(text)
+            return True
+        if self.deltas >= self.delta_queue_size:
+            return self._overflow()
+        self.pending.append(_Delta(request_id, agent, text))
+        self.deltas += 1
+        self._ready.set()
+        return True
+
+    def _overflow(self) -> bool:
+        logger.warning(f"Evicting slow WebSocket consumer (user={self.user_id})")
+        self.manager.schedule_evict(self, status.WS_1013_TRY_AGAIN_LATER)
+        return False
+
+    async def _send_loop(self):
+        """Write queued messages to the socket in order"""
+        try:
+            # Checks ``closed`` too: wait_for can swallow a cancel that races a finished send
+            while not self.closed:
+                if not self.pending:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                item = self.pending.popleft()
+                if isinstance(item, _Delta):
+                    self.deltas -= 1
+                    message = item.render()
+                else:
+                    self.frames -= 1
+                    message = item
+                await asyncio.wait_for(
+                    self.websocket.send_text(message),
+                    timeout=self.send_timeout
+                )
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"WebSocket send failed, evicting client: {str(e)}")
+            self.manager.schedule_evict(self, status.WS_1011_INTERNAL_ERROR)
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        """Stop the sender task and close the socket"""
+        if self.closed:
+            return
+        self.closed = True
+        self._sender.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+class ConnectionManager:
+    """
+    Manages WebSocket connections.
+
+    Connections are indexed by socket, user and session so lookups and
+    removals are O(1). Sessions are only indexed for authenticated sockets
+    and are scoped to their user, since session IDs are chosen by the
+    client. Messages addressed to a user or session are delivered locally
+    and published to Redis so other workers holding a matching socket
+    deliver them too.
+    """
+
+    def __init__(self, channel: str = None):
+        self.channel = channel or settings.WS_PUBSUB_CHANNEL
+        self.connections: dict[WebSocket, ClientConnection] = {}
+        self.users: dict[str, set[ClientConnection]] = {}
+        self.sessions: dict[tuple[str, str], set[ClientConnection]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._evictions: set[asyncio.Task] = set()
+
+    @property
+    def active_connections(self) -> list[WebSocket]:
+        """Sockets currently held by this worker"""
+        return list(self.connections)
+
+    async def connect(self, websocket: WebSocket, user_id: Optional[str] = None) -> ClientConnection:
+        """Accept and track new connection"""
+        await websocket.accept()
+        connection = ClientConnection(
+            websocket,
+            self,
+            user_id=user_id,
+            queue_size=settings.WS_SEND_QUEUE_SIZE,
+            delta_queue_size=settings.WS_DELTA_QUEUE_SIZE,
+            send_timeout=settings.WS_SEND_TIMEOUT_SECONDS
+        )
+        self.connections[websocket] = connection
+        if user_id:
+            self.users.setdefault(user_id, set()).add(connection)
+        logger.info(f"Client connected. Total connections: {len(self.connections)}")
+        return connection
+
+    def bind_session(self, websocket: WebSocket, session_id: str):
+        """Make an authenticated socket addressable by one of its user's sessions"""
+        connection = self.connections.get(websocket)
+        if connection is None or not connection.user_id or session_id in connection.session_ids:
+            return
+        connection.session_ids.add(session_id)
+        self.sessions.setdefault((connection.user_id, session_id), set()).add(connection)
+
+    def disconnect(self, websocket: WebSocket):
+        """Remove disconnected client"""
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        for session_id in connection.session_ids:
+            self._discard(self.sessions, (connection.user_id, session_id), connection)
+        if connection.user_id:
+            self._discard(self.users, connection.user_id, connection)
+        connection.closed = True
+        connection._sender.cancel()
+        logger.info(f"Client disconnected. Total connections: {len(self.connections)}")
+
+    async def evict(self, connection: ClientConnection, code: int):
+        """Drop a misbehaving client and close its socket"""
+        # Close first: disconnect() marks the connection closed, which would skip the socket close
+        await connection.close(code)
+        self.disconnect(connection.websocket)
+
+    def schedule_evict(self, connection: ClientConnection, code: int):
+        """Evict from synchronous code, keeping a reference to the task until it finishes"""
+        task = asyncio.create_task(self.evict(connection, code))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        """Send message to specific client"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.enqueue(message)
+
+    async def send_delta(self, websocket: WebSocket, request_id: Optional[str], agent: Optional[str], text: str):
+        """Send streamed model text to a client, coalesced with any unsent text"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.enqueue_delta(request_id, agent, text)
+
+    async def send_to_user(self, user_id: str, message: str):
+        """Send message to every socket owned by a user, on any node"""
+        self._deliver(self.users.get(user_id), message)
+        await self._publish({"user_id": user_id, "message": message})
+
+    async def send_to_session(self, user_id: str, session_id: str, message: str):
+        """Send message to every socket of ``user_id`` bound to a session, on any node"""
+        self._deliver(self.sessions.get((user_id, session_id)), message)
+        await self._publish({"user_id": user_id, "session_id": session_id, "message": message})
+
+    async def broadcast(self, message: str):
+        """Broadcast message to all connected clients, on any node"""
+        self._deliver(self.connections.values(), message)
+        await self._publish({"message": message})
+
+    # ===== PUB/SUB =====
+
+    async def start(self):
+        """Start relaying messages published by other workers to local sockets"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(
+                redis_client.subscribe(self.channel, self._handle_published)
+            )
+
+    async def stop(self):
+        """Stop the listener and close all local connections"""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        for connection in list(self.connections.values()):
+            await self.evict(connection, status.WS_1001_GOING_AWAY)
+
+    async def _publish(self, envelope: dict):
+        envelope["node"] = NODE_ID
+        try:
+            await redis_client.publish(self.channel, json.dumps(envelope))
+        except Exception as e:
+            logger.error(f"WebSocket publish failed: {str(e)}")
+
+    def _handle_published(self, data: str):
+        try:
+            envelope = json.loads(data)
+        except (TypeError, json.JSONDecodeError):
+            return
+        if envelope.get("node") == NODE_ID:
+            return
+
+        message = envelope.get("message", "")
+        if "session_id" in envelope:
+            self._deliver(self.sessions.get((envelope.get("user_id"), envelope["session_id"])), message)
+        elif "user_id" in envelope:
+            self._deliver(self.users.get(envelope["user_id"]), message)
+        else:
+            self._deliver(self.connections.values(), message)
+
+    # ===== HELPERS =====
+
+    @staticmethod
+    def _deliver(connections, message: str):
+        """Fan out without awaiting any individual socket"""
+        for connection in list(connections or ()):
+            connection.enqueue(message)
+
+    @staticmethod
+    def _discard(index: dict, key, connection: ClientConnection):
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.discard(connection)
+        if not bucket:
+            del index[key]
+
+
+manager = ConnectionManager()
+
+__all__ = ["ClientConnection", "ConnectionManager", "manager"]
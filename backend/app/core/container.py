@@ -0,0 +1,121 @@
+"""
+Process-wide application container.
+
+Builds agents and shared clients exactly once per worker process and warms
+their connections during the ASGI lifespan, before the worker is reported
+ready. Request handlers and background jobs reach shared state through
+``container`` instead of constructing their own.
+"""
+
+from typing import Optional
+from app.agents.orchestrator import OrchestratorAgent
+from app.core.config import settings
+from app.core.connection_manager import manager
+from app.core.loop_monitor import loop_monitor
+from app.core.near_cache import context_cache
+from app.core.redis_client import redis_client
+from app.core.tracing import setup_tracing, shutdown_tracing
+from app.db.database import init_db, warm_pool, check_db
+from app.services.bedrock_service import bedrock_client
+import asyncio
+import inspect
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# (module, singleton, cleanup method) of services loaded on first use, e.g. by a
+# lazily mounted router. Shutdown cleans up only the ones this process imported.
+LAZY_SERVICES = [
+    ("app.services.whatsapp_dispatcher", "whatsapp_dispatcher", "stop"),
+    ("app.services.github_service", "github_service", "close"),
+    ("app.services.whatsapp_service", "whatsapp_service", "close"),
+    ("app.services.static_analysis", "static_analyzer", "close"),
+]
+
+
+class AppContainer:
+    """Owns the lifecycle of per-process services"""
+
+    def __init__(self):
+        self.orchestrator: Optional[OrchestratorAgent] = None
+        self.ready = False
+
+    async def startup(self):
+        """Initialize database, build agents and warm connections"""
+        loop = asyncio.get_event_loop()
+        setup_tracing()
+        if settings.LOOP_MONITOR_ENABLED:
+            await loop_monitor.start()
+
+        if settings.DB_CREATE_TABLES:
+            try:
+                await loop.run_in_executor(None, init_db)
+                logger.info("Database initialized successfully")
+            except Exception as e:
+                logger.error(f"Error initializing database: {str(e)}")
+
+        self.orchestrator = OrchestratorAgent()
+        logger.info("Orchestrator initialized")
+
+        await self.warm_up()
+
+        # Relay WebSocket messages and cache invalidations from other workers/nodes
+        await manager.start()
+        await context_cache.start()
+
+        self.ready = True
+        logger.info("Application container ready")
+
+    async def warm_up(self):
+        """Open connections ahead of traffic; failures are logged, not fatal"""
+        loop = asyncio.get_event_loop()
+        results = await asyncio.gather(
+            redis_client.ping(),
+            loop.run_in_executor(None, warm_pool),
+            bedrock_client.warm_up(),
+            return_exceptions=True
+        )
+        for name, result in zip(("redis", "database", "bedrock"), results):
+            if isinstance(result, Exception):
+                logger.warning(f"Warm-up of {name} failed: {str(result)}")
+
+    async def shutdown(self):
+        """Release connections held by this process"""
+        self.ready = False
+        await manager.stop()
+        await context_cache.stop()
+        await loop_monitor.stop()
+        for module_name, attribute, method in LAZY_SERVICES:
+            module = sys.modules.get(module_name)
+            if module is None:
+                continue
+            result = getattr(getattr(module, attribute), method)()
+            if inspect.isawaitable(result):
+                await result
+        bedrock_client.close()
+        await redis_client.close()
+        shutdown_tracing()
+
+    async def readiness(self) -> dict:
+        """Dependency status for the readiness probe"""
+        loop = asyncio.get_event_loop()
+        database_ok = await loop.run_in_executor(None, check_db)
+        return {
+            "ready": self.ready and database_ok,
+            "orchestrator": self.orchestrator is not None,
+            "database": database_ok,
+            # Redis is optional: the in-memory fallback keeps the worker usable
+            "redis": await redis_client.ping()
+        }
+
+
+container = AppContainer()
+
+
+def get_orchestrator() -> Optional[OrchestratorAgent]:
+    """Shared orchestrator for this process (None before startup)"""
+    return container.orchestrator
+
+
+__all__ = ["AppContainer", "container", "get_orchestrator"]
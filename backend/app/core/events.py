@@ -0,0 +1,39 @@
+"""
+Progress events emitted while a request is being processed.
+
+Transports (SSE, WebSocket) install a sink for the duration of a request;
+agents call ``emit`` without knowing who, if anyone, is listening.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+EventSink = Callable[[str, Any], Awaitable[None]]
+
+_event_sink: ContextVar[Optional[EventSink]] = ContextVar("event_sink", default=None)
+
+
+def is_streaming() -> bool:
+    """True when the current request has a listener for progress events"""
+    return _event_sink.get() is not None
+
+
+async def emit(event: str, data: Any = None):
+    """Forward an event to the current request's sink, if any"""
+    sink = _event_sink.get()
+    if sink is not None:
+        await sink(event, data)
+
+
+@contextmanager
+def event_sink(sink: EventSink):
+    """Route events emitted inside the block (and tasks it spawns) to ``sink``"""
+    token = _event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+
+__all__ = ["EventSink", "emit", "event_sink", "is_streaming"]
@@ -0,0 +1,193 @@
+"""
+Tolerant JSON extraction from model output.
+
+Models wrap JSON in prose and code fences, and replies cut off at
+``max_tokens`` end mid-string. ``extract_json`` finds the first JSON
+object in the text, parses it while ignoring anything after it, and
+repairs truncation by closing open strings and containers (dropping the
+trailing member if that's the only way to get valid JSON). It can then
+validate the result against a Pydantic schema.
+
+``IncrementalJSONParser`` works on a token stream and reports each
+top-level field of the object as soon as its value is complete, so
+callers can forward partial results before the reply finishes.
+"""
+
+from typing import Optional, Type
+from pydantic import BaseModel, ValidationError
+import json
+
+_decoder = json.JSONDecoder()
+_CLOSERS = {"{": "}", "[": "]"}
+MAX_REPAIR_ATTEMPTS = 64
+
+
+class ModelOutputError(ValueError):
+    """The model's reply holds no usable JSON, or it doesn't match the expected schema"""
+
+
+class _Scanner:
+    """
+    Tracks string/escape state and container nesting over a growing buffer.
+    Records the complete-prefix points that ``repair`` can cut back to.
+    """
+
+    def __init__(self):
+        self.stack: list[str] = []
+        self.in_string = False
+        self.escape = False
+        # (cut position, open containers at that point); cutting there leaves only complete members
+        self.safe_points: list[tuple[int, tuple[str, ...]]] = []
+
+    def feed(self, text: str, offset: int):
+        for i, char in enumerate(text, offset):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.stack.append(char)
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                self.safe_points.append((i + 1, tuple(self.stack)))
+            elif char == ",":
+                self.safe_points.append((i, tuple(self.stack)))
+
+
+def _close(stack) -> str:
+    return "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def repair(fragment: str) -> Optional[object]:
+    """
+    Parse a JSON document that may be cut off, or None if nothing usable
+    can be recovered. ``fragment`` must start at the opening brace/bracket.
+    """
+    scanner = _Scanner()
+    scanner.feed(fragment, 0)
+
+    # Keep a truncated string value: close the string, then the containers
+    body = fragment.rstrip()
+    if scanner.in_string:
+        body = (body[:-1] if scanner.escape else body) + '"'
+    candidates = [body.rstrip(",: \n\t") + _close(scanner.stack)]
+    # Otherwise fall back to the last point where every member was complete
+    for cut, stack in reversed(scanner.safe_points[-MAX_REPAIR_ATTEMPTS:]):
+        candidates.append(fragment[:cut] + _close(stack))
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def extract_json(text: str, schema: Type[BaseModel] = None, repair_truncated: bool = True) -> dict:
+    """
+    The first JSON object in ``text``, repaired if truncated (unless
+    ``repair_truncated`` is False) and, with ``schema``, validated and
+    normalised. Raises ``ModelOutputError``.
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ModelOutputError("No JSON object in model output")
+
+    try:
+        data, _ = _decoder.raw_decode(text, start)  # Ignores anything after the object
+    except ValueError:
+        if not repair_truncated:
+            raise ModelOutputError("Model output JSON is incomplete")
+        data = repair(_strip_fence_tail(text[start:]))
+        if data is None:
+            raise ModelOutputError("Model output JSON could not be repaired")
+    if not isinstance(data, dict):
+        raise ModelOutputError("Model output is not a JSON object")
+
+    if schema is None:
+        return data
+    try:
+        return schema.model_validate(data).model_dump()
+    except ValidationError as e:
+        raise ModelOutputError(f"Model output does not match {schema.__name__}: {e.errors()[:3]}") from e
+
+
+def _strip_fence_tail(fragment: str) -> str:
+    """Drop a closing code fence (and anything after it) from an unparseable object"""
+    fence = fragment.rfind("```")
+    return fragment[:fence] if fence > 0 else fragment
+
+
+class IncrementalJSONParser:
+    """
+    Feed model output chunk by chunk; ``feed`` returns the top-level
+    ``(key, value)`` pairs of the JSON object that completed in that chunk.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.start: Optional[int] = None
+        self._scanner = _Scanner()
+        self._scanned = 0
+        self._member_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        self.buffer += chunk
+        if self.done:
+            return []
+        if self.start is None:
+            start = self.buffer.find("{", self._scanned)
+            if start < 0:
+                self._scanned = len(self.buffer)
+                return []
+            self.start = self._scanned = start
+
+        fields = []
+        scanner = self._scanner
+        for i in range(self._scanned, len(self.buffer)):
+            depth_before = len(scanner.stack)
+            in_string = scanner.in_string
+            scanner.feed(self.buffer[i], i)
+            if in_string or scanner.in_string:
+                continue  # Inside a string, or just opened one
+            char = self.buffer[i]
+            if char == "{" and depth_before == 0:
+                self._member_start = i + 1
+            elif depth_before == 1 and char in ",}":
+                # A member of the top-level object just ended
+                field = self._parse_member(self.buffer[self._member_start:i])
+                if field is not None:
+                    fields.append(field)
+                self._member_start = i + 1
+                if char == "}":
+                    self.done = True
+                    break
+        self._scanned = len(self.buffer)
+        return fields
+
+    @staticmethod
+    def _parse_member(text: str) -> Optional[tuple[str, object]]:
+        try:
+            member = json.loads("{" + text + "}")
+        except ValueError:
+            return None
+        return next(iter(member.items()), None)
+
+    def result(self) -> Optional[object]:
+        """Everything parsed so far, repaired if the stream stopped mid-object"""
+        if self.start is None:
+            return None
+        try:
+            return _decoder.raw_decode(self.buffer, self.start)[0]
+        except ValueError:
+            return repair(_strip_fence_tail(self.buffer[self.start:]))
+
+
+__all__ = ["IncrementalJSONParser", "ModelOutputError", "extract_json", "repair"]
@@ -0,0 +1,151 @@
+"""
+Event-loop lag monitor and blocking-call detector.
+
+A heartbeat coroutine wakes every ``LOOP_MONITOR_INTERVAL_SECONDS`` and
+records how late it was scheduled. A watchdog thread watches the heartbeat;
+when the loop has been stuck longer than ``LOOP_BLOCK_THRESHOLD_SECONDS`` it
+snapshots the loop thread's stack, so the report names the synchronous call
+(bcrypt, a SQLAlchemy query, ``json.loads`` on a big diff...) that was
+holding the loop, not just the fact that it was late.
+
+Opt-in via ``LOOP_MONITOR_ENABLED``; the benchmark suite drives it directly.
+"""
+
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import LOOP_BLOCKING_CALLS, LOOP_LAG_SECONDS
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def call_site(stack: traceback.StackSummary) -> str:
+    """
+    Innermost application frame of a stack, e.g. ``app/core/security.py:41 (verify_password)``.
+    Falls back to the innermost frame when the stack never enters app code.
+    """
+    for frame in reversed(stack):
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__:
+            relative = os.path.relpath(frame.filename, os.path.dirname(APP_DIR))
+            return f"{relative}:{frame.lineno} ({frame.name})"
+    if not stack:
+        return "unknown"
+    frame = stack[-1]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno} ({frame.name})"
+
+
+class LoopMonitor:
+    """
+    Measures loop lag and counts blocking calls per call site.
+
+    ``blocking_calls`` maps call site -> number of stalls observed there;
+    ``stacks`` keeps the first full stack seen for each site.
+    """
+
+    def __init__(self, interval: float = None, threshold: float = None):
+        self.interval = interval or settings.LOOP_MONITOR_INTERVAL_SECONDS
+        self.threshold = threshold or settings.LOOP_BLOCK_THRESHOLD_SECONDS
+        self.blocking_calls: dict[str, int] = {}
+        self.stacks: dict[str, str] = {}
+        self.max_lag = 0.0
+        self._last_beat = 0.0
+        self._reported_beat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    async def start(self):
+        """Start monitoring the running loop"""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Event-loop monitor started (interval {self.interval}s, "
+            f"threshold {self.threshold}s)"
+        )
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._stopped.set()
+        self._heartbeat.cancel()
+        self._heartbeat = None
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    def reset(self):
+        """Forget counts, e.g. between benchmark phases"""
+        self.blocking_calls.clear()
+        self.stacks.clear()
+        self.max_lag = 0.0
+
+    def report(self) -> dict:
+        """Blocking call sites ordered by stall count"""
+        ranked = sorted(self.blocking_calls.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "max_lag_seconds": round(self.max_lag, 4),
+            "threshold_seconds": self.threshold,
+            "blocking_calls": [
+                {"call_site": site, "count": count, "stack": self.stacks[site]}
+                for site, count in ranked
+            ]
+        }
+
+    async def _beat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            self._last_beat = now
+
+    def _watch(self):
+        """Watchdog thread: snapshot the loop thread while it is stuck"""
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._last_beat
+            if beat == self._reported_beat or time.monotonic() - beat < self.threshold + self.interval:
+                continue
+            # One report per stall, however long it lasts
+            self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._record(traceback.extract_stack(frame))
+
+    def _record(self, stack: traceback.StackSummary):
+        site = call_site(stack)
+        self.blocking_calls[site] = self.blocking_calls.get(site, 0) + 1
+        LOOP_BLOCKING_CALLS.labels(site).inc()
+        if site not in self.stacks:
+            self.stacks[site] = "".join(stack.format())
+            logger.warning(
+                f"Event loop blocked for more than {self.threshold}s at {site}:\n"
+                f"{self.stacks[site]}"
+            )
+        else:
+            logger.warning(f"Event loop blocked for more than {self.threshold}s at {site}")
+
+
+loop_monitor = LoopMonitor()
+
+__all__ = ["LoopMonitor", "call_site", "loop_monitor"]
@@ -0,0 +1,205 @@
+"""
+Prometheus metrics for hot paths across the API, agents and services.
+
+All instruments live here so label sets stay consistent. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (multiple uvicorn workers), ``/metrics``
+aggregates samples from every worker process.
+"""
+
+from typing import Callable
+from opentelemetry import trace
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+import asyncio
+import os
+import time
+
+# Buckets tuned for model calls, which run from ~100ms to tens of seconds
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+# ===== HTTP / WEBSOCKET =====
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+WS_MESSAGE_SECONDS = Histogram(
+    "websocket_message_duration_seconds",
+    "Time to fully handle one WebSocket chat request",
+    ["outcome"],
+    buckets=SLOW_BUCKETS
+)
+
+# ===== AGENTS =====
+
+ORCHESTRATOR_STAGE_SECONDS = Histogram(
+    "orchestrator_stage_duration_seconds",
+    "Orchestrator time split into classification and specialist agent work",
+    ["stage", "agent"],
+    buckets=SLOW_BUCKETS
+)
+
+BEDROCK_CALL_SECONDS = Histogram(
+    "bedrock_call_duration_seconds",
+    "Bedrock model call latency",
+    ["agent", "mode", "outcome"],
+    buckets=SLOW_BUCKETS
+)
+
+MODEL_ESCALATIONS = Counter(
+    "model_escalations_total",
+    "Small-tier answers retried on the large model",
+    ["agent", "reason"]
+)
+
+BEDROCK_TOKENS = Counter(
+    "bedrock_tokens_total",
+    "Tokens consumed by Bedrock calls",
+    ["agent", "direction"]
+)
+
+BEDROCK_ERRORS = Counter(
+    "bedrock_errors_total",
+    "Bedrock calls that failed and fell back to a mock response",
+    ["agent"]
+)
+
+CONTEXT_CACHE_REQUESTS = Counter(
+    "agent_context_cache_requests_total",
+    "Near-cache lookups of agent context",
+    ["agent", "result"]
+)
+
+# ===== DATA STORES / EXTERNAL APIS =====
+
+REDIS_OP_SECONDS = Histogram(
+    "redis_operation_duration_seconds",
+    "Redis command latency, including fallback-served commands",
+    ["operation", "backend"],
+    buckets=FAST_BUCKETS
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ["statement"],
+    buckets=FAST_BUCKETS
+)
+
+GITHUB_API_SECONDS = Histogram(
+    "github_api_duration_seconds",
+    "GitHub API call latency",
+    ["operation", "status"],
+    buckets=SLOW_BUCKETS
+)
+
+GITHUB_WEBHOOKS = Counter(
+    "github_webhooks_total",
+    "GitHub webhook deliveries by event and outcome",
+    ["event", "result"]
+)
+
+WHATSAPP_API_SECONDS = Histogram(
+    "whatsapp_api_duration_seconds",
+    "WhatsApp Graph API call latency",
+    ["operation", "status"],
+    buckets=SLOW_BUCKETS
+)
+
+WHATSAPP_MESSAGES = Counter(
+    "whatsapp_messages_total",
+    "Inbound WhatsApp messages by what happened to them",
+    ["result"]
+)
+
+# ===== EXECUTOR =====
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth",
+    "Jobs submitted to the default thread pool that have not started yet",
+    multiprocess_mode="livesum"
+)
+
+EXECUTOR_WAIT_SECONDS = Histogram(
+    "executor_wait_seconds",
+    "Time jobs spend queued before a thread-pool worker picks them up",
+    buckets=FAST_BUCKETS
+)
+
+# ===== EVENT LOOP =====
+
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop monitor's heartbeat was scheduled",
+    buckets=FAST_BUCKETS
+)
+
+LOOP_BLOCKING_CALLS = Counter(
+    "event_loop_blocking_calls_total",
+    "Stalls longer than the blocking threshold, by application call site",
+    ["call_site"]
+)
+
+
+def run_in_executor(func: Callable, *args) -> asyncio.Future:
+    """
+    ``loop.run_in_executor(None, ...)`` that records queue depth and wait time.
+    The wait is also added as an event on the caller's current span.
+    Returns the future, so it can be awaited or left to run in the background.
+    """
+    loop = asyncio.get_event_loop()
+    span = trace.get_current_span()
+    submitted = time.perf_counter()
+    EXECUTOR_QUEUE_DEPTH.inc()
+
+    def call():
+        waited = time.perf_counter() - submitted
+        EXECUTOR_QUEUE_DEPTH.dec()
+        EXECUTOR_WAIT_SECONDS.observe(waited)
+        span.add_event("executor.start", {"wait_seconds": waited})
+        return func(*args)
+
+    return loop.run_in_executor(None, call)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition payload and content type for the /metrics endpoint"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+__all__ = [
+    "MODEL_ESCALATIONS",
+    "BEDROCK_CALL_SECONDS",
+    "BEDROCK_ERRORS",
+    "BEDROCK_TOKENS",
+    "CONTEXT_CACHE_REQUESTS",
+    "DB_QUERY_SECONDS",
+    "EXECUTOR_QUEUE_DEPTH",
+    "EXECUTOR_WAIT_SECONDS",
+    "GITHUB_API_SECONDS",
+    "GITHUB_WEBHOOKS",
+    "HTTP_REQUEST_SECONDS",
+    "LOOP_BLOCKING_CALLS",
+    "LOOP_LAG_SECONDS",
+    "ORCHESTRATOR_STAGE_SECONDS",
+    "REDIS_OP_SECONDS",
+    "WHATSAPP_API_SECONDS",
+    "WHATSAPP_MESSAGES",
+    "WS_MESSAGE_SECONDS",
+    "render_metrics",
+    "run_in_executor"
+]
@@ -0,0 +1,387 @@
+"""
+HTTP middleware for response compression, conditional GET handling, request
+metrics and tracing. Pure ASGI implementations so streaming responses pass
+through untouched.
+"""
+
+from typing import Iterable, Optional
+import gzip
+import hashlib
+import logging
+import time
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from opentelemetry import context, propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from app.core.logging_setup import log_context
+from app.core.metrics import HTTP_REQUEST_SECONDS
+from app.core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # Optional dependency - fall back to gzip only
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def _is_compressible(content_type: Optional[str]) -> bool:
+    """Check whether a content type benefits from compression"""
+    if not content_type:
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """Map each listed coding to its q-value; an unparseable q-value counts as 0"""
+    codings = {}
+    for part in accept_encoding.split(","):
+        name, *params = part.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        codings[name] = q
+    return codings
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding supported by both client and server (q=0 excludes one)"""
+    codings = _parse_accept_encoding(accept_encoding)
+
+    def accepted(coding: str) -> bool:
+        return codings.get(coding, codings.get("*", 0.0)) > 0
+
+    if brotli is not None and accepted("br"):
+        return "br"
+    if accepted("gzip"):
+        return "gzip"
+    return None
+
+
+def compute_etag(body: bytes) -> str:
+    """
+    Build a weak ETag from the response body.
+
+    Weak because the same representation may be sent gzip, brotli or identity
+    encoded; all of them are semantically equivalent for revalidation.
+    """
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header value"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (tag[2:] if tag.startswith("W/") else tag) == opaque
+        for tag in candidates
+    )
+
+
+class _BufferedResponder:
+    """
+    Collects a single-message response body so it can be rewritten.
+
+    Streaming responses (more than one body chunk) are forwarded as-is,
+    which keeps SSE and file downloads unbuffered.
+    """
+
+    def __init__(self, send: Send):
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.streaming = False
+
+    async def __call__(self, message: Message) -> Optional[bytes]:
+        """Returns the full body once available, or None while streaming"""
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return None
+
+        if self.streaming:
+            await self.send(message)
+            return None
+
+        if message.get("more_body", False):
+            # Streaming response: give up on rewriting and pass through
+            self.streaming = True
+            await self.send(self.start_message)
+            await self.send(message)
+            return None
+
+        return message.get("body", b"")
+
+
+class CompressionMiddleware:
+    """
+    Compresses buffered responses with brotli or gzip.
+
+    Responses smaller than ``minimum_size``, already encoded responses and
+    streaming responses are sent uncompressed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _BufferedResponder(send)
+
+        async def send_wrapper(message: Message) -> None:
+            body = await responder(message)
+            if body is None:
+                return
+
+            start = responder.start_message
+            headers = MutableHeaders(raw=start["headers"])
+
+            if (
+                len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not _is_compressible(headers.get("content-type"))
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            body = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        """Encode body with the negotiated algorithm"""
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds ETags to GET responses under the given path prefixes and answers
+    ``If-None-Match`` revalidations with 304 Not Modified.
+
+    The ETag is derived from the rendered body, so polling clients only pay
+    for a full payload when the underlying rows actually changed. HEAD is
+    rendered as GET and sent without the body, so both carry the same ETag.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str] = ()):
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        head = scope["method"] == "HEAD"
+        if head:
+            scope = {**scope, "method": "GET"}
+
+        async def send_out(message: Message) -> None:
+            if head and message["type"] == "http.response.body":
+                message = {**message, "body": b""}
+            await send(message)
+
+        responder = _BufferedResponder(send_out)
+
+        async def send_wrapper(message: Message) -> None:
+            body = await responder(message)
+            if body is None:
+                return
+
+            start = responder.start_message
+            if start["status"] != 200:
+                await send_out(start)
+                await send_out(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            etag = compute_etag(body)
+            headers["ETag"] = etag
+            headers.setdefault("Cache-Control", "private, no-cache")
+
+            if if_none_match and etag_matches(etag, if_none_match):
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                start["status"] = 304
+                await send_out(start)
+                await send_out({"type": "http.response.body", "body": b""})
+                return
+
+            await send_out(start)
+            await send_out(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class MetricsMiddleware:
+    """
+    Records HTTP latency per route template (``/api/v1/agents/{agent_id}``),
+    not per raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code)
+            ).observe(time.perf_counter() - started)
+
+
+class TracingMiddleware:
+    """
+    Opens a server span per HTTP request, continuing the caller's trace when
+    a W3C ``traceparent`` header is present. The span ends once the response
+    has been sent, so background tasks that run afterwards don't inflate it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = propagate.extract(dict(Headers(scope=scope)))
+        span = tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        token = context.attach(trace.set_span_in_context(span, parent))
+        ended = False
+
+        def finish(status_code: int):
+            nonlocal ended
+            if ended:
+                return
+            ended = True
+            route = scope.get("route")
+            if route is not None:
+                span.update_name(f"{scope['method']} {route.path}")
+                span.set_attribute("http.route", route.path)
+            span.set_attribute("http.status_code", status_code)
+            if status_code >= 500:
+                span.set_status(Status(StatusCode.ERROR))
+            span.end()
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish(status_code)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            finish(status_code)
+            context.detach(token)
+
+
+class RequestIdMiddleware:
+    """
+    Binds a request ID to everything logged while handling the request.
+    Reuses the caller's ``X-Request-ID`` when present and echoes it back.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])["X-Request-ID"] = request_id
+            await send(message)
+
+        with log_context(request_id=request_id):
+            await self.app(scope, receive, send_wrapper)
+
+
+__all__ = [
+    "CompressionMiddleware",
+    "ConditionalGetMiddleware",
+    "MetricsMiddleware",
+    "RequestIdMiddleware",
+    "TracingMiddleware",
+    "compute_etag",
+    "etag_matches"
+]
@@ -0,0 +1,117 @@
+"""
+In-process near cache in front of Redis for agent context.
+
+Holds decoded values so hot reads skip both the network hop and
+``json.loads``. Writes go through to Redis and publish an invalidation
+so other workers drop their copy; a short TTL bounds staleness if an
+invalidation is ever missed (e.g. while Redis pub/sub is down).
+"""
+
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+from app.core.config import settings
+from app.core.metrics import CONTEXT_CACHE_REQUESTS
+from app.core.redis_client import redis_client, NODE_ID
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class NearCache:
+    """
+    Size-bounded LRU with per-entry TTL and per-agent hit/miss counters.
+
+    Cached values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, channel: str = None):
+        self.max_entries = max_entries or settings.CONTEXT_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else settings.CONTEXT_CACHE_TTL_SECONDS
+        self.channel = channel or settings.CONTEXT_CACHE_CHANNEL
+        self.entries: OrderedDict = OrderedDict()
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def get(self, key: str, owner: str = "default") -> Any:
+        """Cached value, or the ``MISSING`` sentinel; counts a hit or miss for ``owner``"""
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self.entries.move_to_end(key)
+            self.hits[owner] = self.hits.get(owner, 0) + 1
+            CONTEXT_CACHE_REQUESTS.labels(owner, "hit").inc()
+            return entry[0]
+        if entry is not None:
+            del self.entries[key]
+        self.misses[owner] = self.misses.get(owner, 0) + 1
+        CONTEXT_CACHE_REQUESTS.labels(owner, "miss").inc()
+        return MISSING
+
+    def put(self, key: str, value: Any, expire: Optional[float] = None):
+        """Cache a value for at most ``expire`` seconds (never longer than the TTL)"""
+        ttl = min(self.ttl, expire) if expire else self.ttl
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[str]):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    async def publish_invalidation(self, keys: list[str]):
+        """Tell other workers to drop their copies of ``keys``"""
+        try:
+            await redis_client.publish(
+                self.channel,
+                json.dumps({"node": NODE_ID, "keys": keys})
+            )
+        except Exception as e:
+            logger.error(f"Context invalidation publish failed: {str(e)}")
+
+    def stats(self) -> dict[str, dict]:
+        """Per-owner hit/miss counts and hit ratio"""
+        owners = set(self.hits) | set(self.misses)
+        result = {}
+        for owner in sorted(owners):
+            hits = self.hits.get(owner, 0)
+            misses = self.misses.get(owner, 0)
+            result[owner] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0.0
+            }
+        return result
+
+    # ===== INVALIDATION LISTENER =====
+
+    async def start(self):
+        """Start listening for invalidations published by other workers"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(
+                redis_client.subscribe(self.channel, self._handle_invalidation)
+            )
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    def _handle_invalidation(self, data: str):
+        try:
+            message = json.loads(data)
+        except (TypeError, json.JSONDecodeError):
+            return
+        if message.get("node") != NODE_ID:
+            self.invalidate(message.get("keys", []))
+
+
+context_cache = NearCache()
+
+__all__ = ["NearCache", "context_cache", "MISSING"]
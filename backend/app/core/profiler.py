@@ -0,0 +1,103 @@
+"""
+Time-bounded sampling profiler for live workers.
+
+A background thread snapshots the stacks of running threads at a fixed
+interval (py-spy style, but in-process) and aggregates them into the
+collapsed-stack format understood by flamegraph.pl, speedscope and
+inferno: one ``frame;frame;frame count`` line per distinct stack.
+
+Coroutines all run on the event-loop thread, so its samples show which
+handler, agent or serializer was executing; samples taken while the loop
+is idle in ``select`` are dropped unless ``include_idle`` is set.
+"""
+
+from collections import Counter
+from typing import Optional
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Innermost frames that mean "waiting", not "working"
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "wait", "_worker", "accept", "sleep"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples thread stacks for a fixed duration; one profile at a time"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(
+        self,
+        seconds: float,
+        interval: float = 0.005,
+        all_threads: bool = False,
+        include_idle: bool = False
+    ) -> tuple[str, int]:
+        """
+        Profile this worker for ``seconds`` without blocking the event loop.
+        Returns collapsed stacks and the number of stack samples recorded
+        (ticks where every thread was idle or filtered out don't count).
+        """
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            done = loop.create_future()
+            target = None if all_threads else threading.get_ident()
+
+            def run():
+                try:
+                    result = self._sample(seconds, interval, target, include_idle)
+                    loop.call_soon_threadsafe(done.set_result, result)
+                except Exception as e:
+                    loop.call_soon_threadsafe(done.set_exception, e)
+
+            threading.Thread(target=run, name="sampling-profiler", daemon=True).start()
+            stacks, samples = await done
+            return self.collapse(stacks), samples
+
+    @staticmethod
+    def _sample(seconds: float, interval: float, target: Optional[int], include_idle: bool) -> tuple[Counter, int]:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (target is not None and thread_id != target):
+                    continue
+                if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[tuple(reversed(labels))] += 1
+                samples += 1
+            time.sleep(interval)
+        return stacks, samples
+
+    @staticmethod
+    def collapse(stacks: Counter) -> str:
+        """Render stacks as ``root;...;leaf count`` lines"""
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in stacks.most_common()
+        )
+
+
+profiler = SamplingProfiler()
+
+__all__ = ["SamplingProfiler", "profiler"]
@@ -1,61 +1,325 @@
+from collections import OrderedDict
 from app.core.config import settings
+from app.core.metrics import REDIS_OP_SECONDS
+from app.core.tracing import tracer
+import asyncio
 import logging
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Unique per process so a node can ignore its own pub/sub echoes
+NODE_ID = uuid.uuid4().hex
+
 class MockRedis:
-    def __init__(self):
-        self.store = {}
-        logger.warning("Using In-Memory Mock Redis (Redis connection failed or not configured)")
+    """
+    In-process fallback used while Redis is unreachable.
+
+    Honors ``ex`` TTLs and evicts least-recently-used keys beyond
+    ``max_keys`` so a long outage cannot grow memory without bound.
+    """
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = max_keys or settings.REDIS_FALLBACK_MAX_KEYS
+        self.store: OrderedDict = OrderedDict()
+        self.expires: dict = {}
+
+    def _alive(self, key) -> bool:
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.store.pop(key, None)
+            self.expires.pop(key, None)
+            return False
+        return key in self.store
 
-    async def set(self, key, value, ex=None):
+    def _touch(self, key):
+        self.store.move_to_end(key)
+        while len(self.store) > self.max_keys:
+            evicted, _ = self.store.popitem(last=False)
+            self.expires.pop(evicted, None)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and self._alive(key):
+            return None
         self.store[key] = value
+        if ex:
+            self.expires[key] = time.monotonic() + ex
+        else:
+            self.expires.pop(key, None)
+        self._touch(key)
         return True
 
     async def get(self, key):
-        return self.store.get(key)
-    
+        if not self._alive(key):
+            return None
+        self._touch(key)
+        return self.store[key]
+
+    async def mget(self, keys):
+        return [await self.get(key) for key in keys]
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.store.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    async def mset(self, mapping, ex=None):
+        for key, value in mapping.items():
+            await self.set(key, value, ex=ex)
+        return True
+
+    async def rpush(self, key, *values):
+        items = self.store[key] if self._alive(key) else []
+        items.extend(values)
+        self.store[key] = items
+        self._touch(key)
+        return len(items)
+
+    async def lrange(self, key, start, end):
+        if not self._alive(key):
+            return []
+        items = self.store[key]
+        end = len(items) if end == -1 else end + 1
+        return items[start:end]
+
+    async def expire(self, key, seconds):
+        if not self._alive(key):
+            return False
+        self.expires[key] = time.monotonic() + seconds
+        return True
+
+    async def ping(self):
+        return True
+
+    async def publish(self, channel, message):
+        # No other workers can be listening on an in-process store
+        return 0
+
     async def close(self):
         pass
 
-# Try to import redis, if fails or connection fails, use Mock
-try:
-    import redis.asyncio as redis
-    # We create a client but don't connect yet. 
-    # Connection errors usually happen on first command.
-    # To be safe for this hackathon demo, we will wrap the client in a way that falls back.
-    
-    # Simple check:
-    real_client = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-except Exception as e:
-    logger.error(f"Redis import failed: {e}")
-    real_client = None
+def _create_real_client():
+    """
+    Build a pooled redis.asyncio client; None if the package is unavailable.
+    Imported lazily so worker start-up doesn't pay for redis until first use.
+    The client doesn't connect yet - connection errors surface on the first
+    command, where RobustRedisClient trips its circuit breaker.
+    """
+    try:
+        import redis.asyncio as redis
+        pool = redis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            encoding="utf-8",
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS
+        )
+        return redis.Redis(connection_pool=pool)
+    except Exception as e:
+        logger.error(f"Redis import failed: {e}")
+        return None
 
 class RobustRedisClient:
+    """
+    Redis client with a circuit breaker in front of an in-memory fallback.
+
+    After ``REDIS_FAILURE_THRESHOLD`` consecutive errors the circuit opens
+    and commands go to the fallback. Once ``REDIS_RETRY_SECONDS`` have
+    passed the next command probes Redis again; success closes the
+    circuit, so a transient outage doesn't split state permanently.
+    """
+
     def __init__(self):
-        self.client = real_client
+        self._client = None
+        self._client_created = False
         self.mock = MockRedis()
-        self.using_mock = False
+        self.failures = 0
+        self.open_until = 0.0
 
-    async def set(self, key, value, ex=None):
-        if self.using_mock or not self.client:
-            return await self.mock.set(key, value, ex)
-        try:
-            return await self.client.set(key, value, ex=ex)
-        except Exception as e:
-            logger.error(f"Redis set failed: {e}. Switching to Mock.")
-            self.using_mock = True
-            return await self.mock.set(key, value, ex)
+    @property
+    def client(self):
+        if not self._client_created:
+            self._client = _create_real_client()
+            self._client_created = True
+        return self._client
+
+    @property
+    def using_mock(self) -> bool:
+        """True while commands are being served by the in-memory fallback"""
+        return not self.client or self.open_until > time.monotonic()
+
+    def _record_success(self):
+        if self.failures >= settings.REDIS_FAILURE_THRESHOLD:
+            logger.info("Redis reachable again. Closing circuit.")
+        self.failures = 0
+        self.open_until = 0.0
+
+    def _record_failure(self, operation: str, error: Exception):
+        self.failures += 1
+        if self.failures >= settings.REDIS_FAILURE_THRESHOLD:
+            self.open_until = time.monotonic() + settings.REDIS_RETRY_SECONDS
+            logger.error(
+                f"Redis {operation} failed: {error}. Using in-memory fallback "
+                f"for {settings.REDIS_RETRY_SECONDS}s."
+            )
+        else:
+            logger.warning(f"Redis {operation} failed: {error}")
+
+    async def _execute(self, operation: str, *args, **kwargs):
+        """Run a command on Redis, or on the fallback while the circuit is open"""
+        with tracer.start_as_current_span(f"redis.{operation}") as span:
+            started = time.perf_counter()
+            if self.using_mock:
+                span.set_attribute("redis.backend", "fallback")
+                result = await getattr(self.mock, operation)(*args, **kwargs)
+                REDIS_OP_SECONDS.labels(operation, "fallback").observe(time.perf_counter() - started)
+                return result
+            span.set_attribute("redis.backend", "redis")
+            try:
+                result = await getattr(self.client, operation)(*args, **kwargs)
+            except Exception as e:
+                self._record_failure(operation, e)
+                span.set_attribute("redis.backend", "fallback")
+                span.add_event("redis.error", {"error": str(e)})
+                return await getattr(self.mock, operation)(*args, **kwargs)
+            REDIS_OP_SECONDS.labels(operation, "redis").observe(time.perf_counter() - started)
+            self._record_success()
+            return result
+
+    async def set(self, key, value, ex=None, nx=False):
+        """With ``nx``, only set if the key is absent; returns None when it already existed"""
+        return await self._execute("set", key, value, ex=ex, nx=nx)
 
     async def get(self, key):
-        if self.using_mock or not self.client:
-            return await self.mock.get(key)
+        return await self._execute("get", key)
+
+    async def mget(self, keys):
+        """Fetch several keys in one round trip"""
+        if not keys:
+            return []
+        return await self._execute("mget", keys)
+
+    async def mset(self, mapping, ex=None):
+        """Set several keys (with a shared TTL) in one pipelined round trip"""
+        if not mapping:
+            return True
+        if self.using_mock:
+            return await self.mock.mset(mapping, ex=ex)
+        with tracer.start_as_current_span("redis.mset", attributes={"redis.keys": len(mapping)}):
+            started = time.perf_counter()
+            try:
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for key, value in mapping.items():
+                        pipe.set(key, value, ex=ex)
+                    await pipe.execute()
+            except Exception as e:
+                self._record_failure("mset", e)
+                return await self.mock.mset(mapping, ex=ex)
+            REDIS_OP_SECONDS.labels("mset", "redis").observe(time.perf_counter() - started)
+            self._record_success()
+            return True
+
+    async def delete(self, *keys):
+        return await self._execute("delete", *keys)
+
+    async def rpush(self, key, *values):
+        return await self._execute("rpush", key, *values)
+
+    async def rpush_ex(self, key, values, ex):
+        """Append ``values`` to a list and (re)set its TTL in one pipelined round trip"""
+        if self.using_mock:
+            await self.mock.rpush(key, *values)
+            return await self.mock.expire(key, ex)
+        with tracer.start_as_current_span("redis.rpush_ex", attributes={"redis.values": len(values)}):
+            started = time.perf_counter()
+            try:
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.rpush(key, *values)
+                    pipe.expire(key, ex)
+                    await pipe.execute()
+            except Exception as e:
+                self._record_failure("rpush_ex", e)
+                await self.mock.rpush(key, *values)
+                return await self.mock.expire(key, ex)
+            REDIS_OP_SECONDS.labels("rpush_ex", "redis").observe(time.perf_counter() - started)
+            self._record_success()
+            return True
+
+    async def lrange(self, key, start, end):
+        return await self._execute("lrange", key, start, end)
+
+    async def expire(self, key, seconds):
+        return await self._execute("expire", key, seconds)
+
+    async def publish(self, channel, message):
+        return await self._execute("publish", channel, message)
+
+    async def ping(self) -> bool:
+        """Check connectivity to real Redis; also probes an open circuit"""
+        if not self.client:
+            return False
         try:
-            return await self.client.get(key)
+            result = await self.client.ping()
         except Exception as e:
-            logger.error(f"Redis get failed: {e}. Switching to Mock.")
-            self.using_mock = True
-            return await self.mock.get(key)
+            self._record_failure("ping", e)
+            return False
+        self._record_success()
+        return bool(result)
+
+    def pubsub(self):
+        """Returns a pub/sub handle, or None when no real Redis is available"""
+        if self.using_mock:
+            return None
+        return self.client.pubsub()
+
+    async def subscribe(self, channel, handler):
+        """
+        Call ``handler(data)`` for every message on ``channel`` until cancelled.
+        Errors count toward the circuit breaker; resubscribes with backoff
+        after errors and while the circuit is open.
+        """
+        backoff = 1
+        while True:
+            pubsub = self.pubsub()
+            if pubsub is None:
+                if not self.client:
+                    logger.warning(f"Redis unavailable; not subscribed to {channel}")
+                    return
+                # Circuit is open; wait for Redis to recover
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            try:
+                await pubsub.subscribe(channel)
+                self._record_success()
+                backoff = 1
+                async for item in pubsub.listen():
+                    if item.get("type") == "message":
+                        handler(item["data"])
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                # Counts toward the breaker, so an outage opens the circuit for every caller
+                self._record_failure(f"subscription to {channel}", e)
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    async def close(self):
+        """Release pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
 
 redis_client = RobustRedisClient()
 
@@ -5,24 +5,38 @@ Production-level security implementation.
 
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthenticationCredentials
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12
-)
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """
+    Password hashing context, built on first use.
+    passlib and its bcrypt backend are loaded lazily to keep start-up fast.
+    """
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=12
+    )
+
+
+def __getattr__(name: str):
+    # Keep `from app.core.security import pwd_context` working
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # HTTP Bearer scheme for JWT
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 class SecurityUtils:
@@ -31,12 +45,12 @@ class SecurityUtils:
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash a password using bcrypt"""
-        return pwd_context.hash(password)
+        return get_pwd_context().hash(password)
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify a plain password against a hashed password"""
-        return pwd_context.verify(plain_password, hashed_password)
+        return get_pwd_context().verify(plain_password, hashed_password)
     
     @staticmethod
     def create_access_token(
@@ -53,6 +67,8 @@ class SecurityUtils:
         Returns:
             Encoded JWT token
         """
+        from jose import jwt
+
         to_encode = data.copy()
         
         if expires_delta:
@@ -86,6 +102,8 @@ class SecurityUtils:
         Raises:
             JWTError: If token is invalid or expired
         """
+        from jose import JWTError, jwt
+
         try:
             payload = jwt.decode(
                 token,
@@ -99,7 +117,7 @@ class SecurityUtils:
 
 
 async def get_current_user(
-    credentials: HTTPAuthenticationCredentials = Depends(security)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
     """
     Dependency for protecting routes with JWT authentication.
@@ -114,6 +132,8 @@ async def get_current_user(
     Raises:
         HTTPException: If token is invalid or missing
     """
+    from jose import JWTError
+
     token = credentials.credentials
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -134,10 +154,52 @@ async def get_current_user(
         raise credentials_exception
 
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[dict]:
+    """
+    Like ``get_current_user`` for routes that also serve anonymous callers.
+    Returns None without a token; an invalid token is still rejected.
+    """
+    if credentials is None:
+        return None
+    return await get_current_user(credentials)
+
+
+def can_access_repo(user_id: Optional[str], repo: str) -> bool:
+    """Whether a user may pull ``repo``'s code index into answers (``CODE_INDEX_REPO_ACCESS``)"""
+    if not user_id:
+        return False
+    return repo in settings.CODE_INDEX_REPO_ACCESS.get(str(user_id), [])
+
+
+async def get_current_admin(
+    current_user: dict = Depends(get_current_user)
+) -> dict:
+    """
+    Dependency for admin-only routes.
+    Admins are the accounts listed in ``settings.ADMIN_EMAILS``.
+    
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    email = current_user["payload"].get("email")
+    if not email or email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
 # Export for use in other modules
 __all__ = [
     "SecurityUtils",
+    "can_access_repo",
+    "get_current_admin",
     "get_current_user",
+    "get_optional_user",
+    "get_pwd_context",
     "pwd_context",
     "security"
 ]
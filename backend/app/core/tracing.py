@@ -0,0 +1,91 @@
+"""
+OpenTelemetry tracing for the request path:
+HTTP/WebSocket -> orchestrator -> agent -> Bedrock -> Redis/DB/GitHub.
+
+Instrumented code only depends on the OpenTelemetry API, which is a no-op
+until ``setup_tracing`` installs an SDK provider (``OTEL_ENABLED=true``).
+Spans go to the console or to an OTLP/HTTP collector.
+"""
+
+from contextlib import contextmanager
+from typing import Optional
+from opentelemetry import context, propagate, trace
+from opentelemetry.trace import Status, StatusCode
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("codesherpa")
+
+_configured = False
+
+
+def setup_tracing():
+    """Install the SDK tracer provider and exporter once per process"""
+    global _configured
+    if _configured or not settings.OTEL_ENABLED:
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if settings.OTEL_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+    else:
+        exporter = ConsoleSpanExporter()
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME})
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+    logger.info(f"Tracing enabled ({settings.OTEL_EXPORTER} exporter)")
+
+
+def shutdown_tracing():
+    """Flush buffered spans"""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def capture_context() -> dict:
+    """Serialize the current trace context (W3C traceparent) for a background job"""
+    carrier: dict = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def span_from_context(name: str, carrier: Optional[dict], **attributes):
+    """
+    Start a span whose parent is a context captured with ``capture_context``,
+    so background work shows up in the trace that enqueued it.
+    """
+    parent = propagate.extract(carrier or {})
+    token = context.attach(parent)
+    try:
+        with tracer.start_as_current_span(name, attributes=attributes) as span:
+            yield span
+    finally:
+        context.detach(token)
+
+
+def mark_error(span, error: BaseException):
+    """Record an exception on a span without re-raising"""
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+__all__ = [
+    "capture_context",
+    "mark_error",
+    "setup_tracing",
+    "shutdown_tracing",
+    "span_from_context",
+    "tracer"
+]
@@ -3,12 +3,14 @@ Database package.
 Includes database connection, session management, and base class for models.
 """
 
-from app.db.database import engine, SessionLocal, Base, get_db, init_db
+from app.db.database import engine, SessionLocal, Base, get_db, init_db, warm_pool, check_db
 
 __all__ = [
     "engine",
     "SessionLocal",
     "Base",
     "get_db",
-    "init_db"
+    "init_db",
+    "warm_pool",
+    "check_db"
 ]
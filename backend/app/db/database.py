@@ -3,11 +3,14 @@ Database configuration and session management.
 Production-level database setup with SQLAlchemy ORM.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
+from app.core.metrics import DB_QUERY_SECONDS
+from app.core.tracing import mark_error, tracer
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +21,15 @@ SQLALCHEMY_KWARGS = {}
 # SQLite requires check_same_thread=False
 if "sqlite" in DATABASE_URL:
     SQLALCHEMY_KWARGS = {"connect_args": {"check_same_thread": False}}
+else:
+    SQLALCHEMY_KWARGS = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True
+    }
+
+# Arbitrary key shared by all workers to serialize schema creation
+SCHEMA_LOCK_KEY = 7_270_001
 
 # Create database engine
 engine = create_engine(
@@ -26,6 +38,36 @@ engine = create_engine(
     **SQLALCHEMY_KWARGS
 )
 
+
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    verb = statement.lstrip().split(" ", 1)[0].upper()
+    span = tracer.start_span(f"db.{verb}", attributes={
+        "db.system": engine.dialect.name,
+        "db.statement": statement[:500]
+    })
+    conn.info.setdefault("query_start", []).append((time.perf_counter(), span))
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    started, span = conn.info["query_start"].pop()
+    span.end()
+    # Label by verb only (SELECT, INSERT, ...) to keep cardinality low
+    DB_QUERY_SECONDS.labels(statement.lstrip().split(" ", 1)[0].upper()).observe(time.perf_counter() - started)
+
+
+@event.listens_for(engine, "handle_error")
+def _record_query_error(exception_context):
+    # after_cursor_execute doesn't fire for failed statements
+    conn = exception_context.connection
+    pending = conn.info.get("query_start") if conn is not None else None
+    if pending:
+        _, span = pending.pop()
+        mark_error(span, exception_context.original_exception)
+        span.end()
+
+
 # Create session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -53,20 +95,61 @@ def get_db() -> Session:
 
 
 def init_db():
-    """Initialize database by creating all tables"""
+    """
+    Initialize database by creating all tables.
+    On PostgreSQL an advisory lock serializes concurrent workers.
+    """
     try:
-        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(
+                    text("SELECT pg_advisory_xact_lock(:key)"),
+                    {"key": SCHEMA_LOCK_KEY}
+                )
+            Base.metadata.create_all(bind=conn)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
         raise
 
 
+def warm_pool(size: int = None) -> int:
+    """
+    Open pooled connections ahead of traffic so early requests
+    don't pay connection setup. Returns the number opened.
+    """
+    size = size or settings.DB_POOL_SIZE
+    connections = []
+    try:
+        for _ in range(size):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        # Closing returns them to the pool, still open
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+def check_db() -> bool:
+    """Readiness probe: can we run a trivial query?"""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        logger.warning(f"Database check failed: {str(e)}")
+        return False
+
+
 # Export for use in other modules
 __all__ = [
     "engine",
     "SessionLocal",
     "Base",
     "get_db",
-    "init_db"
+    "init_db",
+    "warm_pool",
+    "check_db"
 ]
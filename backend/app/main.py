@@ -3,33 +3,71 @@ CodeSherpa FastAPI Application - Main Entry Point.
 Production-level backend with full REST API, WebSocket support, and AI orchestration.
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, status
-from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.db.database import init_db
-from app.agents.orchestrator import OrchestratorAgent
-from app.api.endpoints import github, whatsapp
+from app.core.logging_setup import log_context, setup_logging
+
+# Setup logging (structured, written from a background thread) before the
+# application modules are imported, so their import-time warnings (e.g.
+# missing AWS credentials) go through the same pipeline
+setup_logging()
+
+from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.middleware.cors import CORSMiddleware
+from opentelemetry import trace
+from app.core.middleware import (
+    CompressionMiddleware,
+    ConditionalGetMiddleware,
+    MetricsMiddleware,
+    RequestIdMiddleware,
+    TracingMiddleware
+)
+from app.core.metrics import WS_MESSAGE_SECONDS, render_metrics
+from app.core.connection_manager import manager
+from app.core.container import container, get_orchestrator
+from app.core.security import SecurityUtils, can_access_repo, get_optional_user
+from app.core.events import event_sink
+from app.core.redis_client import redis_client
+from app.core.tracing import mark_error, tracer
+from app.services.stream_service import (
+    parse_event_id,
+    resume_chat_stream,
+    start_chat_stream
+)
+from app.api.lazy_router import LazyRouter
 from app.routes import (
     auth_router,
     user_router,
     agent_router,
     project_router,
-    chat_router
+    chat_router,
+    admin_router
 )
-from app.routes.response_model import success_response
+from app.routes.response_model import success_response, error_response
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
 import logging
 import json
+import time
+import uuid
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("CodeSherpa")
 
+# ===== APPLICATION LIFESPAN =====
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build and warm per-process services before accepting traffic"""
+    await container.startup()
+    yield
+    await container.shutdown()
+
+
 # ===== APPLICATION SETUP =====
 
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME,
     version="1.0.0",
     description="Production-level SaaS backend for CodeSherpa",
@@ -38,23 +76,6 @@ app = FastAPI(
     redoc_url=f"{settings.API_V1_STR}/redoc"
 )
 
-# ===== DATABASE INITIALIZATION =====
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database and services on startup"""
-    try:
-        init_db()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing database: {str(e)}")
-    
-    # Initialize orchestrator
-    global orchestrator
-    orchestrator = OrchestratorAgent()
-    logger.info("Orchestrator initialized")
-
-
 # ===== CORS MIDDLEWARE =====
 
 app.add_middleware(
@@ -69,16 +90,27 @@ app.add_middleware(
 logger.info(f"CORS enabled for origins: {settings.CORS_ORIGINS}")
 
 
-# ===== ORCHESTRATOR INSTANCE =====
+# ===== RESPONSE OPTIMIZATION MIDDLEWARE =====
 
-orchestrator: OrchestratorAgent = None
+# ETags are computed on the uncompressed body, so compression must wrap it
+app.add_middleware(ConditionalGetMiddleware, paths=settings.ETAG_PATHS)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+)
+
+# Outermost, so timings include compression and ETag handling
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+app.add_middleware(TracingMiddleware)
 
 
 # ===== HEALTH CHECK ENDPOINTS =====
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check() -> dict:
-    """Health check endpoint"""
+    """Liveness probe: the process is up and serving requests"""
     return success_response(
         data={
             "status": "ok",
@@ -89,6 +121,25 @@ async def health_check() -> dict:
     )
 
 
+@app.get("/health/ready")
+async def readiness_check() -> JSONResponse:
+    """Readiness probe: startup finished and dependencies reachable"""
+    checks = await container.readiness()
+    if not checks["ready"]:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=error_response("Service not ready", data=checks)
+        )
+    return JSONResponse(content=success_response(data=checks, message="Service is ready"))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
 @app.get("/")
 async def root() -> dict:
     """Root endpoint"""
@@ -113,15 +164,35 @@ app.include_router(agent_router)
 app.include_router(project_router)
 app.include_router(chat_router)
 
-# Legacy integrations
-app.include_router(github.router, prefix="/api/github", tags=["github"])
-app.include_router(whatsapp.router, prefix="/api/whatsapp", tags=["whatsapp"])
+# Diagnostics
+app.include_router(admin_router)
+
+# Legacy integrations (webhooks only; imported on first request)
+app.mount("/api/github", LazyRouter("app.api.endpoints.github"))
+app.mount("/api/whatsapp", LazyRouter("app.api.endpoints.whatsapp"))
 
 
 # ===== HTTP CHAT ENDPOINT =====
 
+REPO_FORBIDDEN = "Not allowed to query this repository"
+
+
+def _repo_allowed(payload: dict, user_id: Optional[str]) -> bool:
+    """A payload naming a repository needs a user with access to its code index"""
+    repo = payload.get("repo")
+    return not repo or can_access_repo(user_id, repo)
+
+
+def _check_repo_access(payload: dict, user: Optional[dict]):
+    if not _repo_allowed(payload, user and user["user_id"]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN if user else status.HTTP_401_UNAUTHORIZED,
+            detail=REPO_FORBIDDEN
+        )
+
+
 @app.post(f"{settings.API_V1_STR}/process")
-async def process_chat_http(payload: dict) -> dict:
+async def process_chat_http(payload: dict, user: Optional[dict] = Depends(get_optional_user)) -> dict:
     """
     HTTP endpoint for chat processing.
     
@@ -129,10 +200,14 @@ async def process_chat_http(payload: dict) -> dict:
     {
         "message": "User message",
         "session_id": "Session identifier",
-        "code_context": "Optional code context"
+        "code_context": "Optional code context",
+        "repo": "owner/name (optional; requires a token with access to the repository)",
+        "language": "English" | "Hindi" | "Hinglish"  (optional, default: English)
     }
     """
+    _check_repo_access(payload, user)
     try:
+        orchestrator = get_orchestrator()
         if not orchestrator:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -155,112 +230,238 @@ async def process_chat_http(payload: dict) -> dict:
         )
 
 
-# ===== WEBSOCKET CONNECTION MANAGER =====
+# ===== SERVER-SENT EVENTS CHAT ENDPOINT =====
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+}
 
-class ConnectionManager:
-    """Manages WebSocket connections"""
+
+async def _resume_sse(stream_id: str, last_seq: int) -> StreamingResponse:
+    """Replay a buffered stream, or 404 if it expired or never existed"""
+    if not await redis_client.lrange(f"sse:{stream_id}", 0, 0):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stream not found or expired"
+        )
+    return StreamingResponse(
+        resume_chat_stream(stream_id, last_seq),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@app.post(f"{settings.API_V1_STR}/process/stream")
+async def process_chat_sse(
+    payload: dict,
+    request: Request,
+    user: Optional[dict] = Depends(get_optional_user)
+) -> StreamingResponse:
+    """
+    Streaming variant of /process using Server-Sent Events.
     
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        """Accept and track new connection"""
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
-
-    def disconnect(self, websocket: WebSocket):
-        """Remove disconnected client"""
-        self.active_connections.remove(websocket)
-        logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        """Send message to specific client"""
-        await websocket.send_text(message)
-
-    async def broadcast(self, message: str):
-        """Broadcast message to all connected clients"""
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {str(e)}")
+    Emits "stream" (carrying the stream_id), "status", "routing" and
+    "delta" events, then a final "response" or "error" event. Every event
+    has an ID of the form "<stream_id>:<seq>"; sending it back as
+    Last-Event-ID resumes the stream instead of re-processing the payload.
+    """
+    orchestrator = get_orchestrator()
+    if not orchestrator:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Orchestrator not initialized"
+        )
+    
+    stream_id, last_seq = parse_event_id(request.headers.get("last-event-id"))
+    if stream_id:
+        return await _resume_sse(stream_id, last_seq)
+    
+    _check_repo_access(payload, user)
+    session_id = payload.get("session_id", "default_session")
+    stream = start_chat_stream(orchestrator, payload, session_id)
+    return StreamingResponse(
+        stream.live(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 
-manager = ConnectionManager()
+@app.get(f"{settings.API_V1_STR}/process/stream/{{stream_id}}")
+async def resume_chat_sse(stream_id: str, request: Request) -> StreamingResponse:
+    """
+    Resume a stream by ID (EventSource-friendly).
+    Replays events after the Last-Event-ID header, or from the start.
+    """
+    _, last_seq = parse_event_id(request.headers.get("last-event-id"))
+    return await _resume_sse(stream_id, last_seq)
 
 
 # ===== WEBSOCKET ENDPOINT =====
 
+async def _send_ws(websocket: WebSocket, message_type: str, content, request_id: str = None):
+    """Queue a typed frame for a client, tagged with its request ID"""
+    frame = {"type": message_type, "content": content}
+    if request_id is not None:
+        frame["request_id"] = request_id
+    await manager.send_personal_message(json.dumps(frame), websocket)
+
+
+async def _process_ws_request(websocket: WebSocket, payload: dict, session_id: str, request_id: str):
+    """Run one chat request; several of these may be in flight per socket"""
+    started = time.perf_counter()
+    outcome = "ok"
+    span = tracer.start_span("websocket.request", attributes={
+        "ws.request_id": request_id,
+        "session.id": session_id
+    })
+    try:
+        with trace.use_span(span, end_on_exit=False), log_context(request_id, session_id):
+            await _send_ws(websocket, "status", "thinking", request_id)
+            
+            async def forward(event: str, data):
+                if event == "delta":
+                    await manager.send_delta(websocket, request_id, data.get("agent"), data.get("text", ""))
+                else:
+                    await _send_ws(websocket, event, data, request_id)
+            
+            with event_sink(forward):
+                response = await get_orchestrator().process(payload, session_id)
+            await _send_ws(websocket, "response", response, request_id)
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        await _send_ws(websocket, "cancelled", "Request cancelled", request_id)
+        raise
+    except Exception as e:
+        outcome = "error"
+        mark_error(span, e)
+        logger.error(f"WebSocket request {request_id} failed: {str(e)}")
+        await _send_ws(websocket, "error", "Error processing chat", request_id)
+    finally:
+        span.set_attribute("ws.outcome", outcome)
+        span.end()
+        WS_MESSAGE_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time chat.
     
+    Optional query parameter:
+        token: JWT access token; indexes the socket by user (and its sessions)
+            and is required for questions about an indexed repository
+    
     Expects JSON messages:
     {
+        "type": "message" | "cancel" | "ping",  (default: "message")
+        "request_id": "Client-chosen ID, echoed on every reply",
         "message": "User message",
-        "session_id": "Session identifier"
+        "session_id": "Session identifier",
+        "language": "English" | "Hindi" | "Hinglish"  (optional)
     }
+    
+    Up to WS_MAX_IN_FLIGHT messages are processed concurrently per socket.
+    A "cancel" frame aborts the matching request. The server sends
+    "heartbeat" frames while idle and closes sockets that stay idle past
+    WS_IDLE_TIMEOUT_SECONDS with nothing in flight.
     """
-    await manager.connect(websocket)
+    user_id = None
+    token = websocket.query_params.get("token")
+    if token:
+        try:
+            user_id = SecurityUtils.decode_token(token).get("sub")
+        except Exception:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+    
+    await manager.connect(websocket, user_id=user_id)
+    
+    loop = asyncio.get_running_loop()
+    in_flight: dict[str, asyncio.Task] = {}
+    last_activity = loop.time()
+    
+    def finished(request_id: str):
+        nonlocal last_activity
+        in_flight.pop(request_id, None)
+        if not in_flight:
+            # A long request counts as activity, so its reply doesn't start an idle close
+            last_activity = loop.time()
     
     try:
         while True:
-            # Receive message from client
-            data = await websocket.receive_text()
+            # Receive message from client, waking up periodically for heartbeats
+            try:
+                data = await asyncio.wait_for(
+                    websocket.receive_text(),
+                    timeout=settings.WS_HEARTBEAT_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                idle_for = loop.time() - last_activity
+                if not in_flight and idle_for > settings.WS_IDLE_TIMEOUT_SECONDS:
+                    logger.info("Closing idle WebSocket")
+                    await websocket.close(code=status.WS_1000_NORMAL_CLOSURE)
+                    break
+                await _send_ws(websocket, "heartbeat", None)
+                continue
+            
+            last_activity = loop.time()
             
             try:
                 payload = json.loads(data)
-                session_id = payload.get("session_id", "ws_session")
-                
-                logger.info(f"Message received from {session_id}")
-                
-                # Send processing status
-                await manager.send_personal_message(
-                    json.dumps({
-                        "type": "status",
-                        "content": "thinking"
-                    }),
-                    websocket
-                )
-                
-                # Process with Orchestrator
-                if orchestrator:
-                    response = await orchestrator.process(payload, session_id)
-                    
-                    # Send response
-                    await manager.send_personal_message(
-                        json.dumps({
-                            "type": "response",
-                            "content": response
-                        }),
-                        websocket
-                    )
-                else:
-                    await manager.send_personal_message(
-                        json.dumps({
-                            "type": "error",
-                            "content": "Orchestrator not initialized"
-                        }),
-                        websocket
-                    )
-                    
             except json.JSONDecodeError:
-                await manager.send_personal_message(
-                    json.dumps({
-                        "type": "error",
-                        "content": "Invalid JSON format"
-                    }),
-                    websocket
-                )
+                await _send_ws(websocket, "error", "Invalid JSON format")
+                continue
+            
+            message_type = payload.get("type", "message")
+            request_id = str(payload.get("request_id") or uuid.uuid4().hex)
+            
+            if message_type == "ping":
+                await _send_ws(websocket, "pong", None, payload.get("request_id"))
+                continue
+            
+            if message_type == "cancel":
+                task = in_flight.get(request_id)
+                if task is not None:
+                    task.cancel()
+                continue
+            
+            if not get_orchestrator():
+                await _send_ws(websocket, "error", "Orchestrator not initialized", request_id)
+                continue
+            
+            if request_id in in_flight:
+                await _send_ws(websocket, "error", "Duplicate request_id", request_id)
+                continue
+            
+            if len(in_flight) >= settings.WS_MAX_IN_FLIGHT:
+                await _send_ws(websocket, "error", "Too many requests in flight", request_id)
+                continue
+            
+            if not _repo_allowed(payload, user_id):
+                await _send_ws(websocket, "error", REPO_FORBIDDEN, request_id)
+                continue
+            
+            session_id = payload.get("session_id", "ws_session")
+            manager.bind_session(websocket, session_id)
+            logger.debug(f"Message received from {session_id}")
+            
+            task = asyncio.create_task(
+                _process_ws_request(websocket, payload, session_id, request_id)
+            )
+            in_flight[request_id] = task
+            task.add_done_callback(lambda _, rid=request_id: finished(rid))
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         logger.info("WebSocket disconnected")
         
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
+    
+    finally:
+        # Free model capacity held by requests nobody will read
+        for task in list(in_flight.values()):
+            task.cancel()
         manager.disconnect(websocket)
 
 
@@ -293,11 +494,3 @@ if __name__ == "__main__":
         reload=settings.DEBUG,
         log_level="info"
     )
-        try:
-            await manager.send_personal_message(json.dumps({"error": str(e)}), websocket)
-        except:
-            pass
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
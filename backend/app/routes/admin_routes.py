@@ -0,0 +1,61 @@
+"""
+Admin diagnostics routes.
+"""
+
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import profiler
+from app.core.security import get_current_admin
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["admin"]
+)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0),
+    interval: float = Query(0.005, gt=0),
+    all_threads: bool = False,
+    include_idle: bool = False,
+    current_user: dict = Depends(get_current_admin)
+) -> PlainTextResponse:
+    """
+    Sample this worker's stacks for ``seconds`` and return collapsed stacks
+    (``flamegraph.pl profile.collapsed > profile.svg``, or load in speedscope).
+    Only the worker that serves the request is profiled.
+    Requires an admin JWT token.
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS}"
+        )
+    if profiler.busy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+
+    logger.info(f"Profiling worker for {seconds}s (requested by {current_user['payload'].get('email')})")
+    collapsed, samples = await profiler.profile(
+        seconds,
+        interval=max(interval, settings.PROFILER_MIN_INTERVAL_SECONDS),
+        all_threads=all_threads,
+        include_idle=include_idle
+    )
+    filename = f"profile-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.collapsed"
+    return PlainTextResponse(
+        collapsed,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(samples)
+        }
+    )
@@ -27,6 +27,11 @@ from app.schemas.chat_schema import (
     ChatListResponse,
     ChatMessage
 )
+from app.schemas.agent_output_schema import (
+    IntentOutput,
+    ReviewOutput,
+    SherpaOutput
+)
 
 __all__ = [
     "UserRegister",
@@ -45,5 +50,8 @@ __all__ = [
     "ChatCreate",
     "ChatResponse",
     "ChatListResponse",
-    "ChatMessage"
+    "ChatMessage",
+    "IntentOutput",
+    "ReviewOutput",
+    "SherpaOutput"
 ]
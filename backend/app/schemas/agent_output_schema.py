@@ -0,0 +1,95 @@
+"""
+Schemas for structured model output.
+
+Validation is lenient where models are sloppy (``"7/10"`` scores,
+lower-case severities, string line numbers, nulls) and strict only where
+the caller relies on a field. Unknown keys are kept.
+"""
+
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Literal, Optional
+import re
+
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+
+
+def _leading_number(value):
+    """``"7/10"`` -> 7, ``"8"`` -> 8; anything else is passed through"""
+    if isinstance(value, str) and (match := re.match(r"\s*(\d+(?:\.\d+)?)", value)):
+        return float(match.group(1))
+    return value
+
+
+class ReviewFinding(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    severity: str = "LOW"
+    file: str = ""
+    line: Optional[int] = None
+    issue: str = ""
+    suggestion: str = ""
+    code_fix: str = ""
+
+    @field_validator("severity", mode="before")
+    @classmethod
+    def normalise_severity(cls, value):
+        value = str(value or "").upper()
+        return value if value in SEVERITIES else "LOW"
+
+    @field_validator("line", mode="before")
+    @classmethod
+    def line_number(cls, value):
+        value = _leading_number(value)
+        return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+    @field_validator("file", "issue", "suggestion", "code_fix", mode="before")
+    @classmethod
+    def text(cls, value):
+        return "" if value is None else str(value)
+
+
+class ReviewOutput(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    summary: str
+    findings: list[ReviewFinding] = []
+    quality_score: int = 5
+    security_risk: str = "None"
+
+    @field_validator("quality_score", mode="before")
+    @classmethod
+    def score(cls, value):
+        value = _leading_number(value)
+        return max(1, min(10, round(value))) if isinstance(value, (int, float)) else 5
+
+
+class KeyConcept(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    term: str = ""
+    definition: str = ""
+
+
+class SherpaOutput(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    explanation: str
+    learning_steps: list[str] = []
+    key_concepts: list[KeyConcept] = []
+    analogy: str = "N/A"
+
+    @field_validator("learning_steps", mode="before")
+    @classmethod
+    def steps(cls, value):
+        return [str(step) for step in value] if isinstance(value, list) else []
+
+
+class IntentOutput(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    target_agent: Literal["review_monk", "codebase_sherpa", "general_chat"]
+    confidence: float = 0.0
+    reasoning: str = ""
+
+
+__all__ = ["IntentOutput", "KeyConcept", "ReviewFinding", "ReviewOutput", "SherpaOutput"]
@@ -1,80 +1,295 @@
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 import json
-from botocore.exceptions import ClientError, BotoCoreError
+import time
 from app.core.config import settings
+from app.core.metrics import (
+    BEDROCK_CALL_SECONDS,
+    BEDROCK_ERRORS,
+    BEDROCK_TOKENS,
+    run_in_executor
+)
+from app.core.tracing import mark_error, tracer
 import logging
 import asyncio
+import threading
 
 logger = logging.getLogger(__name__)
 
 class BedrockService:
     def __init__(self):
         self.mock_mode = False
+        self.model_id = settings.BEDROCK_MODEL_ID
+        self._client = None
+        self._client_lock = threading.Lock()
+        # Streams hold a thread for the whole reply, so they get their own bounded pool
+        # instead of starving the default executor (invoke_model, DB, code index)
+        self._stream_executor: Optional[ThreadPoolExecutor] = None
+        self._stream_slots: Optional[asyncio.Semaphore] = None
         
         # Check if keys are configured. If 'your_access_key' is still there, use mock mode.
         if settings.AWS_ACCESS_KEY_ID == "your_access_key" or not settings.AWS_ACCESS_KEY_ID:
             logger.warning("AWS Credentials not found. Switching to MOCK MODE.")
             self.mock_mode = True
-            self.client = None
-        else:
+
+    @property
+    def client(self):
+        """
+        botocore client, built on first use.
+        Construction loads service models from disk, so warm_up() does it
+        on an executor thread before traffic arrives.
+        """
+        if self._client is None and not self.mock_mode:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        # boto3/botocore are slow to import; defer until first use
+                        import boto3
+                        self._client = boto3.client(
+                            service_name='bedrock-runtime',
+                            region_name=settings.AWS_REGION,
+                            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to init Bedrock client: {e}. Switching to MOCK MODE.")
+                        self.mock_mode = True
+        return self._client
+
+    def model_for(self, agent: str) -> str:
+        """Model configured for an agent in AGENT_MODELS (a tier name or a model ID)"""
+        choice = settings.AGENT_MODELS.get(agent, "large")
+        if choice == "small":
+            return settings.BEDROCK_SMALL_MODEL_ID
+        if choice == "large":
+            return self.model_id
+        return choice
+
+    @property
+    def stream_executor(self) -> ThreadPoolExecutor:
+        if self._stream_executor is None:
+            self._stream_executor = ThreadPoolExecutor(
+                max_workers=settings.BEDROCK_STREAM_MAX_CONCURRENCY,
+                thread_name_prefix="bedrock-stream"
+            )
+        return self._stream_executor
+
+    @property
+    def stream_slots(self) -> asyncio.Semaphore:
+        if self._stream_slots is None:
+            self._stream_slots = asyncio.Semaphore(settings.BEDROCK_STREAM_MAX_CONCURRENCY)
+        return self._stream_slots
+
+    def close(self):
+        """Stop the stream reader threads"""
+        if self._stream_executor is not None:
+            self._stream_executor.shutdown(wait=False, cancel_futures=True)
+            self._stream_executor = None
+
+    async def warm_up(self):
+        """Build the botocore client and spin up an executor thread off the request path"""
+        await run_in_executor(lambda: self.client)
+
+    async def invoke_claude(self, prompt: str, system_prompt: str = None, max_tokens: int = 4096, temperature: float = 0.5, agent: str = "default", model_id: str = None):
+        """
+        Invokes Claude on AWS Bedrock, using the agent's model unless ``model_id`` is given.
+        ``agent`` labels latency, token and error metrics.
+        """
+        text, _ = await self.invoke_claude_with_stop_reason(
+            prompt, system_prompt, max_tokens, temperature, agent, model_id
+        )
+        return text
+
+    async def invoke_claude_with_stop_reason(self, prompt: str, system_prompt: str = None, max_tokens: int = 4096, temperature: float = 0.5, agent: str = "default", model_id: str = None) -> tuple[str, str]:
+        """
+        Like ``invoke_claude``, plus why generation stopped: Bedrock's
+        ``stop_reason`` ("end_turn", "max_tokens", ...), or "error" when the
+        text is the mock fallback served after a failed call.
+        """
+        model_id = model_id or self.model_for(agent)
+        with tracer.start_as_current_span("bedrock.invoke", attributes={
+            "agent": agent,
+            "model": model_id,
+            "mock": self.mock_mode,
+            "max_tokens": max_tokens
+        }) as span:
+            started = time.perf_counter()
+            if self.mock_mode:
+                logger.debug("Using MOCK Bedrock response")
+                await asyncio.sleep(1) # Simulate latency
+                BEDROCK_CALL_SECONDS.labels(agent, "invoke", "mock").observe(time.perf_counter() - started)
+                return self._get_mock_response(prompt), "end_turn"
+
             try:
-                self.client = boto3.client(
-                    service_name='bedrock-runtime',
-                    region_name=settings.AWS_REGION,
-                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+                body = self._build_body(prompt, system_prompt, max_tokens, temperature)
+
+                # Wrap blocking call in executor
+                response = await run_in_executor(
+                    lambda: self.client.invoke_model(
+                        modelId=model_id,
+                        body=json.dumps(body)
+                    )
                 )
-                self.model_id = "anthropic.claude-3-5-sonnet-20241022-v2:0"
+            
+                response_body = json.loads(response.get('body').read())
+                usage = response_body.get('usage', {})
+                self._record_usage(agent, usage)
+                span.set_attribute("tokens.input", usage.get('input_tokens', 0))
+                span.set_attribute("tokens.output", usage.get('output_tokens', 0))
+                span.set_attribute("stop_reason", str(response_body.get('stop_reason')))
+                BEDROCK_CALL_SECONDS.labels(agent, "invoke", "ok").observe(time.perf_counter() - started)
+                return response_body['content'][0]['text'], response_body.get('stop_reason') or "end_turn"
+
             except Exception as e:
-                logger.error(f"Failed to init Bedrock client: {e}. Switching to MOCK MODE.")
-                self.mock_mode = True
+                mark_error(span, e)
+                logger.error(f"Error invoking Bedrock: {e}")
+                logger.info("Falling back to mock response due to error.")
+                BEDROCK_ERRORS.labels(agent).inc()
+                BEDROCK_CALL_SECONDS.labels(agent, "invoke", "error").observe(time.perf_counter() - started)
+                return self._get_mock_response(prompt), "error"
 
-    async def invoke_claude(self, prompt: str, system_prompt: str = None, max_tokens: int = 4096, temperature: float = 0.5):
+    async def stream_claude(self, prompt: str, system_prompt: str = None, max_tokens: int = 4096, temperature: float = 0.5, agent: str = "default", model_id: str = None):
         """
-        Invokes Claude 3.5 Sonnet on AWS Bedrock.
-        """
-        if self.mock_mode:
-            logger.info("Using MOCK Bedrock response")
-            await asyncio.sleep(1) # Simulate latency
-            return self._get_mock_response(prompt)
+        Streams Claude's reply as text deltas.
 
+        The botocore event stream is read on a thread of the dedicated
+        stream pool and handed to the event loop chunk by chunk; at most
+        BEDROCK_STREAM_MAX_CONCURRENCY streams run at once per worker.
+        Closing the generator (e.g. when the consuming task is cancelled)
+        closes the HTTP stream, which aborts generation on Bedrock.
+        """
+        model_id = model_id or self.model_for(agent)
+        # Not made current: the context would leak into the consumer across yields
+        span = tracer.start_span("bedrock.stream", attributes={
+            "agent": agent,
+            "model": model_id,
+            "mock": self.mock_mode,
+            "max_tokens": max_tokens
+        })
+        started = time.perf_counter()
         try:
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [{"type": "text", "text": prompt}]
-                    }
-                ]
-            }
-            
-            if system_prompt:
-                body["system"] = [{"text": system_prompt}]
+            if self.mock_mode:
+                logger.debug("Using MOCK Bedrock stream")
+                async for chunk in self._stream_mock_response(prompt):
+                    yield chunk
+                BEDROCK_CALL_SECONDS.labels(agent, "stream", "mock").observe(time.perf_counter() - started)
+                return
 
-            # Wrap blocking call in executor
-            loop = asyncio.get_event_loop()
+            async with self.stream_slots:
+                async for chunk in self._stream_bedrock(prompt, system_prompt, max_tokens, temperature, agent, model_id, span, started):
+                    yield chunk
+        finally:
+            span.end()
+
+    async def _stream_bedrock(self, prompt: str, system_prompt: str, max_tokens: int, temperature: float, agent: str, model_id: str, span, started: float):
+        loop = asyncio.get_event_loop()
+        try:
+            body = self._build_body(prompt, system_prompt, max_tokens, temperature)
             response = await loop.run_in_executor(
-                None, 
-                lambda: self.client.invoke_model(
-                    modelId=self.model_id,
+                self.stream_executor,
+                lambda: self.client.invoke_model_with_response_stream(
+                    modelId=model_id,
                     body=json.dumps(body)
                 )
             )
-            
-            response_body = json.loads(response.get('body').read())
-            return response_body['content'][0]['text']
-
-        except (ClientError, BotoCoreError, Exception) as e:
-            logger.error(f"Error invoking Bedrock: {e}")
+        except Exception as e:
+            mark_error(span, e)
+            logger.error(f"Error invoking Bedrock stream: {e}")
             logger.info("Falling back to mock response due to error.")
-            return self._get_mock_response(prompt)
+            BEDROCK_ERRORS.labels(agent).inc()
+            async for chunk in self._stream_mock_response(prompt):
+                yield chunk
+            BEDROCK_CALL_SECONDS.labels(agent, "stream", "error").observe(time.perf_counter() - started)
+            return
+
+        event_stream = response.get('body')
+        queue: asyncio.Queue = asyncio.Queue()
+        end_of_stream = object()
+        usage = {"input_tokens": 0, "output_tokens": 0}
+
+        def record(counts: dict):
+            self._record_usage(agent, counts)
+            for key in usage:
+                usage[key] += counts.get(key) or 0
+
+        def pump():
+            try:
+                for event in event_stream:
+                    chunk = json.loads(event['chunk']['bytes'])
+                    if chunk.get('type') == 'content_block_delta':
+                        text = chunk['delta'].get('text', '')
+                        if text:
+                            loop.call_soon_threadsafe(queue.put_nowait, text)
+                    elif chunk.get('type') == 'message_start':
+                        record(chunk['message'].get('usage', {}))
+                    elif chunk.get('type') == 'message_delta':
+                        record(chunk.get('usage', {}))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, end_of_stream)
+
+        loop.run_in_executor(self.stream_executor, pump)
+        outcome = "ok"
+        try:
+            while True:
+                item = await queue.get()
+                if item is end_of_stream:
+                    break
+                if isinstance(item, Exception):
+                    mark_error(span, item)
+                    logger.error(f"Bedrock stream interrupted: {item}")
+                    BEDROCK_ERRORS.labels(agent).inc()
+                    outcome = "error"
+                    break
+                yield item
+        finally:
+            event_stream.close()
+            span.set_attribute("tokens.input", usage["input_tokens"])
+            span.set_attribute("tokens.output", usage["output_tokens"])
+            BEDROCK_CALL_SECONDS.labels(agent, "stream", outcome).observe(time.perf_counter() - started)
+
+    @staticmethod
+    def _record_usage(agent: str, usage: dict):
+        """Count tokens reported in a Bedrock response or stream event"""
+        if usage.get('input_tokens'):
+            BEDROCK_TOKENS.labels(agent, "input").inc(usage['input_tokens'])
+        if usage.get('output_tokens'):
+            BEDROCK_TOKENS.labels(agent, "output").inc(usage['output_tokens'])
+
+    def _build_body(self, prompt: str, system_prompt: str, max_tokens: int, temperature: float) -> dict:
+        """Anthropic Messages API request body for Bedrock"""
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": prompt}]
+                }
+            ]
+        }
+        
+        if system_prompt:
+            body["system"] = [{"text": system_prompt}]
+        return body
+
+    async def _stream_mock_response(self, prompt: str, chunk_size: int = 40):
+        """Replays the mock response in small chunks to simulate streaming"""
+        text = self._get_mock_response(prompt)
+        await asyncio.sleep(0.3) # Simulate time to first token
+        for start in range(0, len(text), chunk_size):
+            await asyncio.sleep(0.02)
+            yield text[start:start + chunk_size]
 
     def _get_mock_response(self, prompt: str) -> str:
         """Simple mock responses for demo purposes when APIs fail"""
         prompt_lower = prompt.lower()
+
+        # Translation: echo the payload untranslated (checked first, the payload can contain any text)
+        if "json to translate:" in prompt_lower:
+            return prompt.split("JSON to translate:\n", 1)[-1]
         
         # 1. Orchestrator Intent Classification
         if "classify the intent" in prompt_lower:
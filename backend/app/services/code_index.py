@@ -0,0 +1,444 @@
+"""
+Per-repository code index for Codebase Sherpa.
+
+For each GitHub repository (``owner/name``) we keep a bare clone and a
+SQLite index next to it:
+
+- ``files``: path, blob SHA and language of every indexed file
+- ``symbols``: functions, classes and methods with their line numbers
+- ``imports``: the import graph, as raw module specifiers per file
+- ``chunks``: the file text in ``CODE_INDEX_CHUNK_LINES`` windows, zlib-compressed
+- ``embeddings``: int8 chunk vectors for similarity search (see ``vector_index``)
+- ``learning_paths``: Sherpa learning paths per module (see ``learning_paths``)
+
+Updates are incremental. ``git ls-tree`` gives every path's blob SHA
+without reading any content, so only blobs that differ from the stored
+manifest are read (in batches, through ``git cat-file --batch``) and
+re-parsed. Deleted paths are dropped. After the first build, a push only
+costs as much as the files it touches.
+"""
+
+from typing import Iterator, Optional
+from app.core.config import settings
+from app.core.metrics import run_in_executor
+from app.core.tracing import tracer
+from app.services.vector_index import vector_index
+import ast
+import asyncio
+import base64
+import logging
+import os
+import re
+import sqlite3
+import subprocess
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+BLOB_BATCH = 500  # Blobs read per ``git cat-file --batch`` call
+
+_REPO_NAME = re.compile(r"^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".go": "go",
+    ".java": "java", ".kt": "kotlin",
+    ".rb": "ruby", ".rs": "rust", ".php": "php", ".cs": "csharp",
+    ".c": "c", ".h": "c", ".cpp": "cpp", ".hpp": "cpp",
+    ".md": "markdown", ".yml": "yaml", ".yaml": "yaml", ".toml": "toml", ".json": "json",
+    ".html": "html", ".css": "css", ".sql": "sql", ".sh": "shell"
+}
+
+# Regex symbol/import extraction for languages we don't parse properly
+_SYMBOL_PATTERNS = {
+    "javascript": re.compile(
+        r"^\s*(?:export\s+(?:default\s+)?)?(?:async\s+)?(?:(function)\s*\*?\s*(\w+)|(class)\s+(\w+)|"
+        r"(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>)"
+    ),
+    "go": re.compile(r"^(?:(func)\s+(?:\([^)]*\)\s*)?(\w+)|(type)\s+(\w+))"),
+    "java": re.compile(r"^\s*(?:public|private|protected|\s)*(?:(class|interface|enum)\s+(\w+))"),
+}
+_SYMBOL_PATTERNS["typescript"] = _SYMBOL_PATTERNS["javascript"]
+_IMPORT_PATTERNS = {
+    "javascript": re.compile(r"""(?:import\s[^'"]*from\s*|import\s*\(?\s*|require\(\s*)['"]([^'"]+)['"]"""),
+    "go": re.compile(r"""^\s*(?:import\s+)?(?:\w+\s+)?"([\w./-]+)"$"""),
+    "java": re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+)"),
+}
+_IMPORT_PATTERNS["typescript"] = _IMPORT_PATTERNS["javascript"]
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, blob TEXT NOT NULL, language TEXT, lines INTEGER);
+CREATE TABLE IF NOT EXISTS symbols (name TEXT NOT NULL, kind TEXT, path TEXT NOT NULL, line INTEGER);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+CREATE TABLE IF NOT EXISTS imports (path TEXT NOT NULL, module TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS imports_path ON imports (path);
+CREATE TABLE IF NOT EXISTS chunks (path TEXT NOT NULL, start_line INTEGER, end_line INTEGER, text BLOB);
+CREATE INDEX IF NOT EXISTS chunks_path ON chunks (path, start_line);
+CREATE TABLE IF NOT EXISTS embeddings (chunk_id INTEGER PRIMARY KEY, path TEXT NOT NULL, vector BLOB, scale REAL);
+CREATE INDEX IF NOT EXISTS embeddings_path ON embeddings (path);
+CREATE TABLE IF NOT EXISTS learning_paths (
+    module TEXT NOT NULL, language TEXT NOT NULL, content_hash TEXT NOT NULL, result TEXT, created_at REAL,
+    PRIMARY KEY (module, language)
+);
+"""
+
+
+# ===== PARSING =====
+
+def language_of(path: str) -> Optional[str]:
+    return LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+def _python_outline(text: str) -> tuple[list[tuple[str, str, int]], list[str]]:
+    tree = ast.parse(text)
+    symbols = []
+
+    def visit(body: list, prefix: str):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                symbols.append((f"{prefix}{node.name}", "class", node.lineno))
+                visit(node.body, f"{prefix}{node.name}.")
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                symbols.append((f"{prefix}{node.name}", "method" if prefix else "function", node.lineno))
+
+    visit(tree.body, "")
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append("." * node.level + (node.module or ""))
+    return symbols, imports
+
+
+def outline(path: str, text: str, language: Optional[str]) -> tuple[list[tuple[str, str, int]], list[str]]:
+    """``(symbols, imports)`` of a file; symbols are ``(name, kind, line)``"""
+    if language == "python":
+        try:
+            return _python_outline(text)
+        except (SyntaxError, ValueError):
+            pass  # Fall through to no outline; the text is still chunked
+        return [], []
+
+    symbol_pattern = _SYMBOL_PATTERNS.get(language)
+    import_pattern = _IMPORT_PATTERNS.get(language)
+    symbols, imports = [], []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if symbol_pattern and (match := symbol_pattern.match(line)):
+            groups = [g for g in match.groups()]
+            if language in ("javascript", "typescript") and groups[4]:
+                symbols.append((groups[4], "function", line_no))
+            else:
+                kind = groups[0] or groups[2]
+                name = groups[1] or groups[3]
+                if name:
+                    symbols.append((name, "class" if kind in ("class", "interface", "enum", "type") else "function", line_no))
+        if import_pattern:
+            imports.extend(import_pattern.findall(line))
+    return symbols, imports
+
+
+def chunk_lines(text: str, size: int) -> Iterator[tuple[int, int, str]]:
+    """``(start_line, end_line, text)`` windows of ``size`` lines"""
+    lines = text.splitlines()
+    for start in range(0, len(lines), size):
+        window = lines[start:start + size]
+        yield start + 1, start + len(window), "\n".join(window)
+
+
+# ===== STORAGE =====
+
+def _safe_name(repo: str) -> str:
+    if not _REPO_NAME.match(repo) or ".." in repo:
+        raise ValueError(f"Invalid repository name: {repo!r}")
+    return repo
+
+
+def repo_dir(repo: str) -> str:
+    return os.path.join(settings.CODE_INDEX_DIR, "repos", f"{_safe_name(repo)}.git")
+
+
+def index_path(repo: str) -> str:
+    return os.path.join(settings.CODE_INDEX_DIR, "indexes", f"{_safe_name(repo)}.db")
+
+
+def vector_dir(repo: str) -> str:
+    return os.path.join(settings.CODE_INDEX_DIR, "vectors", _safe_name(repo))
+
+
+def connect(repo: str) -> sqlite3.Connection:
+    path = index_path(repo)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_DDL)
+    return conn
+
+
+def _git(repo: Optional[str], *args: str, input: bytes = None) -> bytes:
+    """
+    Run git (against the repository's bare clone when ``repo`` is given).
+    GITHUB_TOKEN is passed per command through ``GIT_CONFIG_*`` environment
+    variables, so it is never written to the clone's config or visible on
+    the command line (``ps``, ``/proc/*/cmdline``).
+    """
+    command = ["git"]
+    env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+    if settings.GITHUB_TOKEN:
+        credentials = base64.b64encode(f"x-access-token:{settings.GITHUB_TOKEN}".encode()).decode()
+        index = int(env.get("GIT_CONFIG_COUNT") or 0)
+        env["GIT_CONFIG_COUNT"] = str(index + 1)
+        env[f"GIT_CONFIG_KEY_{index}"] = "http.extraHeader"
+        env[f"GIT_CONFIG_VALUE_{index}"] = f"Authorization: Basic {credentials}"
+    if repo is not None:
+        command += ["--git-dir", repo_dir(repo)]
+    result = subprocess.run(
+        [*command, *args],
+        input=input, capture_output=True, timeout=settings.CODE_INDEX_GIT_TIMEOUT_SECONDS,
+        env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def _read_blobs(repo: str, blobs: list[str]) -> Iterator[tuple[str, bytes]]:
+    """``(sha, content)`` for each blob, read in batches; blobs git can't find are skipped"""
+    for start in range(0, len(blobs), BLOB_BATCH):
+        batch = blobs[start:start + BLOB_BATCH]
+        out = _git(repo, "cat-file", "--batch", input="".join(f"{sha}\n" for sha in batch).encode())
+        offset = 0
+        for _ in batch:
+            header_end = out.index(b"\n", offset)
+            header = out[offset:header_end].decode().split()
+            if len(header) != 3:
+                # "<sha> missing" (or "ambiguous") has no content section
+                logger.warning(f"Blob {header[0]} not readable in {repo}: {' '.join(header[1:])}")
+                offset = header_end + 1
+                continue
+            sha, _kind, size = header
+            body_start = header_end + 1
+            yield sha, out[body_start:body_start + int(size)]
+            offset = body_start + int(size) + 1
+
+
+# ===== INDEX =====
+
+class CodeIndex:
+    """Builds, updates and queries repository indexes; one update per repository at a time"""
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def exists(self, repo: str) -> bool:
+        try:
+            return os.path.exists(index_path(repo))
+        except ValueError:
+            return False
+
+    async def sync(self, repo: str, sha: str = None) -> dict:
+        """Fetch ``repo`` and bring its index up to ``sha`` (default: the remote HEAD)"""
+        lock = self._locks.setdefault(repo, asyncio.Lock())
+        async with lock:
+            with tracer.start_as_current_span("code_index.sync", attributes={"repo": repo}) as span:
+                stats = await run_in_executor(self._sync, repo, sha)
+                for key, value in stats.items():
+                    span.set_attribute(f"code_index.{key}", value)
+                return stats
+
+    def _sync(self, repo: str, sha: Optional[str]) -> dict:
+        started = time.perf_counter()
+        path = repo_dir(repo)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _git(None, "clone", "--bare", "--quiet", f"{settings.CODE_INDEX_GIT_BASE_URL}/{repo}.git", path)
+        else:
+            _git(repo, "fetch", "--quiet", "origin", "+refs/heads/*:refs/heads/*")
+        stats = self._update(repo, sha or "HEAD")
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Indexed {repo}: {stats}")
+        return stats
+
+    def _update(self, repo: str, rev: str) -> dict:
+        """Re-index the paths whose blob changed between the stored manifest and ``rev``"""
+        from app.services.github_service import is_excluded
+
+        tree: dict[str, str] = {}
+        for row in _git(repo, "ls-tree", "-r", "-l", "-z", rev).split(b"\0"):
+            if not row:
+                continue
+            info, path = row.decode(errors="replace").split("\t", 1)
+            _mode, kind, blob, size = info.split()
+            if kind == "blob" and size != "-" and int(size) <= settings.CODE_INDEX_MAX_FILE_BYTES and not is_excluded(path):
+                tree[path] = blob
+
+        conn = connect(repo)
+        try:
+            stored = dict(conn.execute("SELECT path, blob FROM files"))
+            removed = [path for path in stored if path not in tree]
+            changed = {path: blob for path, blob in tree.items() if stored.get(path) != blob}
+
+            with conn:
+                for path in removed + list(changed):
+                    for table in ("files", "symbols", "imports", "chunks", "embeddings"):
+                        conn.execute(f"DELETE FROM {table} WHERE path = ?", (path,))
+
+                paths_by_blob: dict[str, list[str]] = {}
+                for path, blob in changed.items():
+                    paths_by_blob.setdefault(blob, []).append(path)
+
+                for blob, content in _read_blobs(repo, list(paths_by_blob)):
+                    if b"\0" in content[:8192]:
+                        continue  # Binary
+                    text = content.decode("utf-8", errors="replace")
+                    for path in paths_by_blob[blob]:
+                        self._store_file(conn, path, blob, text)
+
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('revision', ?)", (_git(repo, "rev-parse", rev).decode().strip(),))
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+            stats = {"files": len(tree), "changed": len(changed), "removed": len(removed)}
+            if vector_index.enabled:
+                stats["embedded"] = vector_index.refresh(conn, vector_dir(repo), force_export=bool(removed))
+        finally:
+            conn.close()
+        return stats
+
+    def _store_file(self, conn: sqlite3.Connection, path: str, blob: str, text: str):
+        language = language_of(path)
+        symbols, imports = outline(path, text, language)
+        conn.execute("INSERT INTO files VALUES (?, ?, ?, ?)", (path, blob, language, text.count("\n") + 1))
+        conn.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?)", [(name, kind, path, line) for name, kind, line in symbols])
+        conn.executemany("INSERT INTO imports VALUES (?, ?)", [(path, module) for module in set(imports)])
+        conn.executemany(
+            "INSERT INTO chunks VALUES (?, ?, ?, ?)",
+            [
+                (path, start, end, zlib.compress(chunk.encode("utf-8")))
+                for start, end, chunk in chunk_lines(text, settings.CODE_INDEX_CHUNK_LINES)
+            ]
+        )
+
+    # ----- queries -----
+
+    async def context_for(self, repo: str, query: str, file_path: str = None) -> str:
+        """
+        Repository context for a question: the outline and import neighbours
+        of ``file_path``, definitions of identifiers it mentions, then the
+        chunks most similar to it by embedding.
+        Empty when the repository isn't indexed.
+        """
+        if not self.exists(repo):
+            return ""
+        with tracer.start_as_current_span("code_index.context", attributes={"repo": repo}):
+            return await run_in_executor(self._context_for, repo, query, file_path)
+
+    def _context_for(self, repo: str, query: str, file_path: Optional[str]) -> str:
+        budget = settings.CODE_INDEX_CONTEXT_CHARS
+        sections: list[str] = []
+        conn = connect(repo)
+        try:
+            if file_path:
+                sections.append(self._file_overview(conn, file_path))
+
+            seen: set[tuple[str, int]] = set()
+            names = list(dict.fromkeys(_IDENTIFIER.findall(query)))[:settings.CODE_INDEX_MAX_SYMBOLS * 2]
+            for name in names:
+                rows = conn.execute(
+                    "SELECT name, kind, path, line FROM symbols WHERE name = ? COLLATE NOCASE OR name LIKE ? LIMIT 3",
+                    (name, f"%.{name}")
+                ).fetchall()
+                for symbol, kind, path, line in rows:
+                    chunk = self.chunk_at(conn, path, line)
+                    if chunk is None or (path, chunk[0]) in seen:
+                        continue
+                    seen.add((path, chunk[0]))
+                    sections.append(f"# {path}:{chunk[0]}-{chunk[1]} ({kind} {symbol})\n{chunk[2]}")
+                if len(seen) >= settings.CODE_INDEX_MAX_SYMBOLS:
+                    break
+
+            for chunk_id, score in vector_index.search(vector_dir(repo), query, settings.VECTOR_TOP_K):
+                row = conn.execute(
+                    "SELECT path, start_line, end_line, text FROM chunks WHERE rowid = ?", (chunk_id,)
+                ).fetchone()
+                if row is None or (row[0], row[1]) in seen:
+                    continue
+                seen.add((row[0], row[1]))
+                sections.append(f"# {row[0]}:{row[1]}-{row[2]} (similar, {score:.2f})\n{zlib.decompress(row[3]).decode('utf-8')}")
+        finally:
+            conn.close()
+
+        context = ""
+        for section in sections:
+            if not section:
+                continue
+            if len(context) + len(section) > budget:
+                break
+            context += section + "\n\n"
+        return context.strip()
+
+    @staticmethod
+    def chunk_at(conn: sqlite3.Connection, path: str, line: int) -> Optional[tuple[int, int, str]]:
+        row = conn.execute(
+            "SELECT start_line, end_line, text FROM chunks WHERE path = ? AND start_line <= ? ORDER BY start_line DESC LIMIT 1",
+            (path, line)
+        ).fetchone()
+        return (row[0], row[1], zlib.decompress(row[2]).decode("utf-8")) if row else None
+
+    def _file_overview(self, conn: sqlite3.Connection, path: str) -> str:
+        symbols = conn.execute("SELECT name, kind, line FROM symbols WHERE path = ? ORDER BY line", (path,)).fetchall()
+        imports = [module for (module,) in conn.execute("SELECT module FROM imports WHERE path = ?", (path,))]
+        if not symbols and not imports:
+            return ""
+        overview = f"# Outline of {path}\n"
+        overview += "".join(f"- {kind} {name} (line {line})\n" for name, kind, line in symbols)
+        if imports:
+            overview += f"Imports: {', '.join(sorted(imports))}\n"
+        importers = self.importers(conn, path)
+        if importers:
+            overview += f"Imported by: {', '.join(importers[:20])}\n"
+        return overview
+
+    @staticmethod
+    def importers(conn: sqlite3.Connection, path: str) -> list[str]:
+        """Files whose imports resolve to ``path`` (Python dotted modules and relative JS/TS specifiers)"""
+        stem = os.path.splitext(path)[0]
+        if stem.endswith("/__init__") or stem.endswith("/index"):
+            stem = stem.rsplit("/", 1)[0]
+        dotted = stem.replace("/", ".")
+        basename = stem.rsplit("/", 1)[-1]
+        candidates = conn.execute(
+            "SELECT path, module FROM imports WHERE module LIKE ? OR module LIKE ?",
+            (f"%{dotted.rsplit('.', 1)[-1]}", f"%/{basename}")
+        ).fetchall()
+        found = []
+        for importer, module in candidates:
+            if importer == path:
+                continue
+            if module.startswith("."):
+                # Relative JS/TS specifier, or a Python relative import
+                if "/" in module or module in (".", ".."):
+                    resolved = os.path.normpath(os.path.join(os.path.dirname(importer), module))
+                else:
+                    level = len(module) - len(module.lstrip("."))
+                    base = os.path.dirname(importer)
+                    for _ in range(level - 1):
+                        base = os.path.dirname(base)
+                    resolved = os.path.join(base, module.lstrip(".").replace(".", "/"))
+                if resolved == stem:
+                    found.append(importer)
+            elif dotted == module or dotted.endswith(f".{module}"):
+                found.append(importer)
+        return sorted(set(found))
+
+
+code_index = CodeIndex()
+
+
+__all__ = ["CodeIndex", "chunk_lines", "code_index", "language_of", "outline"]
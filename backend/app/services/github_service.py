@@ -1,9 +1,49 @@
-import httpx
+from typing import TYPE_CHECKING, Optional
+from fnmatch import fnmatchcase
+import asyncio
 import logging
+import re
+import time
 from app.core.config import settings
+from app.core.metrics import GITHUB_API_SECONDS
+from app.core.tracing import tracer
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+FILES_PER_PAGE = 100  # GitHub's maximum; the files list stops at 3000 entries
+
+
+def is_excluded(path: str) -> bool:
+    """Vendored, generated, lock or binary paths that aren't worth reviewing"""
+    # Leading slash lets "*/vendor/*" match a top-level vendor/ too
+    anchored = f"/{path}"
+    return any(fnmatchcase(anchored, pattern) for pattern in settings.GITHUB_REVIEW_EXCLUDE_GLOBS)
+
+
+def file_patch(file: dict) -> str:
+    """Rebuild a ``git diff`` section from one entry of the PR files list"""
+    path = file["filename"]
+    old = file.get("previous_filename", path)
+    source = "/dev/null" if file.get("status") == "added" else f"a/{old}"
+    target = "/dev/null" if file.get("status") == "removed" else f"b/{path}"
+    return f"diff --git a/{old} b/{path}\n--- {source}\n+++ {target}\n{file['patch']}\n"
+
+
+def filter_diff(diff: str) -> str:
+    """Drop the sections of a raw diff whose paths are excluded"""
+    sections = re.split(r"(?m)^(?=diff --git )", diff)
+    kept = []
+    for section in sections:
+        match = re.match(r"diff --git a/\S+ b/(\S+)", section)
+        if match and is_excluded(match.group(1)):
+            continue
+        kept.append(section)
+    return "".join(kept)
+
+
 class GitHubService:
     def __init__(self):
         self.headers = {
@@ -12,22 +52,108 @@ class GitHubService:
             "X-GitHub-Api-Version": "2022-11-28"
         }
         self.api_url = "https://api.github.com"
+        # Same auth, JSON instead of the raw diff
+        self.json_headers = {**self.headers, "Accept": "application/vnd.github.v3+json"}
+        self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Shared client so requests reuse pooled keep-alive connections"""
+        if self._client is None:
+            # httpx is only needed once GitHub is actually called
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, operation: str, method: str, url: str, **kwargs) -> "httpx.Response":
+        """Send a request on the pooled client, recording latency by operation and status"""
+        started = time.perf_counter()
+        status = "error"
+        with tracer.start_as_current_span(f"github.{operation}", attributes={"http.method": method}) as span:
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                status = str(response.status_code)
+                span.set_attribute("http.status_code", response.status_code)
+                return response
+            finally:
+                GITHUB_API_SECONDS.labels(operation, status).observe(time.perf_counter() - started)
 
     async def get_pr_diff(self, repo_full_name: str, pr_number: int) -> str:
         """Fetching the raw diff of a Pull Request"""
         url = f"{self.api_url}/repos/{repo_full_name}/pulls/{pr_number}"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                return response.text
-            except httpx.HTTPStatusError as e:
-                logger.error(f"GitHub API Error: {e.response.text}")
-                return None
-            except Exception as e:
-                logger.error(f"Error fetching PR diff: {e}")
+        try:
+            response = await self._request("get_pr_diff", "GET", url, headers=self.headers)
+            if response.is_error:
+                logger.error(f"GitHub API Error: {response.text}")
                 return None
+            return response.text
+        except Exception as e:
+            logger.error(f"Error fetching PR diff: {e}")
+            return None
+
+    async def _files_page(self, url: str, page: int) -> "httpx.Response":
+        response = await self._request(
+            "list_pr_files", "GET", url,
+            headers=self.json_headers, params={"per_page": FILES_PER_PAGE, "page": page}
+        )
+        response.raise_for_status()
+        return response
+
+    async def get_pr_files(self, repo_full_name: str, pr_number: int) -> Optional[list[dict]]:
+        """
+        Changed files of a Pull Request with their patches.
+        The first page says (via ``Link: rel="last"``) how many there are;
+        the rest are fetched concurrently.
+        """
+        url = f"{self.api_url}/repos/{repo_full_name}/pulls/{pr_number}/files"
+        try:
+            first = await self._files_page(url, 1)
+            files = first.json()
+            last_url = first.links.get("last", {}).get("url")
+            if last_url:
+                import httpx
+                last_page = int(httpx.URL(last_url).params.get("page", 1))
+                semaphore = asyncio.Semaphore(settings.GITHUB_FILES_PAGE_CONCURRENCY)
+
+                async def fetch(page: int) -> list[dict]:
+                    async with semaphore:
+                        return (await self._files_page(url, page)).json()
+
+                # gather keeps page order
+                for page_files in await asyncio.gather(*(fetch(page) for page in range(2, last_page + 1))):
+                    files.extend(page_files)
+            return files
+        except Exception as e:
+            logger.error(f"Error listing PR files: {e}")
+            return None
+
+    async def get_pr_review_diff(self, repo_full_name: str, pr_number: int) -> Optional[str]:
+        """
+        Diff to review, without excluded paths (``GITHUB_REVIEW_EXCLUDE_GLOBS``).
+        In ``files`` mode only the patches of reviewable files are downloaded
+        and binary files (no patch) are skipped; ``diff`` mode filters the raw diff.
+        """
+        if settings.GITHUB_DIFF_MODE != "files":
+            diff = await self.get_pr_diff(repo_full_name, pr_number)
+            return filter_diff(diff) if diff else diff
+
+        files = await self.get_pr_files(repo_full_name, pr_number)
+        if files is None:
+            return None
+        reviewable = [f for f in files if f.get("patch") and not is_excluded(f["filename"])]
+        if len(reviewable) < len(files):
+            logger.info(f"Skipping {len(files) - len(reviewable)} of {len(files)} files in {repo_full_name}#{pr_number}")
+        return "".join(file_patch(f) for f in reviewable)
 
     async def post_comment(self, repo_full_name: str, pr_number: int, body: str):
         """Posting a comment on the PR"""
@@ -37,12 +163,62 @@ class GitHubService:
         json_headers = self.headers.copy()
         json_headers["Accept"] = "application/vnd.github.v3+json"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                await client.post(url, headers=json_headers, json={"body": body})
-                return True
-            except Exception as e:
-                logger.error(f"Error posting comment: {e}")
-                return False
+        try:
+            await self._request("post_comment", "POST", url, headers=json_headers, json={"body": body})
+            return True
+        except Exception as e:
+            logger.error(f"Error posting comment: {e}")
+            return False
+
+    async def list_reviews(self, repo_full_name: str, pr_number: int) -> list[dict]:
+        """Every review on a PR, oldest first, following ``Link: rel="next"`` pages"""
+        url = f"{self.api_url}/repos/{repo_full_name}/pulls/{pr_number}/reviews"
+        params = {"per_page": 100}
+        reviews: list[dict] = []
+        try:
+            while url:
+                response = await self._request(
+                    "list_reviews", "GET", url, headers=self.json_headers, params=params
+                )
+                if response.is_error:
+                    logger.error(f"GitHub API Error: {response.text}")
+                    return reviews
+                reviews.extend(response.json())
+                # The next-page URL already carries the query string
+                url = response.links.get("next", {}).get("url")
+                params = None
+            return reviews
+        except Exception as e:
+            logger.error(f"Error listing reviews: {e}")
+            return reviews
+
+    async def create_review(self, repo_full_name: str, pr_number: int, commit_id: str, body: str, comments: list[dict]) -> Optional[dict]:
+        """
+        Submit one review with all inline comments in a single call.
+        Returns the review, or None on failure (422 means a comment didn't resolve to the diff).
+        """
+        url = f"{self.api_url}/repos/{repo_full_name}/pulls/{pr_number}/reviews"
+        payload = {"body": body, "event": "COMMENT", "comments": comments}
+        if commit_id:
+            payload["commit_id"] = commit_id
+        try:
+            response = await self._request("create_review", "POST", url, headers=self.json_headers, json=payload)
+            if response.is_error:
+                logger.error(f"GitHub API Error ({response.status_code}): {response.text}")
+                return None
+            return response.json()
+        except Exception as e:
+            logger.error(f"Error creating review: {e}")
+            return None
+
+    async def update_review(self, repo_full_name: str, pr_number: int, review_id: int, body: str) -> bool:
+        """Replace the summary body of a submitted review"""
+        url = f"{self.api_url}/repos/{repo_full_name}/pulls/{pr_number}/reviews/{review_id}"
+        try:
+            response = await self._request("update_review", "PUT", url, headers=self.json_headers, json={"body": body})
+            return not response.is_error
+        except Exception as e:
+            logger.error(f"Error updating review: {e}")
+            return False
 
 github_service = GitHubService()
@@ -0,0 +1,139 @@
+"""
+Precomputed learning paths, stored per module and language in the code index.
+
+A module is a directory of the repository. Its content hash covers the
+blob SHAs of the source files directly inside it, so a stored path stays
+valid until one of those files changes, and a push that doesn't touch a
+module leaves its paths alone.
+"""
+
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import run_in_executor
+from app.services.code_index import code_index, connect
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Languages worth teaching from; docs and config files don't make a module
+SOURCE_LANGUAGES = {"python", "javascript", "typescript", "go", "java", "kotlin", "ruby", "rust", "php", "csharp", "c", "cpp"}
+
+
+def module_of(path: str) -> str:
+    return os.path.dirname(path.strip("/")) or "."
+
+
+def _module_pattern(module: str) -> str:
+    return "%" if module == "." else f"{module}/%"
+
+
+def module_hashes(conn: sqlite3.Connection, module: str = None) -> dict[str, str]:
+    """Content hash of every module (or just ``module``) that contains source files"""
+    blobs: dict[str, list[str]] = {}
+    rows = conn.execute(
+        "SELECT path, blob, language FROM files WHERE path LIKE ? ORDER BY path",
+        (_module_pattern(module) if module else "%",)
+    )
+    for path, blob, language in rows:
+        if language in SOURCE_LANGUAGES and (module is None or module_of(path) == module):
+            blobs.setdefault(module_of(path), []).append(f"{path}:{blob}")
+    return {module: hashlib.sha256("\n".join(entries).encode()).hexdigest() for module, entries in blobs.items()}
+
+
+def module_context(conn: sqlite3.Connection, module: str, budget: int) -> str:
+    """Outline of each source file in the module plus its opening lines, within ``budget`` characters"""
+    context = ""
+    rows = conn.execute("SELECT path, language FROM files WHERE path LIKE ? ORDER BY path", (_module_pattern(module),))
+    for path, language in rows.fetchall():
+        if module_of(path) != module or language not in SOURCE_LANGUAGES:
+            continue
+        symbols = conn.execute("SELECT name, kind FROM symbols WHERE path = ? ORDER BY line", (path,)).fetchall()
+        section = f"# {path}\n" + "".join(f"- {kind} {name}\n" for name, kind in symbols)
+        head = code_index.chunk_at(conn, path, 1)
+        if head:
+            section += f"{head[2]}\n"
+        if len(context) + len(section) > budget:
+            break
+        context += section + "\n"
+    return context.strip()
+
+
+class LearningPathStore:
+    """Reads and writes learning paths; every call runs on an executor thread"""
+
+    async def lookup(self, repo: str, module: str, language: str) -> tuple[Optional[dict], Optional[str]]:
+        """``(stored path if still current, current content hash)``; hash is None for unknown modules"""
+        if not code_index.exists(repo):
+            return None, None
+        return await run_in_executor(self._lookup, repo, module, language)
+
+    def _lookup(self, repo: str, module: str, language: str) -> tuple[Optional[dict], Optional[str]]:
+        conn = connect(repo)
+        try:
+            content_hash = module_hashes(conn, module).get(module)
+            row = conn.execute(
+                "SELECT content_hash, result FROM learning_paths WHERE module = ? AND language = ?",
+                (module, language)
+            ).fetchone()
+        finally:
+            conn.close()
+        if content_hash and row and row[0] == content_hash:
+            return json.loads(row[1]), content_hash
+        return None, content_hash
+
+    async def context(self, repo: str, module: str) -> str:
+        def read():
+            conn = connect(repo)
+            try:
+                return module_context(conn, module, settings.CODE_INDEX_CONTEXT_CHARS)
+            finally:
+                conn.close()
+        return await run_in_executor(read)
+
+    async def save(self, repo: str, module: str, language: str, content_hash: str, result: dict):
+        def write():
+            conn = connect(repo)
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO learning_paths VALUES (?, ?, ?, ?, ?)",
+                        (module, language, content_hash, json.dumps(result, ensure_ascii=False), time.time())
+                    )
+            finally:
+                conn.close()
+        await run_in_executor(write)
+
+    async def stale(self, repo: str, languages: list[str]) -> list[tuple[str, str]]:
+        """``(module, language)`` pairs without a current path; paths of deleted modules are dropped"""
+        def scan():
+            conn = connect(repo)
+            try:
+                hashes = module_hashes(conn)
+                stored = {
+                    (module, language): content_hash
+                    for module, language, content_hash in conn.execute(
+                        "SELECT module, language, content_hash FROM learning_paths"
+                    )
+                }
+                with conn:
+                    conn.executemany(
+                        "DELETE FROM learning_paths WHERE module = ?",
+                        [(module,) for module in {m for m, _ in stored} - set(hashes)]
+                    )
+            finally:
+                conn.close()
+            return [
+                (module, language)
+                for module, content_hash in sorted(hashes.items())
+                for language in languages
+                if stored.get((module, language)) != content_hash
+            ]
+        return await run_in_executor(scan)
+
+
+learning_paths = LearningPathStore()
+
+
+__all__ = ["LearningPathStore", "learning_paths", "module_hashes", "module_of"]
@@ -0,0 +1,167 @@
+"""
+Publish Review Monk results as a single GitHub pull-request review.
+
+Findings whose ``file``/``line`` fall inside the diff become inline
+comments anchored to that line; the rest are listed in the review body.
+Everything goes out in one ``POST /reviews`` call. Once it has been
+posted, earlier reviews by the same account are found by a hidden marker
+and collapsed to a "superseded" note, so each push leaves one current
+review instead of a growing comment thread.
+"""
+
+from app.core.config import settings
+from app.services.github_service import github_service
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+REVIEW_MARKER = "<!-- codesherpa-review -->"
+SEVERITY_ICONS = {"CRITICAL": "🔴", "HIGH": "🟠", "MEDIUM": "🟡", "LOW": "🔵"}
+FOOTER = "\n---\n*Generated by CodeSherpa AI 🇮🇳*"
+
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+def hunk_lines(patch: str) -> set[int]:
+    """New-file line numbers a review comment can attach to (added and context lines)"""
+    lines: set[int] = set()
+    current = None
+    for row in patch.splitlines():
+        match = _HUNK.match(row)
+        if match:
+            current = int(match.group(1))
+            continue
+        if current is None or row.startswith("-") or row.startswith("\\"):
+            continue
+        lines.add(current)
+        current += 1
+    return lines
+
+
+def commentable_lines(diff: str) -> dict[str, set[int]]:
+    """Per-file commentable lines of a unified diff (``git diff`` format)"""
+    files: dict[str, set[int]] = {}
+    path = None
+    patch: list[str] = []
+    for row in diff.splitlines():
+        if row.startswith("diff --git "):
+            if path is not None:
+                files[path] = hunk_lines("\n".join(patch))
+            path, patch = None, []
+        elif row.startswith("+++ "):
+            target = row[4:].strip()
+            path = target[2:] if target.startswith("b/") else None  # /dev/null for deletions
+        elif path is not None:
+            patch.append(row)
+    if path is not None:
+        files[path] = hunk_lines("\n".join(patch))
+    return files
+
+
+def diff_path(path: str, lines_by_file: dict[str, set[int]]) -> str:
+    """Match a model-reported path (``./x``, ``a/x``, ``b/x``) to the path used in the diff"""
+    path = path.strip().strip("`")
+    while path.startswith("./"):
+        path = path[2:]
+    path = path.lstrip("/")
+    if path not in lines_by_file and path[:2] in ("a/", "b/") and path[2:] in lines_by_file:
+        path = path[2:]
+    return path
+
+
+def _finding_text(finding: dict) -> str:
+    severity = finding.get("severity", "INFO")
+    text = f"{SEVERITY_ICONS.get(severity, '⚪')} **{severity}**: {finding.get('issue', '')}"
+    if finding.get("suggestion"):
+        text += f"\n\n> Suggestion: {finding['suggestion']}"
+    if finding.get("code_fix"):
+        text += f"\n\n```\n{finding['code_fix']}\n```"
+    return text
+
+
+def build_review(review_result: dict, lines_by_file: dict[str, set[int]]) -> tuple[str, list[dict]]:
+    """
+    Split findings into inline comments (``path``/``line``/``side``) and a
+    summary body holding everything that couldn't be anchored.
+    """
+    comments = []
+    unanchored = []
+    for finding in review_result.get("findings") or []:
+        path = diff_path(str(finding.get("file") or ""), lines_by_file)
+        try:
+            line = int(finding.get("line"))
+        except (TypeError, ValueError):
+            line = None
+        if (
+            path and line is not None
+            and line in lines_by_file.get(path, ())
+            and len(comments) < settings.GITHUB_REVIEW_MAX_COMMENTS
+        ):
+            comments.append({"path": path, "line": line, "side": "RIGHT", "body": _finding_text(finding)})
+        else:
+            unanchored.append(finding)
+
+    body = f"{REVIEW_MARKER}\n## 🐵 Review Monk Analysis\n\n"
+    body += f"**Quality Score**: {review_result.get('quality_score', '?')}/10"
+    if review_result.get("security_risk"):
+        body += f" · **Security Risk**: {review_result['security_risk']}"
+    body += f"\n\n### Summary\n{review_result.get('summary', 'No summary.')}\n\n"
+    if comments:
+        body += f"_{len(comments)} finding(s) are attached inline._\n\n"
+    if unanchored:
+        body += "### 🚨 Other Findings\n"
+        for finding in unanchored:
+            location = finding.get("file", "")
+            if finding.get("line"):
+                location += f":{finding['line']}"
+            body += f"- {SEVERITY_ICONS.get(finding.get('severity'), '⚪')} **{finding.get('severity', 'INFO')}**: "
+            body += f"{finding.get('issue', '')}" + (f" (`{location}`)" if location else "") + "\n"
+            if finding.get("suggestion"):
+                body += f"  > Suggestion: {finding['suggestion']}\n"
+        body += "\n"
+    return body + FOOTER, comments
+
+
+async def _supersede_previous(repo_full_name: str, pr_number: int, head_sha: str, current: dict):
+    """Collapse the bodies of this account's earlier reviews, pointing at the new head"""
+    login = (current.get("user") or {}).get("login")
+    if not login:
+        return
+    note = f"{REVIEW_MARKER}\n~~Review Monk Analysis~~ — *Superseded by the review of `{head_sha[:7]}`.*"
+    for review in await github_service.list_reviews(repo_full_name, pr_number):
+        body = review.get("body") or ""
+        if (
+            review.get("id") == current.get("id")
+            or (review.get("user") or {}).get("login") != login
+            or REVIEW_MARKER not in body
+            or "Superseded" in body
+        ):
+            continue
+        await github_service.update_review(repo_full_name, pr_number, review["id"], note)
+
+
+async def publish_review(repo_full_name: str, pr_number: int, head_sha: str, review_result: dict, diff: str) -> bool:
+    """
+    Post ``review_result`` as one review with inline comments; True on success.
+    Earlier reviews are only superseded once the new one exists.
+    """
+    if "error" in review_result:
+        body = f"{REVIEW_MARKER}\n⚠️ **Review Monk Error**: {review_result['error']}{FOOTER}"
+        comments: list[dict] = []
+    else:
+        body, comments = build_review(review_result, commentable_lines(diff))
+
+    review = await github_service.create_review(repo_full_name, pr_number, head_sha, body, comments)
+    if review is None and comments:
+        # A comment that doesn't resolve fails the whole review; retry with everything in the body
+        logger.warning(f"Inline review rejected for {repo_full_name}#{pr_number}; posting summary only")
+        body, _ = build_review(review_result, {})
+        review = await github_service.create_review(repo_full_name, pr_number, head_sha, body, [])
+    if review is None:
+        return False
+    await _supersede_previous(repo_full_name, pr_number, head_sha, review)
+    return True
+
+
+__all__ = ["build_review", "commentable_lines", "diff_path", "hunk_lines", "publish_review"]
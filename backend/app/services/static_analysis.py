@@ -0,0 +1,282 @@
+"""
+Cheap local checks that run over a PR diff before Review Monk calls the model.
+
+Each analyzer is a plain function ``(path, added) -> findings`` where
+``added`` is the list of ``(line_number, text)`` pairs the diff adds to
+``path``. Findings use Review Monk's schema (``severity``, ``file``,
+``line``, ``issue``, ``suggestion``, ``code_fix``) plus the ``rule`` that
+fired, so they can be merged into the model's review or published as is.
+
+Analyzers register with ``@analyzer("name")``. Large diffs are split across
+a process pool. Workers are started fresh (forkserver, or spawn where that
+is unavailable) rather than forked from the threaded server, so only
+analyzers registered when this module is imported are visible there.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from fnmatch import fnmatchcase
+from app.core.config import settings
+import asyncio
+import logging
+import multiprocessing
+import re
+
+logger = logging.getLogger(__name__)
+
+Finding = dict
+Analyzer = Callable[[str, list[tuple[int, str]]], list[Finding]]
+
+ANALYZERS: dict[str, Analyzer] = {}
+
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+# Changes to these alone never need a model review
+TRIVIAL_GLOBS = ["*.md", "*.rst", "*/docs/*", "*/LICENSE", "*.lock", "*/package-lock.json", "*/go.sum"]
+
+
+def analyzer(name: str):
+    """Register an analyzer under ``name``"""
+    def register(func: Analyzer) -> Analyzer:
+        ANALYZERS[name] = func
+        return func
+    return register
+
+
+def parse_diff(diff: str) -> list[dict]:
+    """
+    Per-file added and removed lines of a unified diff:
+    ``{"path", "added": [(line, text)], "removed": [text]}``.
+    Deleted files are left out.
+    """
+    files: list[dict] = []
+    current: Optional[dict] = None
+    line_no = None
+    for row in diff.splitlines():
+        if row.startswith("diff --git "):
+            current, line_no = None, None
+        elif row.startswith("+++ "):
+            target = row[4:].strip()
+            current = {"path": target[2:], "added": [], "removed": []} if target.startswith("b/") else None
+            if current is not None:
+                files.append(current)
+        elif current is None or row.startswith("--- "):
+            continue
+        elif (match := _HUNK.match(row)):
+            line_no = int(match.group(1))
+        elif line_no is None:
+            continue
+        elif row.startswith("+"):
+            current["added"].append((line_no, row[1:]))
+            line_no += 1
+        elif row.startswith("-"):
+            current["removed"].append(row[1:])
+        elif not row.startswith("\\"):
+            line_no += 1
+    return files
+
+
+def trivial_reason(files: list[dict]) -> Optional[str]:
+    """Why a diff needs no model review (docs/lockfiles only, trailing whitespace only), or None"""
+    if not files:
+        return None
+    if all(any(fnmatchcase(f"/{f['path']}", pattern) for pattern in TRIVIAL_GLOBS) for f in files):
+        return "documentation or lockfile changes only"
+
+    # Only trailing whitespace and line endings; indentation and spaces inside
+    # strings can change behaviour, so those lines still count as edits
+    def stripped(lines) -> list[str]:
+        return [line.rstrip() for line in lines]
+
+    if all(stripped(text for _, text in f["added"]) == stripped(f["removed"]) for f in files):
+        return "trailing-whitespace-only changes"
+    return None
+
+
+def _finding(rule: str, severity: str, path: str, line: int, issue: str, suggestion: str, code_fix: str = "") -> Finding:
+    return {
+        "severity": severity,
+        "file": path,
+        "line": line,
+        "issue": issue,
+        "suggestion": suggestion,
+        "code_fix": code_fix,
+        "rule": rule
+    }
+
+
+# ===== BUILT-IN ANALYZERS =====
+
+_SECRET_PATTERNS = [
+    (re.compile(r"AKIA[0-9A-Z]{16}"), "AWS access key ID"),
+    (re.compile(r"gh[pousr]_[A-Za-z0-9]{36,}"), "GitHub token"),
+    (re.compile(r"-----BEGIN (?:RSA |EC |OPENSSH )?PRIVATE KEY-----"), "private key"),
+    (re.compile(r"xox[baprs]-[A-Za-z0-9-]{10,}"), "Slack token"),
+    (re.compile(
+        r"""(?i)\b(?:password|passwd|secret|api_?key|access_?token|secret_?key)\b\s*[:=]\s*["'][^"'\s]{8,}["']"""
+    ), "credential")
+]
+
+
+@analyzer("hardcoded_secret")
+def hardcoded_secrets(path: str, added: list[tuple[int, str]]) -> list[Finding]:
+    findings = []
+    for line, text in added:
+        for pattern, kind in _SECRET_PATTERNS:
+            if pattern.search(text):
+                findings.append(_finding(
+                    "hardcoded_secret", "CRITICAL", path, line,
+                    f"Hard-coded {kind} committed to the repository.",
+                    "Load it from the environment or a secrets manager and rotate the exposed value."
+                ))
+                break
+    return findings
+
+
+_NAIVE_NOW = re.compile(r"\bdatetime\.(?:now\(\s*\)|utcnow\(\s*\)|today\(\s*\))")
+
+
+@analyzer("naive_datetime")
+def naive_datetime(path: str, added: list[tuple[int, str]]) -> list[Finding]:
+    if not path.endswith(".py"):
+        return []
+    return [
+        _finding(
+            "naive_datetime", "MEDIUM", path, line,
+            "Naive datetime: no timezone, so IST and UTC values get mixed up.",
+            "Pass an explicit timezone.",
+            "datetime.now(timezone.utc)"
+        )
+        for line, text in added
+        if _NAIVE_NOW.search(text)
+    ]
+
+
+_BARE_EXCEPT = re.compile(r"^\s*except\s*:")
+
+
+@analyzer("bare_except")
+def bare_except(path: str, added: list[tuple[int, str]]) -> list[Finding]:
+    if not path.endswith(".py"):
+        return []
+    return [
+        _finding(
+            "bare_except", "LOW", path, line,
+            "Bare `except:` also catches KeyboardInterrupt and SystemExit and hides bugs.",
+            "Catch the specific exceptions expected here, or at least `Exception`.",
+            "except Exception:"
+        )
+        for line, text in added
+        if _BARE_EXCEPT.match(text)
+    ]
+
+
+_SQL = r"""["'](?:\s*)(?:SELECT|INSERT|UPDATE|DELETE)\b[^"']*"""
+_SQL_BUILDING = [
+    re.compile(rf"""\bf{_SQL}\{{""", re.IGNORECASE),  # f"SELECT ... {x}"
+    re.compile(rf"""{_SQL}["']\s*(?:\+|%\s*[\w(])""", re.IGNORECASE),  # "SELECT ..." + x / % x
+    re.compile(rf"""{_SQL}["']\s*\.format\(""", re.IGNORECASE)  # "SELECT ...".format(x)
+]
+
+
+@analyzer("sql_string_building")
+def sql_string_building(path: str, added: list[tuple[int, str]]) -> list[Finding]:
+    return [
+        _finding(
+            "sql_string_building", "HIGH", path, line,
+            "SQL built from strings: values interpolated into the query allow SQL injection.",
+            "Use bound parameters (e.g. `text(...)` with `:name` placeholders or the driver's `%s` params)."
+        )
+        for line, text in added
+        if any(pattern.search(text) for pattern in _SQL_BUILDING)
+    ]
+
+
+# ===== RUNNER =====
+
+def run_analyzers(files: list[dict], names: Optional[list[str]] = None) -> list[Finding]:
+    """Run the named (default: all) analyzers over parsed files"""
+    findings = []
+    for name in names or list(ANALYZERS):
+        check = ANALYZERS.get(name)
+        if check is None:
+            continue
+        for f in files:
+            try:
+                findings.extend(check(f["path"], f["added"]))
+            except Exception as e:
+                logger.warning(f"Analyzer {name} failed on {f['path']}: {e}")
+    return findings
+
+
+class StaticAnalyzer:
+    """Runs registered analyzers, in a process pool once a diff is big enough to pay for it"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process that runs threads (log queue listener, executors) can deadlock
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.STATIC_ANALYSIS_WORKERS,
+                mp_context=multiprocessing.get_context(method)
+            )
+        return self._pool
+
+    async def analyze(self, diff: str) -> dict:
+        """
+        ``{"findings": [...], "trivial": reason-or-None}`` for a diff.
+        Findings are sorted by file and line.
+        """
+        files = parse_diff(diff)
+        reason = trivial_reason(files)
+        if not files:
+            if re.search(r"(?m)^diff --git ", diff):
+                # A diff with nothing to check (binary files, deletions only)
+                return {"findings": [], "trivial": None}
+            # Not a unified diff (code pasted in chat): check every line
+            files = [{"path": "snippet", "added": list(enumerate(diff.splitlines(), 1)), "removed": []}]
+        names = settings.STATIC_ANALYZERS or None
+        added = sum(len(f["added"]) for f in files)
+
+        if added < settings.STATIC_ANALYSIS_POOL_MIN_LINES or settings.STATIC_ANALYSIS_WORKERS < 2:
+            findings = run_analyzers(files, names)
+        else:
+            # Deal files round-robin so each worker gets a similar share
+            workers = settings.STATIC_ANALYSIS_WORKERS
+            batches = [files[i::workers] for i in range(workers)]
+            loop = asyncio.get_running_loop()
+            try:
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(self.pool, run_analyzers, batch, names) for batch in batches if batch
+                ))
+                findings = [finding for result in results for finding in result]
+            except Exception as e:
+                logger.warning(f"Static analysis pool failed, running inline: {e}")
+                findings = run_analyzers(files, names)
+
+        findings.sort(key=lambda f: (f["file"], f["line"]))
+        return {"findings": findings, "trivial": reason if not findings else None}
+
+    def close(self):
+        """Stop pool workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+static_analyzer = StaticAnalyzer()
+
+
+__all__ = [
+    "ANALYZERS",
+    "StaticAnalyzer",
+    "analyzer",
+    "parse_diff",
+    "run_analyzers",
+    "static_analyzer",
+    "trivial_reason"
+]
@@ -0,0 +1,165 @@
+"""
+Server-Sent Events streaming for chat processing.
+
+Each stream runs the orchestrator in a background task that appends every
+event to a short-lived Redis list. The live response reads events from an
+in-process queue; a reconnecting client (on any worker) replays the list
+from its ``Last-Event-ID`` and then follows it until the stream finishes.
+
+Buffer writes happen off the emit path: events queue up in memory and one
+writer task per stream appends them in batches, one round trip per batch.
+"""
+
+from typing import AsyncIterator, Optional
+from app.core.config import settings
+from app.core.events import event_sink
+from app.core.redis_client import redis_client
+from fastapi.encoders import jsonable_encoder
+import asyncio
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_EVENTS = ("response", "error")
+
+# Running streams; the event loop only keeps weak references to tasks
+_stream_tasks: set[asyncio.Task] = set()
+
+
+def format_sse(frame: dict) -> str:
+    """Render a buffered event frame in text/event-stream wire format"""
+    return (
+        f"id: {frame['id']}\n"
+        f"event: {frame['event']}\n"
+        f"data: {json.dumps(frame['data'])}\n\n"
+    )
+
+
+def parse_event_id(event_id: Optional[str]) -> tuple[Optional[str], int]:
+    """Split a ``<stream_id>:<seq>`` event ID; returns (None, 0) if malformed"""
+    if not event_id or ":" not in event_id:
+        return None, 0
+    stream_id, _, seq = event_id.rpartition(":")
+    try:
+        return stream_id, int(seq)
+    except ValueError:
+        return None, 0
+
+
+class ChatStream:
+    """Buffers the events of one orchestrator run"""
+
+    def __init__(self, stream_id: str = None):
+        self.stream_id = stream_id or uuid.uuid4().hex
+        self.key = f"sse:{self.stream_id}"
+        self.seq = 0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._unbuffered: list[str] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    async def publish(self, event: str, data=None):
+        """Send an event to the live queue and schedule it for the replay buffer"""
+        self.seq += 1
+        frame = {
+            "id": f"{self.stream_id}:{self.seq}",
+            "event": event,
+            "data": jsonable_encoder(data)
+        }
+        self.queue.put_nowait(frame)
+        self._unbuffered.append(json.dumps(frame))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_buffer())
+
+    async def _write_buffer(self):
+        """Append queued frames to the replay buffer in order, a batch per round trip"""
+        while self._unbuffered:
+            batch, self._unbuffered = self._unbuffered, []
+            try:
+                await redis_client.rpush_ex(self.key, batch, settings.SSE_BUFFER_TTL_SECONDS)
+            except Exception as e:
+                logger.error(f"Failed to buffer SSE events: {str(e)}")
+
+    async def flush(self):
+        """Wait until every published event is in the replay buffer"""
+        while self._writer is not None and not self._writer.done():
+            await self._writer
+
+    async def run(self, orchestrator, payload: dict, session_id: str):
+        """Process the payload, publishing progress and the final result"""
+        await self.publish("stream", {"stream_id": self.stream_id})
+        await self.publish("status", "thinking")
+        try:
+            with event_sink(self.publish):
+                response = await orchestrator.process(payload, session_id)
+            await self.publish("response", response)
+        except Exception as e:
+            logger.error(f"SSE stream {self.stream_id} failed: {str(e)}")
+            await self.publish("error", "Error processing chat")
+        await self.flush()
+
+    async def live(self) -> AsyncIterator[str]:
+        """Yield events as they are produced, with keep-alive comments"""
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    self.queue.get(),
+                    timeout=settings.SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(frame)
+            if frame["event"] in TERMINAL_EVENTS:
+                return
+
+
+def start_chat_stream(orchestrator, payload: dict, session_id: str) -> ChatStream:
+    """
+    Start processing in the background and return the stream.
+
+    The task is not tied to the HTTP response, so a client that drops
+    mid-stream can resume without re-running the model call.
+    """
+    stream = ChatStream()
+    task = asyncio.create_task(stream.run(orchestrator, payload, session_id))
+    _stream_tasks.add(task)
+    task.add_done_callback(_stream_tasks.discard)
+    return stream
+
+
+async def resume_chat_stream(stream_id: str, last_seq: int = 0, poll_interval: float = 0.25) -> AsyncIterator[str]:
+    """Replay buffered events after ``last_seq`` and follow until the stream ends"""
+    key = f"sse:{stream_id}"
+    waited = 0.0
+    idle_since_keepalive = 0.0
+
+    while waited < settings.SSE_BUFFER_TTL_SECONDS:
+        raw_frames = await redis_client.lrange(key, last_seq, -1)
+        if raw_frames:
+            waited = 0.0
+            idle_since_keepalive = 0.0
+            for raw in raw_frames:
+                frame = json.loads(raw)
+                last_seq += 1
+                yield format_sse(frame)
+                if frame["event"] in TERMINAL_EVENTS:
+                    return
+            continue
+
+        await asyncio.sleep(poll_interval)
+        waited += poll_interval
+        idle_since_keepalive += poll_interval
+        if idle_since_keepalive >= settings.SSE_KEEPALIVE_SECONDS:
+            idle_since_keepalive = 0.0
+            yield ": keep-alive\n\n"
+
+
+__all__ = [
+    "ChatStream",
+    "format_sse",
+    "parse_event_id",
+    "resume_chat_stream",
+    "start_chat_stream"
+]
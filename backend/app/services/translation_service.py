@@ -0,0 +1,119 @@
+"""
+Translate Sherpa answers instead of regenerating them per language.
+
+An answer is generated once in the pivot language and its prose fields
+are translated by a short, low-temperature call to a smaller model.
+Translations are cached in Redis by (hash of the translated fields,
+language), so every user who asks for the same answer in the same
+language shares one translation. Only complete translations are cached: a
+reply cut off at ``max_tokens`` is retried once with the full budget, and
+if it's still incomplete the pivot-language answer is returned instead.
+"""
+
+from typing import Optional
+from app.core.config import settings
+from app.core.json_extract import ModelOutputError, extract_json
+from app.core.redis_client import redis_client
+from app.services.bedrock_service import bedrock_client
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_SYSTEM_PROMPT = """You translate developer-facing explanations.
+Translate every string value of the JSON you are given into the requested language.
+Keep JSON keys, code, identifiers, file paths, URLs and markdown formatting unchanged.
+'Hinglish' means conversational Hindi written in Latin script, mixed with English technical terms.
+Reply with the translated JSON only."""
+
+PAYLOAD_MARKER = "JSON to translate:\n"
+
+
+def translatable_fields(result: dict) -> dict:
+    """The prose parts of a Sherpa answer; structure and code stay as they are"""
+    fields = {}
+    if isinstance(result.get("explanation"), str):
+        fields["explanation"] = result["explanation"]
+    if isinstance(result.get("analogy"), str) and result["analogy"] != "N/A":
+        fields["analogy"] = result["analogy"]
+    if isinstance(result.get("learning_steps"), list):
+        fields["learning_steps"] = [str(step) for step in result["learning_steps"]]
+    if isinstance(result.get("key_concepts"), list):
+        fields["definitions"] = [
+            str(concept.get("definition", "")) for concept in result["key_concepts"] if isinstance(concept, dict)
+        ]
+    return fields
+
+
+def apply_translation(result: dict, fields: dict, translated: dict) -> dict:
+    """``result`` with translated fields swapped in; anything malformed is left untranslated"""
+    merged = dict(result)
+    for key in ("explanation", "analogy"):
+        if isinstance(translated.get(key), str) and key in fields:
+            merged[key] = translated[key]
+    steps = translated.get("learning_steps")
+    if isinstance(steps, list) and len(steps) == len(fields.get("learning_steps", [])):
+        merged["learning_steps"] = steps
+    definitions = translated.get("definitions")
+    if isinstance(definitions, list) and len(definitions) == len(fields.get("definitions", [])):
+        concepts = [concept for concept in result["key_concepts"] if isinstance(concept, dict)]
+        merged["key_concepts"] = [
+            {**concept, "definition": definition} for concept, definition in zip(concepts, definitions)
+        ]
+    return merged
+
+
+class TranslationService:
+    async def translate(self, result: dict, language: str) -> dict:
+        """Translate a Sherpa answer, falling back to the pivot-language answer on failure"""
+        fields = translatable_fields(result)
+        if not fields:
+            return result
+        payload = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        cache_key = f"tr:{digest}:{language.lower()}"
+
+        cached = await redis_client.get(cache_key)
+        if cached:
+            return apply_translation(result, fields, json.loads(cached))
+
+        prompt = f"Target language: {language}\n\n{PAYLOAD_MARKER}{payload}"
+        budget = min(
+            settings.TRANSLATION_MAX_TOKENS,
+            int(len(payload) * settings.TRANSLATION_TOKENS_PER_CHAR) + 256
+        )
+        translated = await self._translate(prompt, budget)
+        if translated is None and budget < settings.TRANSLATION_MAX_TOKENS:
+            translated = await self._translate(prompt, settings.TRANSLATION_MAX_TOKENS)
+        if translated is None:
+            logger.warning(f"Translation to {language} failed; returning {settings.SHERPA_PIVOT_LANGUAGE}")
+            return result
+
+        await redis_client.set(cache_key, json.dumps(translated, ensure_ascii=False), ex=settings.TRANSLATION_CACHE_TTL_SECONDS)
+        return apply_translation(result, fields, translated)
+
+    async def _translate(self, prompt: str, max_tokens: int) -> Optional[dict]:
+        """The translated fields, or None unless the model finished a well-formed reply"""
+        response_text, stop_reason = await bedrock_client.invoke_claude_with_stop_reason(
+            prompt,
+            TRANSLATION_SYSTEM_PROMPT,
+            max_tokens=max_tokens,
+            temperature=0.0,
+            agent="translator"  # Small tier by default (AGENT_MODELS)
+        )
+        if stop_reason != "end_turn":
+            logger.info(f"Translation stopped early ({stop_reason}, max_tokens={max_tokens})")
+            return None
+        try:
+            # No repair: a "repaired" translation is a truncated one
+            return extract_json(response_text, repair_truncated=False)
+        except ModelOutputError as e:
+            logger.info(f"Unusable translation: {e}")
+            return None
+
+
+translation_service = TranslationService()
+
+
+__all__ = ["TranslationService", "apply_translation", "translatable_fields", "translation_service"]
@@ -0,0 +1,238 @@
+"""
+Embedding retrieval over code index chunks.
+
+Chunks are embedded with a deterministic local embedder (signed feature
+hashing of identifiers and their sub-words), so retrieval works offline
+and results are stable across processes. Vectors are int8-quantized with
+a per-row scale and stored in the repository's SQLite index; only chunks
+without an embedding are embedded on each sync.
+
+For search, the vectors are exported to ``.npy`` files next to the index
+and memory-mapped, so every worker shares the page cache instead of
+holding its own copy. The default backend scores every vector (blocked
+int8 matrix products, milliseconds for ~100k chunks); ``hnsw`` builds an
+hnswlib graph instead when that package is installed.
+"""
+
+from typing import Optional
+from functools import lru_cache
+from app.core.config import settings
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+SCORE_BLOCK_ROWS = 4096  # Rows dequantized per matrix product
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_SUBWORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    """numpy, imported on first use so app start-up doesn't pay for it (None if not installed)"""
+    try:
+        import numpy
+    except ImportError:  # Optional: retrieval is skipped without numpy
+        return None
+    return numpy
+
+
+@lru_cache(maxsize=1)
+def _hnswlib():
+    """hnswlib, imported on first use (None if not installed)"""
+    try:
+        import hnswlib
+    except ImportError:  # Optional: brute force is used without hnswlib
+        return None
+    return hnswlib
+
+
+def tokens(text: str) -> list[str]:
+    """Lower-cased identifiers plus their camelCase/snake_case parts"""
+    out = []
+    for identifier in _IDENTIFIER.findall(text):
+        lowered = identifier.lower()
+        out.append(lowered)
+        parts = _SUBWORD.findall(identifier)
+        if len(parts) > 1:
+            out.extend(part.lower() for part in parts)
+    return out
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-identifiers embedding: each token is hashed to a
+    dimension and a sign, counts are log-scaled and the vector L2-normalised.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: list[str]) -> "np.ndarray":
+        np = _numpy()
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: dict[int, float] = {}
+            for token in tokens(text):
+                h = zlib.crc32(token.encode())
+                index = (h >> 1) % self.dim
+                counts[index] = counts.get(index, 0.0) + (1.0 if h & 1 else -1.0)
+            for index, count in counts.items():
+                matrix[row, index] = math.copysign(1.0 + math.log(abs(count)), count) if count else 0.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+
+def quantize(matrix: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    """Symmetric per-row int8 quantization: ``matrix ≈ int8 * scale``"""
+    np = _numpy()
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+class VectorIndex:
+    """Embeds new chunks on sync and answers top-k queries from memory-mapped vectors"""
+
+    def __init__(self):
+        self.embedder = HashingEmbedder(settings.EMBEDDING_DIM)
+        self._loaded: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.VECTOR_INDEX_ENABLED and _numpy() is not None
+
+    # ----- build -----
+
+    def refresh(self, conn: sqlite3.Connection, directory: str, force_export: bool = False) -> int:
+        """
+        Embed chunks that have no embedding yet (in batches) and re-export
+        the search files when anything changed. Returns the number embedded.
+        """
+        stored = conn.execute("SELECT value FROM meta WHERE key = 'embedder'").fetchone()
+        if stored and stored[0] != self.embedder.name:
+            conn.execute("DELETE FROM embeddings")  # Different model: vectors aren't comparable
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('embedder', ?)", (self.embedder.name,))
+
+        pending = conn.execute(
+            "SELECT c.rowid, c.path, c.text FROM chunks c "
+            "LEFT JOIN embeddings e ON e.chunk_id = c.rowid WHERE e.chunk_id IS NULL"
+        ).fetchall()
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            # The path is part of what a chunk is about
+            texts = [f"{path}\n{zlib.decompress(text).decode('utf-8')}" for _, path, text in batch]
+            vectors, scales = quantize(self.embedder.embed(texts))
+            conn.executemany(
+                "INSERT INTO embeddings VALUES (?, ?, ?, ?)",
+                [
+                    (chunk_id, path, vectors[i].tobytes(), float(scales[i]))
+                    for i, (chunk_id, path, _) in enumerate(batch)
+                ]
+            )
+        conn.commit()
+
+        if pending or force_export or not os.path.exists(os.path.join(directory, "ids.npy")):
+            self._export(conn, directory)
+        return len(pending)
+
+    def _export(self, conn: sqlite3.Connection, directory: str):
+        np, hnswlib = _numpy(), _hnswlib()
+        os.makedirs(directory, exist_ok=True)
+        rows = conn.execute("SELECT chunk_id, vector, scale FROM embeddings ORDER BY chunk_id").fetchall()
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        scales = np.array([row[2] for row in rows], dtype=np.float32)
+        vectors = (
+            np.frombuffer(b"".join(row[1] for row in rows), dtype=np.int8).reshape(len(rows), self.embedder.dim)
+            if rows else np.zeros((0, self.embedder.dim), dtype=np.int8)
+        )
+
+        if settings.VECTOR_INDEX_BACKEND == "hnsw" and hnswlib is not None and len(rows):
+            graph = hnswlib.Index(space="ip", dim=self.embedder.dim)
+            graph.init_index(max_elements=len(rows), ef_construction=200, M=16)
+            graph.add_items(vectors.astype(np.float32) * scales[:, None], np.arange(len(rows)))
+            tmp = os.path.join(directory, "hnsw.tmp.bin")
+            graph.save_index(tmp)
+            os.replace(tmp, os.path.join(directory, "hnsw.bin"))
+
+        # Write-then-rename so readers never map a half-written file; ids.npy goes last
+        # (after the graph) because its mtime is what readers watch
+        for name, array in (("vectors", vectors), ("scales", scales), ("ids", ids)):
+            tmp = os.path.join(directory, f"{name}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+
+    # ----- search -----
+
+    def _load(self, directory: str) -> Optional[dict]:
+        """Memory-map the exported files, reloading when a sync has replaced them"""
+        ids_path = os.path.join(directory, "ids.npy")
+        try:
+            mtime = os.path.getmtime(ids_path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._loaded.get(directory)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            np, hnswlib = _numpy(), _hnswlib()
+            loaded = {
+                "ids": np.load(ids_path),
+                "scales": np.load(os.path.join(directory, "scales.npy")),
+                "vectors": np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r"),
+                "graph": None
+            }
+            graph_path = os.path.join(directory, "hnsw.bin")
+            if (
+                settings.VECTOR_INDEX_BACKEND == "hnsw" and hnswlib is not None
+                and os.path.exists(graph_path) and len(loaded["ids"])
+            ):
+                graph = hnswlib.Index(space="ip", dim=self.embedder.dim)
+                graph.load_index(graph_path, max_elements=len(loaded["ids"]))
+                graph.set_ef(max(50, settings.VECTOR_TOP_K * 4))
+                loaded["graph"] = graph
+            self._loaded[directory] = (mtime, loaded)
+            return loaded
+
+    def search(self, directory: str, query: str, k: int) -> list[tuple[int, float]]:
+        """``(chunk_id, score)`` of the ``k`` chunks most similar to ``query``"""
+        if not self.enabled or not query.strip():
+            return []
+        loaded = self._load(directory)
+        if loaded is None or not len(loaded["ids"]):
+            return []
+        np = _numpy()
+        q = self.embedder.embed([query])[0]
+        k = min(k, len(loaded["ids"]))
+
+        if loaded["graph"] is not None:
+            labels, distances = loaded["graph"].knn_query(q, k=k)
+            return [(int(loaded["ids"][i]), 1.0 - float(d)) for i, d in zip(labels[0], distances[0])]
+
+        vectors = loaded["vectors"]
+        scores = np.empty(len(vectors), dtype=np.float32)
+        # Cache-sized blocks, dequantized into one reused buffer
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(vectors)), vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = vectors[start:start + SCORE_BLOCK_ROWS]
+            np.copyto(buffer[:len(block)], block, casting="unsafe")
+            scores[start:start + len(block)] = buffer[:len(block)] @ q
+        scores *= loaded["scales"]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(loaded["ids"][i]), float(scores[i])) for i in top]
+
+
+vector_index = VectorIndex()
+
+
+__all__ = ["HashingEmbedder", "VectorIndex", "quantize", "tokens", "vector_index"]
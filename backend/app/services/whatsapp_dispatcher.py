@@ -0,0 +1,157 @@
+"""
+Background processing of inbound WhatsApp messages.
+
+The webhook only parses, dedupes and enqueues, so it answers Meta well
+inside the delivery deadline even for bursty group traffic. Messages are
+queued per sender number and each number has at most one message in
+flight, which keeps replies in the order the user wrote them. A global
+semaphore bounds how many numbers are processed at once per worker.
+
+A message counts as seen once its ID is claimed in Redis. Messages this
+worker can't process (backlog full, or still queued at shutdown) release
+their claim so a redelivery is processed instead of being taken for a
+duplicate.
+"""
+
+from collections import deque
+from typing import Optional
+from app.core.config import settings
+from app.core.logging_setup import log_context
+from app.core.metrics import WHATSAPP_MESSAGES
+from app.core.redis_client import redis_client
+from app.core.tracing import mark_error, span_from_context
+from app.services.whatsapp_service import whatsapp_service
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+ERROR_REPLY = "Sorry, something went wrong while processing your message. Please try again."
+
+
+def language_of(text: str) -> str:
+    """Reply language for a message: Hindi if it is written in Devanagari"""
+    if any("\u0900" <= char <= "\u097f" for char in text):
+        return "Hindi"
+    return settings.WHATSAPP_DEFAULT_LANGUAGE
+
+
+def _dedupe_key(message_id: str) -> str:
+    return f"wa:msg:{message_id}"
+
+
+async def claim_message(message_id: str) -> bool:
+    """First time we've seen this message ID (Meta redelivers on timeouts)"""
+    return bool(await redis_client.set(
+        _dedupe_key(message_id), "1",
+        ex=settings.WHATSAPP_DEDUPE_TTL_SECONDS,
+        nx=True
+    ))
+
+
+async def release_messages(message_ids: list[str]):
+    """Forget claimed IDs so redeliveries of these messages are processed"""
+    if message_ids:
+        await redis_client.delete(*(_dedupe_key(message_id) for message_id in message_ids))
+
+
+class WhatsAppDispatcher:
+    """Per-number FIFO queues drained by short-lived worker tasks"""
+
+    def __init__(self, max_concurrency: int = None, max_pending: int = None):
+        self.max_concurrency = max_concurrency or settings.WHATSAPP_MAX_CONCURRENCY
+        self.max_pending = max_pending or settings.WHATSAPP_MAX_PENDING
+        self.queues: dict[str, deque] = {}
+        self.workers: dict[str, asyncio.Task] = {}
+        self.in_flight: dict[str, dict] = {}  # Number -> message being processed
+        self.pending = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def submit(self, message: dict) -> bool:
+        """
+        Queue ``{"id", "from", "text", "trace_context"}`` for processing.
+        Returns False when the worker is saturated and the message was not
+        queued; the caller should release its claim and ask for redelivery.
+        """
+        if self.pending >= self.max_pending:
+            logger.warning(f"WhatsApp backlog full; rejecting message {message['id']}")
+            WHATSAPP_MESSAGES.labels("dropped").inc()
+            return False
+
+        number = message["from"]
+        self.queues.setdefault(number, deque()).append(message)
+        self.pending += 1
+        if number not in self.workers:
+            self.workers[number] = asyncio.create_task(self._drain(number))
+        return True
+
+    async def _drain(self, number: str):
+        queue = self.queues[number]
+        try:
+            while queue:
+                message = queue.popleft()
+                self.pending -= 1
+                self.in_flight[number] = message
+                try:
+                    async with self.semaphore:
+                        await self._handle(message)
+                finally:
+                    self.in_flight.pop(number, None)
+        finally:
+            # No await between the empty check and here, so nothing can be enqueued in between
+            self.workers.pop(number, None)
+            if not queue:
+                self.queues.pop(number, None)
+
+    async def _handle(self, message: dict):
+        # The container stops this dispatcher on shutdown, so import it late
+        from app.core.container import get_orchestrator
+
+        number = message["from"]
+        session_id = f"wa-{number}"
+        with log_context(request_id=message["id"], session_id=session_id), \
+                span_from_context("whatsapp.message", message.get("trace_context")) as span:
+            try:
+                result = await get_orchestrator().process(
+                    {"message": message["text"], "language": language_of(message["text"])},
+                    session_id
+                )
+            except Exception as e:
+                mark_error(span, e)
+                logger.error(f"WhatsApp message {message['id']} failed: {str(e)}")
+                WHATSAPP_MESSAGES.labels("failed").inc()
+                await whatsapp_service.send_text(number, ERROR_REPLY, reply_to=message["id"])
+                return
+            WHATSAPP_MESSAGES.labels("processed").inc()
+            await whatsapp_service.send_reply(number, result, reply_to=message["id"])
+
+    async def stop(self):
+        """
+        Give queued work WHATSAPP_SHUTDOWN_DRAIN_SECONDS to finish, then cancel
+        the rest and release the claims of every message left unanswered.
+        """
+        workers = list(self.workers.values())
+        if workers:
+            await asyncio.wait(workers, timeout=settings.WHATSAPP_SHUTDOWN_DRAIN_SECONDS)
+        unanswered = list(self.in_flight.values()) + [m for queue in self.queues.values() for m in queue]
+        for task in list(self.workers.values()):
+            task.cancel()
+        self.workers.clear()
+        self.queues.clear()
+        self.in_flight.clear()
+        self.pending = 0
+        if unanswered:
+            logger.warning(f"Releasing {len(unanswered)} unanswered WhatsApp messages on shutdown")
+            WHATSAPP_MESSAGES.labels("released").inc(len(unanswered))
+            await release_messages([message["id"] for message in unanswered])
+
+
+whatsapp_dispatcher = WhatsAppDispatcher()
+
+__all__ = ["WhatsAppDispatcher", "claim_message", "language_of", "release_messages", "whatsapp_dispatcher"]
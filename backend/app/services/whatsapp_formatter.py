@@ -0,0 +1,177 @@
+"""
+Render agent results as WhatsApp messages.
+
+WhatsApp supports a small markdown dialect (``*bold*``, ``_italic_``,
+fenced code blocks, ``- `` lists) and caps text messages at 4096
+characters. Agent output is converted to that dialect and split into
+ordered chunks that respect the limit without breaking code blocks.
+"""
+
+import json
+import re
+
+SEVERITY_ICONS = {"CRITICAL": "🔴", "HIGH": "🟠", "MEDIUM": "🟡", "LOW": "🔵"}
+SEVERITY_ORDER = ["CRITICAL", "HIGH", "MEDIUM", "LOW"]
+
+FENCE = "```"
+
+_HEADING = re.compile(r"^#{1,6}\s+(.+)$", re.MULTILINE)
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+
+
+def to_whatsapp_markdown(text: str) -> str:
+    """Convert common (GitHub-flavoured) markdown to WhatsApp's dialect"""
+    text = _HEADING.sub(r"*\1*", text)
+    text = _BOLD.sub(r"*\1*", text)
+    text = _LINK.sub(r"\1 (\2)", text)
+    return text.strip()
+
+
+def is_review(result: dict) -> bool:
+    return "findings" in result or "quality_score" in result
+
+
+def _format_review(result: dict, detailed: bool) -> str:
+    lines = [f"*Review Monk* · Score {result.get('quality_score', '?')}/10"]
+    if result.get("security_risk"):
+        lines[0] += f" · Security risk: {result['security_risk']}"
+    if result.get("summary"):
+        lines += ["", to_whatsapp_markdown(str(result["summary"]))]
+
+    findings = sorted(
+        result.get("findings") or [],
+        key=lambda f: SEVERITY_ORDER.index(f.get("severity")) if f.get("severity") in SEVERITY_ORDER else len(SEVERITY_ORDER)
+    )
+    for finding in findings:
+        severity = finding.get("severity", "INFO")
+        location = finding.get("file", "")
+        if finding.get("line"):
+            location += f":{finding['line']}"
+        lines += ["", f"{SEVERITY_ICONS.get(severity, '⚪')} *{severity}* `{location}`"]
+        lines.append(to_whatsapp_markdown(str(finding.get("issue", ""))))
+        if finding.get("suggestion"):
+            lines.append(f"_Fix:_ {to_whatsapp_markdown(str(finding['suggestion']))}")
+        if detailed and finding.get("code_fix"):
+            lines.append(f"{FENCE}\n{finding['code_fix']}\n{FENCE}")
+    return "\n".join(lines)
+
+
+def _format_explanation(result: dict) -> str:
+    parts = [to_whatsapp_markdown(str(result.get("explanation", "")))]
+    if result.get("analogy") and result["analogy"] != "N/A":
+        parts.append(f"💡 _{result['analogy']}_")
+    if result.get("key_concepts"):
+        concepts = [
+            f"- *{concept.get('term')}*: {concept.get('definition')}"
+            for concept in result["key_concepts"]
+            if isinstance(concept, dict)
+        ]
+        parts.append("*Key concepts*\n" + "\n".join(concepts))
+    if result.get("learning_steps"):
+        steps = [f"{i}. {step}" for i, step in enumerate(result["learning_steps"], 1)]
+        parts.append("*Next steps*\n" + "\n".join(steps))
+    return "\n\n".join(part for part in parts if part)
+
+
+def format_result(result: dict, detailed: bool = False) -> str:
+    """
+    Compact WhatsApp text for an agent result.
+    ``detailed`` adds material meant for a document attachment (code fixes).
+    """
+    if "error" in result:
+        return f"⚠️ {result['error']}"
+    if is_review(result):
+        return _format_review(result, detailed)
+    if "explanation" in result:
+        return _format_explanation(result)
+    if "reply" in result:
+        return to_whatsapp_markdown(str(result["reply"]))
+    return json.dumps(result, ensure_ascii=False, indent=1)
+
+
+def format_brief(result: dict, limit: int) -> str:
+    """Short caption for a reply whose full text goes in a document"""
+    if is_review(result):
+        counts = {}
+        for finding in result.get("findings") or []:
+            severity = finding.get("severity", "INFO")
+            counts[severity] = counts.get(severity, 0) + 1
+        header = _format_review({**result, "findings": []}, detailed=False)
+        tally = ", ".join(f"{SEVERITY_ICONS.get(s, '⚪')} {counts[s]} {s.lower()}" for s in SEVERITY_ORDER if s in counts)
+        text = f"{header}\n\n{tally}" if tally else header
+    else:
+        text = format_result(result)
+    suffix = "\n\n📄 Full reply attached."
+    if len(text) + len(suffix) > limit:
+        text = text[:limit - len(suffix) - 1].rstrip() + "…"
+    return text + suffix
+
+
+def _split_oversized(block: str, limit: int) -> list[str]:
+    """Split a single block on line, then word, then character boundaries"""
+    pieces: list[str] = []
+    current = ""
+    for line in block.split("\n"):
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            pieces.append(line[:cut])
+            line = line[cut:].lstrip(" ")
+        current = line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, limit: int = 4096) -> list[str]:
+    """
+    Split ``text`` into messages of at most ``limit`` characters.
+
+    Breaks fall on paragraph, then line, then word boundaries. A chunk that
+    ends inside a code block closes it and the next one reopens it. Chunks
+    are numbered ``(1/3)`` when there is more than one.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    # Room for the "(n/m) " prefix and a closing/reopening fence
+    budget = limit - 2 * (len(FENCE) + 1) - len("(99/99) ")
+    blocks: list[str] = []
+    for paragraph in text.split("\n\n"):
+        blocks.extend(_split_oversized(paragraph, budget) if len(paragraph) > budget else [paragraph])
+
+    chunks: list[str] = []
+    current = ""
+    for block in blocks:
+        candidate = f"{current}\n\n{block}" if current else block
+        if len(candidate) <= budget:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = block
+    if current:
+        chunks.append(current)
+
+    for i in range(len(chunks) - 1):
+        if chunks[i].count(FENCE) % 2:
+            chunks[i] += f"\n{FENCE}"
+            chunks[i + 1] = f"{FENCE}\n{chunks[i + 1]}"
+
+    total = len(chunks)
+    return [f"({i}/{total}) {chunk}" for i, chunk in enumerate(chunks, 1)]
+
+
+__all__ = [
+    "chunk_text",
+    "format_brief",
+    "format_result",
+    "is_review",
+    "to_whatsapp_markdown"
+]
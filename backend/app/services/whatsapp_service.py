@@ -0,0 +1,163 @@
+from typing import TYPE_CHECKING, Optional
+import hashlib
+import logging
+import time
+from app.core.config import settings
+from app.core.metrics import WHATSAPP_API_SECONDS
+from app.core.redis_client import redis_client
+from app.core.tracing import tracer
+from app.services.whatsapp_formatter import chunk_text, format_brief, format_result, is_review
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+class WhatsAppService:
+    """
+    Sends replies through the WhatsApp Cloud (Graph) API.
+
+    Without ``WHATSAPP_ACCESS_TOKEN`` the service runs in stub mode and
+    logs outgoing messages instead of calling Meta, so the webhook can be
+    exercised locally.
+    """
+
+    def __init__(self):
+        self.stub_mode = not (settings.WHATSAPP_ACCESS_TOKEN and settings.WHATSAPP_PHONE_NUMBER_ID)
+        if self.stub_mode:
+            logger.warning("WhatsApp credentials not found. Replies will be logged, not sent.")
+        self.headers = {"Authorization": f"Bearer {settings.WHATSAPP_ACCESS_TOKEN}"}
+        self.messages_url = f"{settings.WHATSAPP_GRAPH_URL}/{settings.WHATSAPP_PHONE_NUMBER_ID}/messages"
+        self.media_url = f"{settings.WHATSAPP_GRAPH_URL}/{settings.WHATSAPP_PHONE_NUMBER_ID}/media"
+        self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Shared client so replies reuse pooled keep-alive connections"""
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, operation: str, method: str, url: str, **kwargs) -> "httpx.Response":
+        """Send a request on the pooled client, recording latency by operation and status"""
+        started = time.perf_counter()
+        status = "error"
+        with tracer.start_as_current_span(f"whatsapp.{operation}", attributes={"http.method": method}) as span:
+            try:
+                response = await self.client.request(method, url, headers=self.headers, **kwargs)
+                status = str(response.status_code)
+                span.set_attribute("http.status_code", response.status_code)
+                return response
+            finally:
+                WHATSAPP_API_SECONDS.labels(operation, status).observe(time.perf_counter() - started)
+
+    async def _send(self, operation: str, to: str, message: dict, reply_to: str = None) -> bool:
+        """Send one message object (``{"type": ..., <type>: {...}}``)"""
+        payload = {
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": to,
+            **message
+        }
+        if reply_to:
+            payload["context"] = {"message_id": reply_to}
+
+        if self.stub_mode:
+            logger.info(f"[WhatsApp stub] {message['type']} to {to}: {str(message[message['type']])[:200]}")
+            return True
+
+        try:
+            response = await self._request(operation, "POST", self.messages_url, json=payload)
+            if response.is_error:
+                logger.error(f"WhatsApp API Error: {response.text}")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Error sending WhatsApp message: {e}")
+            return False
+
+    async def send_text(self, to: str, body: str, reply_to: str = None) -> bool:
+        """Send a text message, optionally quoting the message being answered"""
+        return await self._send(
+            "send_text", to,
+            {"type": "text", "text": {"preview_url": False, "body": body}},
+            reply_to
+        )
+
+    async def send_document(self, to: str, media_id: str, filename: str, caption: str = None, reply_to: str = None) -> bool:
+        """Send a previously uploaded document by media ID"""
+        document = {"id": media_id, "filename": filename}
+        if caption:
+            document["caption"] = caption
+        return await self._send("send_document", to, {"type": "document", "document": document}, reply_to)
+
+    async def upload_media(self, content: bytes, filename: str, mime_type: str) -> Optional[str]:
+        """
+        Upload a file and return its media ID. IDs are cached by content hash,
+        so the same document is uploaded once and then referenced.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        cache_key = f"wa:media:{digest}"
+        cached = await redis_client.get(cache_key)
+        if cached:
+            return cached
+
+        if self.stub_mode:
+            media_id = f"stub-{digest[:16]}"
+        else:
+            try:
+                response = await self._request(
+                    "upload_media", "POST", self.media_url,
+                    data={"messaging_product": "whatsapp", "type": mime_type},
+                    files={"file": (filename, content, mime_type)}
+                )
+                if response.is_error:
+                    logger.error(f"WhatsApp media upload failed: {response.text}")
+                    return None
+                media_id = response.json()["id"]
+            except Exception as e:
+                logger.error(f"Error uploading WhatsApp media: {e}")
+                return None
+
+        await redis_client.set(cache_key, media_id, ex=settings.WHATSAPP_MEDIA_TTL_SECONDS)
+        return media_id
+
+    async def send_reply(self, to: str, result: dict, reply_to: str = None) -> bool:
+        """
+        Deliver an agent result in as few API calls as possible: a single
+        text when it fits, a few ordered chunks when it doesn't, and a
+        captioned document once it would take more than
+        ``WHATSAPP_MAX_TEXT_CHUNKS`` messages.
+        """
+        chunks = chunk_text(format_result(result), settings.WHATSAPP_TEXT_LIMIT)
+
+        if len(chunks) > settings.WHATSAPP_MAX_TEXT_CHUNKS and settings.WHATSAPP_DOCUMENT_REPLIES:
+            document = format_result(result, detailed=True).encode("utf-8")
+            filename = "codesherpa-review.txt" if is_review(result) else "codesherpa-reply.txt"
+            media_id = await self.upload_media(document, filename, "text/plain")
+            if media_id:
+                return await self.send_document(
+                    to, media_id, filename,
+                    caption=format_brief(result, settings.WHATSAPP_CAPTION_LIMIT),
+                    reply_to=reply_to
+                )
+            logger.warning("Falling back to chunked text reply")
+
+        # Sequential, so chunks arrive in order
+        for i, chunk in enumerate(chunks):
+            if not await self.send_text(to, chunk, reply_to if i == 0 else None):
+                return False
+        return True
+
+
+whatsapp_service = WhatsAppService()
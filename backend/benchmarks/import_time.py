@@ -0,0 +1,77 @@
+"""
+Import-time profile of the FastAPI application.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter
+(several times, keeping the fastest run) and reports total import time plus
+the slowest top-level packages. Use ``--max-ms`` to fail when the cold
+import regresses past a budget.
+
+Usage (from backend/):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 5 --top 15 --max-ms 800
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_import(module: str) -> tuple[int, dict[str, int]]:
+    """
+    Import ``module`` in a fresh interpreter.
+
+    Returns its cumulative import time and the self time of every imported
+    module summed per top-level package, both in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    total = 0
+    packages: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2].strip()
+        if name == module:
+            total = cumulative_us
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return total, packages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if total import time exceeds this")
+    args = parser.parse_args()
+
+    total, packages = min(
+        (profile_import(args.module) for _ in range(args.runs)),
+        key=lambda run: run[0]
+    )
+    total_ms = total / 1000
+
+    print(f"import {args.module}: {total_ms:.1f} ms (best of {args.runs})")
+    print(f"{'package':<32} {'self ms':>10}")
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    for name, us in ranked[:args.top]:
+        print(f"{name:<32} {us / 1000:>10.1f}")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"FAIL: {total_ms:.1f} ms exceeds budget of {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Blocking-call check for hot request paths.
+
+Starts the app in-process with the event-loop monitor enabled, drives the
+hot paths (auth, agent listing, /process, WebSocket chat) and reports every
+call site that held the loop longer than the threshold. With ``--baseline``
+the run fails when a call site shows up that the baseline doesn't list, so
+new blocking calls are caught before they ship.
+
+Usage (from backend/):
+    python benchmarks/loop_blocking.py
+    python benchmarks/loop_blocking.py --baseline benchmarks/blocking_baseline.json
+    python benchmarks/loop_blocking.py --baseline benchmarks/blocking_baseline.json --update-baseline
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def stable_site(site: str) -> str:
+    """Drop the line number so baselines survive unrelated edits"""
+    return re.sub(r":\d+ ", " ", site)
+
+
+def drive(client, iterations: int):
+    """Exercise the hot paths ``iterations`` times"""
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/v1/auth/register", json={"name": "bench", "email": email, "password": "password1"})
+    for _ in range(iterations):
+        login = client.post("/api/v1/auth/login", json={"email": email, "password": "password1"})
+        token = login.json()["data"]["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        client.get("/api/v1/agents", headers=headers)
+        client.post("/api/v1/process", json={"message": "explain this repo"})
+        with client.websocket_connect("/ws") as websocket:
+            websocket.send_json({"message": "hello", "request_id": "bench"})
+            while websocket.receive_json()["type"] not in ("response", "error"):
+                pass
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=None, help="Blocking threshold in seconds")
+    parser.add_argument("--baseline", default=None, help="JSON list of accepted call sites")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the observed call sites to --baseline")
+    args = parser.parse_args()
+
+    os.environ["LOOP_MONITOR_ENABLED"] = "true"
+    if args.threshold is not None:
+        os.environ["LOOP_BLOCK_THRESHOLD_SECONDS"] = str(args.threshold)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    sys.path.insert(0, BACKEND_DIR)
+
+    from fastapi.testclient import TestClient
+    from app.core.loop_monitor import loop_monitor
+    from app.main import app
+
+    with TestClient(app) as client:
+        # Start-up work (schema creation, warm-up) isn't a hot path
+        loop_monitor.reset()
+        drive(client, args.iterations)
+        report = loop_monitor.report()
+
+    print(f"max loop lag: {report['max_lag_seconds'] * 1000:.1f} ms (threshold {report['threshold_seconds'] * 1000:.0f} ms)")
+    for entry in report["blocking_calls"]:
+        print(f"{entry['count']:>5}  {entry['call_site']}")
+
+    if args.baseline is None:
+        return 0
+
+    observed = sorted({stable_site(entry["call_site"]) for entry in report["blocking_calls"]})
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(observed, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {len(observed)} call sites to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        accepted = set(json.load(f))
+    new_sites = [site for site in observed if site not in accepted]
+    if new_sites:
+        print("FAIL: new blocking calls on hot paths:")
+        for site in new_sites:
+            print(f"  {site}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import threading
+
+from app.services.bedrock_service import BedrockService
+
+
+class FakeEventStream:
+    def __init__(self, texts):
+        self.events = [{"chunk": {"bytes": json.dumps({"type": "message_start", "message": {"usage": {"input_tokens": 3}}})}}]
+        self.events += [
+            {"chunk": {"bytes": json.dumps({"type": "content_block_delta", "delta": {"text": text}})}}
+            for text in texts
+        ]
+        self.thread_names = []
+        self.closed = False
+
+    def __iter__(self):
+        self.thread_names.append(threading.current_thread().name)
+        return iter(self.events)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        return {"body": self.stream}
+
+
+def streaming_service(texts):
+    service = BedrockService()
+    service.mock_mode = False
+    stream = FakeEventStream(texts)
+    service._client = FakeClient(stream)
+    return service, stream
+
+
+def collect(service):
+    async def run():
+        chunks = [chunk async for chunk in service.stream_claude("hi", agent="test")]
+        service.close()
+        return chunks
+    return asyncio.run(run())
+
+
+def test_stream_is_read_on_its_own_pool():
+    service, stream = streaming_service(["Hel", "lo"])
+    assert collect(service) == ["Hel", "lo"]
+    assert stream.thread_names and all(name.startswith("bedrock-stream") for name in stream.thread_names)
+    assert stream.closed
+
+
+def test_streams_beyond_the_limit_wait_for_a_slot(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "BEDROCK_STREAM_MAX_CONCURRENCY", 1)
+    service, _ = streaming_service(["a"])
+
+    async def run():
+        first = service.stream_claude("hi", agent="test")
+        assert await first.__anext__() == "a"
+        assert service.stream_slots.locked()
+        await first.aclose()
+        assert not service.stream_slots.locked()
+        service.close()
+
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+import subprocess
+
+from app.core.config import settings
+from app.services import code_index
+from app.services.code_index import _git, _read_blobs
+
+
+def test_token_is_passed_in_the_environment_not_argv(monkeypatch):
+    calls = []
+
+    def run(command, **kwargs):
+        calls.append((command, kwargs["env"]))
+        return subprocess.CompletedProcess(command, 0, b"ok", b"")
+
+    monkeypatch.setattr(settings, "GITHUB_TOKEN", "ghp_secret")
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setattr(code_index.subprocess, "run", run)
+    assert _git(None, "ls-remote", "https://github.com/o/r") == b"ok"
+
+    command, env = calls[0]
+    assert not any("ghp_secret" in arg or "Authorization" in arg for arg in command)
+    assert env["GIT_CONFIG_COUNT"] == "2"
+    assert env["GIT_CONFIG_KEY_1"] == "http.extraHeader"
+    assert env["GIT_CONFIG_VALUE_1"].startswith("Authorization: Basic ")
+
+
+def test_missing_blobs_are_skipped(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "GITHUB_TOKEN", None)
+    monkeypatch.setattr(code_index, "repo_dir", lambda repo: str(tmp_path))
+    subprocess.run(["git", "init", "--quiet", "--bare", str(tmp_path)], check=True)
+    present = _git("o/r", "hash-object", "-w", "--stdin", input=b"hello\n").decode().strip()
+    missing = "0" * 40
+
+    assert list(_read_blobs("o/r", [missing, present, missing])) == [(present, b"hello\n")]
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.agents import codebase_sherpa
+from app.agents.codebase_sherpa import CodebaseSherpaAgent, normalize_language
+from app.services.whatsapp_dispatcher import language_of
+
+ANSWER = {"explanation": "Adds numbers", "learning_steps": ["Read it"], "key_concepts": [], "analogy": "Abacus"}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """In-memory stand-in for the Redis calls the agent makes"""
+    data = {}
+
+    async def get(key):
+        return data.get(key)
+
+    async def set(key, value, ex=None, nx=False):
+        data[key] = value
+        return True
+
+    monkeypatch.setattr(codebase_sherpa.redis_client, "get", get)
+    monkeypatch.setattr(codebase_sherpa.redis_client, "set", set)
+    return data
+
+
+@pytest.fixture
+def agent(monkeypatch, store):
+    agent = CodebaseSherpaAgent()
+    agent.generations = []
+    agent.translations = []
+
+    async def call_structured(prompt, system_prompt, schema, temperature=0.7, stream=True, **kwargs):
+        agent.generations.append(prompt)
+        return dict(ANSWER), ""
+
+    async def translate(result, language):
+        agent.translations.append((result, language))
+        return {**result, "explanation": f"[{language}] {result['explanation']}"}
+
+    monkeypatch.setattr(agent, "call_structured", call_structured)
+    monkeypatch.setattr(codebase_sherpa.translation_service, "translate", translate)
+    return agent
+
+
+def ask(agent, language, code="def add(a, b): return a + b"):
+    return asyncio.run(agent.process({"action": "explain", "code_snippet": code, "target_language": language}, "s"))
+
+
+def test_pivot_answer_is_generated_once_for_every_language(agent):
+    assert ask(agent, "Hindi")["explanation"] == "[Hindi] Adds numbers"
+    assert ask(agent, "hinglish")["explanation"] == "[Hinglish] Adds numbers"
+    assert ask(agent, "Hindi")["explanation"] == "[Hindi] Adds numbers"
+    assert len(agent.generations) == 1
+    assert [language for _, language in agent.translations] == ["Hindi", "Hinglish", "Hindi"]
+    assert all(result == ANSWER for result, _ in agent.translations)
+
+
+def test_different_code_is_generated_separately(agent):
+    ask(agent, "Hindi")
+    ask(agent, "Hindi", code="print('hi')")
+    assert len(agent.generations) == 2
+
+
+def test_pivot_language_requests_are_not_translated(agent, store):
+    assert ask(agent, "English") == ANSWER
+    assert agent.translations == []
+    assert store == {}
+
+
+@pytest.mark.parametrize("language, expected", [
+    ("Hindi", "Hindi"),
+    (" hinglish ", "Hinglish"),
+    ("Klingon", "English"),
+    (None, "English"),
+    ("", "English"),
+])
+def test_normalize_language(language, expected):
+    assert normalize_language(language) == expected
+
+
+def test_whatsapp_language_follows_script():
+    assert language_of("नमस्ते, यह कोड क्या करता है?") == "Hindi"
+    assert language_of("what does this code do?") == "English"
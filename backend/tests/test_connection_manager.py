@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+from app.core.connection_manager import ConnectionManager
+from app.core.redis_client import NODE_ID
+
+
+class FakeWebSocket:
+    def __init__(self, stall: bool = False):
+        self.stall = stall
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        if self.stall:
+            await asyncio.Event().wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def drain(manager):
+    """Let every sender task write out its queue"""
+    for _ in range(100):
+        if not any(connection.pending for connection in manager.connections.values()):
+            break
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+def test_evict_closes_the_socket():
+    async def scenario():
+        manager = ConnectionManager(channel="test")
+        websocket = FakeWebSocket()
+        connection = await manager.connect(websocket, user_id="alice")
+        await manager.evict(connection, 1013)
+        return manager, websocket, connection
+
+    manager, websocket, connection = run(scenario())
+    assert websocket.closed_with == 1013
+    assert connection.closed
+    assert manager.connections == {}
+    assert manager.users == {}
+
+
+def test_slow_consumer_is_evicted_and_closed(monkeypatch):
+    async def scenario():
+        manager = ConnectionManager(channel="test")
+        websocket = FakeWebSocket(stall=True)
+        connection = await manager.connect(websocket)
+        connection.queue_size = 2
+        for i in range(4):
+            connection.enqueue(f"frame-{i}")
+        await asyncio.sleep(0)
+        await asyncio.gather(*manager._evictions)
+        return manager, websocket
+
+    manager, websocket = run(scenario())
+    assert websocket.closed_with == 1013
+    assert manager.connections == {}
+    assert not manager._evictions
+
+
+def test_stop_closes_every_socket():
+    async def scenario():
+        manager = ConnectionManager(channel="test")
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for websocket in sockets:
+            await manager.connect(websocket)
+        await manager.stop()
+        return manager, sockets
+
+    manager, sockets = run(scenario())
+    assert [websocket.closed_with for websocket in sockets] == [1001] * 3
+    assert manager.connections == {}
+
+
+def test_sessions_are_scoped_to_authenticated_users():
+    async def scenario():
+        manager = ConnectionManager(channel="test")
+        anonymous, alice, mallory = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(anonymous)
+        await manager.connect(alice, user_id="alice")
+        await manager.connect(mallory, user_id="mallory")
+        for websocket in (anonymous, alice, mallory):
+            manager.bind_session(websocket, "ws_session")
+        await manager.send_to_session("alice", "ws_session", "for-alice")
+        await drain(manager)
+        await manager.stop()
+        return anonymous, alice, mallory
+
+    anonymous, alice, mallory = run(scenario())
+    assert alice.sent == ["for-alice"]
+    assert anonymous.sent == [] and mallory.sent == []
+
+
+def test_published_messages_reach_local_sockets_on_other_nodes():
+    async def scenario():
+        manager = ConnectionManager(channel="test")
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice, user_id="alice")
+        await manager.connect(bob, user_id="bob")
+        manager.bind_session(alice, "s1")
+        manager._handle_published(json.dumps({"node": "other", "user_id": "alice", "session_id": "s1", "message": "a"}))
+        manager._handle_published(json.dumps({"node": "other", "user_id": "bob", "message": "b"}))
+        manager._handle_published(json.dumps({"node": "other", "message": "all"}))
+        manager._handle_published(json.dumps({"node": NODE_ID, "message": "echo"}))
+        await drain(manager)
+        await manager.stop()
+        return alice, bob
+
+    alice, bob = run(scenario())
+    assert alice.sent == ["a", "all"]
+    assert bob.sent == ["b", "all"]
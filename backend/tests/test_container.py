@@ -0,0 +1,104 @@
+import asyncio
+import sys
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core import container as container_module
+from app.core.config import settings
+from app.core.container import AppContainer
+
+
+async def noop(*args, **kwargs):
+    return None
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Replaces every dependency the container touches, recording what ran"""
+    calls = []
+
+    def record(name, result=None, error=None, is_async=True):
+        async def async_call(*args, **kwargs):
+            calls.append(name)
+            if error:
+                raise error
+            return result
+
+        def sync_call(*args, **kwargs):
+            calls.append(name)
+            if error:
+                raise error
+            return result
+        return async_call if is_async else sync_call
+
+    class Orchestrator:
+        def __init__(self):
+            calls.append("orchestrator")
+
+    monkeypatch.setattr(settings, "DB_CREATE_TABLES", True)
+    monkeypatch.setattr(settings, "LOOP_MONITOR_ENABLED", False)
+    monkeypatch.setattr(container_module, "OrchestratorAgent", Orchestrator)
+    monkeypatch.setattr(container_module, "setup_tracing", lambda: None)
+    monkeypatch.setattr(container_module, "shutdown_tracing", lambda: None)
+    monkeypatch.setattr(container_module, "init_db", record("init_db", is_async=False))
+    monkeypatch.setattr(container_module, "warm_pool", record("warm_pool", 5, is_async=False))
+    monkeypatch.setattr(container_module, "check_db", record("check_db", True, is_async=False))
+    monkeypatch.setattr(container_module.redis_client, "ping", record("redis", True))
+    monkeypatch.setattr(container_module.redis_client, "close", noop)
+    monkeypatch.setattr(container_module.bedrock_client, "warm_up", record("bedrock", error=RuntimeError("no creds")))
+    monkeypatch.setattr(container_module.bedrock_client, "close", lambda: None)
+    for service in (container_module.manager, container_module.context_cache, container_module.loop_monitor):
+        monkeypatch.setattr(service, "start", noop)
+        monkeypatch.setattr(service, "stop", noop)
+    return calls
+
+
+def test_startup_builds_once_and_survives_failed_warm_up(calls):
+    app_container = AppContainer()
+    asyncio.run(app_container.startup())
+
+    assert app_container.ready
+    assert calls.count("orchestrator") == 1
+    assert {"init_db", "warm_pool", "redis", "bedrock"} <= set(calls)
+    assert calls.index("init_db") < calls.index("orchestrator") < calls.index("warm_pool")
+
+
+def test_readiness_requires_startup_and_database(calls, monkeypatch):
+    app_container = AppContainer()
+    assert asyncio.run(app_container.readiness())["ready"] is False
+
+    asyncio.run(app_container.startup())
+    assert asyncio.run(app_container.readiness()) == {"ready": True, "orchestrator": True, "database": True, "redis": True}
+
+    monkeypatch.setattr(container_module, "check_db", lambda: False)
+    assert asyncio.run(app_container.readiness())["ready"] is False
+
+
+def test_shutdown_closes_only_imported_lazy_services(calls, monkeypatch):
+    closed = []
+    service = types.SimpleNamespace(close=lambda: closed.append("imported"))
+    monkeypatch.setattr(container_module, "LAZY_SERVICES", [
+        ("tests.imported_service", "service", "close"),
+        ("tests.never_imported_service", "service", "close"),
+    ])
+    monkeypatch.setitem(sys.modules, "tests.imported_service", types.SimpleNamespace(service=service))
+    monkeypatch.delitem(sys.modules, "tests.never_imported_service", raising=False)
+
+    app_container = AppContainer()
+    asyncio.run(app_container.startup())
+    asyncio.run(app_container.shutdown())
+    assert not app_container.ready
+    assert closed == ["imported"]
+
+
+def test_liveness_does_not_wait_for_readiness(monkeypatch):
+    async def not_ready():
+        return {"ready": False, "orchestrator": False, "database": False, "redis": False}
+
+    monkeypatch.setattr(main.container, "readiness", not_ready)
+    client = TestClient(main.app)
+    assert client.get("/health/live").status_code == 200
+    assert client.get("/health/ready").status_code == 503
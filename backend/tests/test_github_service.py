@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.github_service import GitHubService, file_patch, filter_diff, is_excluded
+
+
+@pytest.mark.parametrize("path", [
+    "vendor/lib.go", "web/node_modules/x/index.js", "static/app.min.js", "poetry.lock",
+    "proto/api_pb2.py", "assets/logo.png", "frontend/package-lock.json"
+])
+def test_generated_and_vendored_paths_are_excluded(path):
+    assert is_excluded(path)
+
+
+@pytest.mark.parametrize("path", ["app/main.py", "src/vendor_client.py", "docs/build.md", "lockfile.py"])
+def test_source_paths_are_reviewed(path):
+    assert not is_excluded(path)
+
+
+def test_file_patch_rebuilds_git_diff_headers():
+    assert file_patch({"filename": "new.py", "status": "added", "patch": "@@ -0,0 +1 @@\n+x"}) == (
+        "diff --git a/new.py b/new.py\n--- /dev/null\n+++ b/new.py\n@@ -0,0 +1 @@\n+x\n"
+    )
+    renamed = file_patch({"filename": "b.py", "previous_filename": "a.py", "status": "renamed", "patch": "@@"})
+    assert renamed.startswith("diff --git a/a.py b/b.py\n--- a/a.py\n+++ b/b.py\n")
+
+
+def test_filter_diff_drops_excluded_sections():
+    keep = "diff --git a/app.py b/app.py\n+++ b/app.py\n+x\n"
+    drop = "diff --git a/vendor/x.go b/vendor/x.go\n+++ b/vendor/x.go\n+y\n"
+    assert filter_diff(keep + drop + keep) == keep + keep
+
+
+def test_files_mode_skips_excluded_and_binary_files(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_DIFF_MODE", "files")
+    service = GitHubService()
+
+    async def get_pr_files(repo, number):
+        return [
+            {"filename": "app.py", "status": "modified", "patch": "@@ -1 +1 @@\n-a\n+b"},
+            {"filename": "vendor/x.go", "status": "modified", "patch": "@@ -1 +1 @@\n-a\n+b"},
+            {"filename": "logo.svg", "status": "modified"},  # binary: no patch
+        ]
+
+    monkeypatch.setattr(service, "get_pr_files", get_pr_files)
+    diff = asyncio.run(service.get_pr_review_diff("o/r", 1))
+    assert diff == "diff --git a/app.py b/app.py\n--- a/app.py\n+++ b/app.py\n@@ -1 +1 @@\n-a\n+b\n"
+
+
+def test_failed_file_listing_aborts_the_review(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_DIFF_MODE", "files")
+    service = GitHubService()
+
+    async def get_pr_files(repo, number):
+        return None
+
+    monkeypatch.setattr(service, "get_pr_files", get_pr_files)
+    assert asyncio.run(service.get_pr_review_diff("o/r", 1)) is None
+
+
+def test_files_list_fetches_every_page_in_order():
+    import httpx
+
+    pages = {1: [{"filename": "a.py"}], 2: [{"filename": "b.py"}], 3: [{"filename": "c.py"}]}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        headers = {}
+        if page == 1:
+            headers["Link"] = f'<{request.url.copy_set_param("page", 3)}>; rel="last"'
+        return httpx.Response(200, json=pages[page], headers=headers)
+
+    service = GitHubService()
+
+    async def run():
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await service.get_pr_files("o/r", 1)
+        finally:
+            await service.close()
+
+    assert [f["filename"] for f in asyncio.run(run())] == ["a.py", "b.py", "c.py"]
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import github
+from app.core.config import settings
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_WEBHOOK_SECRET", SECRET)
+    app = FastAPI()
+    app.include_router(github.router)
+    return TestClient(app)
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def post(client, body: bytes, **headers):
+    return client.post("/webhook", content=body, headers={"X-GitHub-Event": "ping", **headers})
+
+
+def test_valid_signature_is_accepted(client):
+    body = json.dumps({"zen": "Keep it logically awesome."}).encode()
+    response = post(client, body, **{"X-Hub-Signature-256": sign(body)})
+    assert response.status_code == 202
+    assert response.json() == {"status": "pong"}
+
+
+def test_wrong_secret_is_rejected(client):
+    body = b'{"zen": "x"}'
+    response = post(client, body, **{"X-Hub-Signature-256": sign(body, "other-secret")})
+    assert response.status_code == 401
+
+
+def test_tampered_body_is_rejected(client):
+    response = post(client, b'{"zen": "y"}', **{"X-Hub-Signature-256": sign(b'{"zen": "x"}')})
+    assert response.status_code == 401
+
+
+def test_missing_signature_is_rejected(client):
+    assert post(client, b"{}").status_code == 401
+
+
+def test_oversized_body_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_WEBHOOK_MAX_BODY_BYTES", 16)
+    body = b'{"padding": "' + b"x" * 64 + b'"}'
+    assert post(client, body, **{"X-Hub-Signature-256": sign(body)}).status_code == 413
+
+
+def test_unhandled_event_is_ignored_without_verification(client):
+    response = client.post("/webhook", content=b"not json", headers={"X-GitHub-Event": "star"})
+    assert response.status_code == 202
+    assert response.json() == {"status": "ignored"}
+
+
+PR_EVENT = {
+    "action": "opened",
+    "repository": {"full_name": "o/r"},
+    "pull_request": {"number": 7, "title": "Fix", "head": {"sha": "abc123"}}
+}
+
+
+def post_event(client, event, payload, delivery):
+    body = json.dumps(payload).encode()
+    return client.post("/webhook", content=body, headers={
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": delivery,
+        "X-Hub-Signature-256": sign(body)
+    })
+
+
+def test_redelivery_is_acknowledged_once(client, monkeypatch):
+    taken = set()
+    reviews = []
+
+    async def claim(key, ttl):
+        if key in taken:
+            return False
+        taken.add(key)
+        return True
+
+    async def process_pr_review(**kwargs):
+        reviews.append(kwargs)
+
+    monkeypatch.setattr(github, "claim", claim)
+    monkeypatch.setattr(github, "process_pr_review", process_pr_review)
+
+    assert post_event(client, "pull_request", PR_EVENT, "d-1").json() == {"status": "accepted"}
+    assert post_event(client, "pull_request", PR_EVENT, "d-1").json() == {"status": "duplicate"}
+    # Same head under a new delivery ID is already reviewed
+    assert post_event(client, "pull_request", PR_EVENT, "d-2").json() == {"status": "duplicate"}
+    assert len(reviews) == 1
+    assert reviews[0]["claims"] == ["gh:delivery:d-1", "gh:review:o/r#7@abc123"]
+
+
+def test_malformed_pull_request_is_rejected_without_claiming(client, monkeypatch):
+    claimed = []
+
+    async def claim(key, ttl):
+        claimed.append(key)
+        return True
+
+    monkeypatch.setattr(github, "claim", claim)
+    response = post_event(client, "pull_request", {"action": "opened", "pull_request": "nope"}, "d-3")
+    assert response.status_code == 400
+    assert claimed == []
+
+
+def test_failed_review_releases_its_claims(monkeypatch):
+    released = []
+
+    async def review_pr(*args):
+        raise RuntimeError("model down")
+
+    async def release(keys=None):
+        released.extend(keys or [])
+
+    monkeypatch.setattr(github, "_review_pr", review_pr)
+    monkeypatch.setattr(github, "release", release)
+    asyncio.run(github.process_pr_review("o/r", 7, "Fix", "abc123", claims=["gh:delivery:d-1"]))
+    assert released == ["gh:delivery:d-1"]
@@ -0,0 +1,99 @@
+import pytest
+
+from app.core.json_extract import IncrementalJSONParser, ModelOutputError, extract_json, repair
+from app.schemas.agent_output_schema import IntentOutput, ReviewOutput
+
+
+def test_fenced_json():
+    text = 'Here you go:\n```json\n{"summary": "ok", "quality_score": 8}\n```'
+    assert extract_json(text) == {"summary": "ok", "quality_score": 8}
+
+
+def test_prose_before_and_after():
+    text = 'Sure! {"a": 1, "b": [1, 2]} Let me know if you need more. {"ignored": true}'
+    assert extract_json(text) == {"a": 1, "b": [1, 2]}
+
+
+def test_braces_and_quotes_inside_strings():
+    text = '{"code_fix": "if (x) { return \\"}\\"; }", "n": {"inner": "{["}}'
+    assert extract_json(text) == {"code_fix": 'if (x) { return "}"; }', "n": {"inner": "{["}}
+
+
+def test_truncated_mid_string_keeps_partial_value():
+    data = extract_json('{"summary": "The change adds a cach')
+    assert data == {"summary": "The change adds a cach"}
+
+
+def test_truncated_mid_array_drops_incomplete_member():
+    data = extract_json('{"findings": [{"issue": "a"}, {"issue": "b", "line": ')
+    assert data["findings"][0] == {"issue": "a"}
+    assert len(data["findings"]) <= 2
+
+
+def test_truncated_inside_fence():
+    data = extract_json('```json\n{"summary": "ok", "findings": [\n```')
+    assert data == {"summary": "ok", "findings": []}
+
+
+def test_repair_truncated_disabled():
+    with pytest.raises(ModelOutputError):
+        extract_json('{"summary": "cut', repair_truncated=False)
+
+
+@pytest.mark.parametrize("text", ["no json here", "[1, 2, 3]", '{"summary"'])
+def test_unusable_output(text):
+    with pytest.raises(ModelOutputError):
+        extract_json(text)
+
+
+def test_repair_returns_none_when_nothing_recoverable():
+    assert repair('{"') is None
+
+
+def test_schema_coerces_sloppy_values():
+    data = extract_json(
+        '{"summary": "s", "quality_score": "7/10", "findings": '
+        '[{"severity": "high", "line": "12", "file": null, "extra": 1}]}',
+        ReviewOutput
+    )
+    assert data["quality_score"] == 7
+    finding = data["findings"][0]
+    assert (finding["severity"], finding["line"], finding["file"], finding["extra"]) == ("HIGH", 12, "", 1)
+
+
+def test_schema_clamps_score_and_defaults_unknown_severity():
+    data = extract_json('{"summary": "s", "quality_score": 42, "findings": [{"severity": "urgent"}]}', ReviewOutput)
+    assert data["quality_score"] == 10
+    assert data["findings"][0]["severity"] == "LOW"
+
+
+def test_schema_missing_required_field():
+    with pytest.raises(ModelOutputError, match="ReviewOutput"):
+        extract_json('{"findings": []}', ReviewOutput)
+
+
+def test_schema_rejects_unknown_agent():
+    with pytest.raises(ModelOutputError):
+        extract_json('{"target_agent": "weather_bot", "confidence": 0.9}', IntentOutput)
+
+
+def test_incremental_parser_reports_fields_as_they_complete():
+    text = 'Reply: {"explanation": "a {b} c", "steps": ["x", "y"], "analogy": "z"} trailing'
+    parser = IncrementalJSONParser()
+    seen = []
+    for char in text:
+        for key, value in parser.feed(char):
+            seen.append((key, value, len(parser.buffer)))
+    assert [(key, value) for key, value, _ in seen] == [
+        ("explanation", "a {b} c"), ("steps", ["x", "y"]), ("analogy", "z")
+    ]
+    # Each field is reported on the character that ends it, not at the end of the reply
+    assert seen[0][2] == text.index(', "steps"') + 1
+    assert parser.done
+    assert parser.result() == {"explanation": "a {b} c", "steps": ["x", "y"], "analogy": "z"}
+
+
+def test_incremental_parser_result_repairs_truncated_stream():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1, "b": "par') == [("a", 1)]
+    assert parser.result() == {"a": 1, "b": "par"}
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import types
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app import main
+from app.api.lazy_router import LazyRouter
+from app.core.config import settings
+
+DEFERRED = [
+    "boto3", "httpx", "jose", "passlib", "redis",
+    "app.api.endpoints.github", "app.api.endpoints.whatsapp",
+    "app.services.github_service", "app.services.whatsapp_service",
+]
+
+
+def test_importing_the_app_defers_heavy_modules():
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = f"import sys, app.main; print([m for m in {DEFERRED!r} if m in sys.modules])"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=backend, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_router_is_imported_on_first_request(monkeypatch):
+    imported = []
+    router = APIRouter()
+
+    @router.get("/ping")
+    async def ping():
+        return {"pong": True}
+
+    def import_module(name):
+        imported.append(name)
+        return types.SimpleNamespace(router=router)
+
+    monkeypatch.setattr("app.api.lazy_router.importlib.import_module", import_module)
+    app = FastAPI()
+    app.mount("/api/lazy", LazyRouter("tests.lazy_endpoints"))
+    client = TestClient(app)
+
+    assert imported == []
+    assert client.get("/api/lazy/ping").json() == {"pong": True}
+    assert client.get("/api/lazy/ping").json() == {"pong": True}
+    assert imported == ["tests.lazy_endpoints"]
+
+
+def test_lazy_routes_stay_out_of_the_schema():
+    paths = TestClient(main.app).get(f"{settings.API_V1_STR}/openapi.json").json()["paths"]
+    assert not any(path.startswith(("/api/github", "/api/whatsapp")) for path in paths)
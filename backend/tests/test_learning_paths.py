@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from app.agents.codebase_sherpa import CodebaseSherpaAgent
+from app.core.config import settings
+from app.services.code_index import connect
+from app.services.learning_paths import learning_paths, module_hashes, module_of
+
+REPO = "o/r"
+PATH = {"explanation": "Start here", "learning_steps": ["Read jwt.py"], "key_concepts": [], "analogy": "Map"}
+
+
+@pytest.fixture
+def index(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CODE_INDEX_DIR", str(tmp_path))
+    conn = connect(REPO)
+    with conn:
+        conn.executemany("INSERT INTO files VALUES (?, ?, ?, 10)", [
+            ("app/auth/jwt.py", "b1", "python"),
+            ("app/auth/session.py", "b2", "python"),
+            ("app/db/models.py", "b3", "python"),
+            ("app/db/README.md", "b4", "markdown"),
+        ])
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = CodebaseSherpaAgent()
+    agent.generations = []
+
+    async def call_structured(prompt, system_prompt, schema, temperature=0.7, stream=True, **kwargs):
+        agent.generations.append(prompt)
+        await asyncio.sleep(0.01)
+        return dict(PATH), ""
+
+    monkeypatch.setattr(agent, "call_structured", call_structured)
+    return agent
+
+
+def ask(agent, file_path, language="English"):
+    return agent.process({"action": "learning_path", "repo": REPO, "file_path": file_path, "target_language": language}, "s")
+
+
+def set_blob(conn, path, blob):
+    with conn:
+        conn.execute("UPDATE files SET blob = ? WHERE path = ?", (blob, path))
+
+
+def test_module_of():
+    assert module_of("app/auth/jwt.py") == "app/auth"
+    assert module_of("/main.py") == "."
+
+
+def test_hash_covers_only_source_files_directly_in_the_module(index):
+    before = module_hashes(index)
+    assert set(before) == {"app/auth", "app/db"}
+    set_blob(index, "app/db/README.md", "b5")
+    assert module_hashes(index) == before
+    set_blob(index, "app/auth/jwt.py", "b6")
+    assert module_hashes(index)["app/auth"] != before["app/auth"]
+    assert module_hashes(index)["app/db"] == before["app/db"]
+
+
+def test_a_cohort_shares_one_generation(index, agent):
+    async def cohort():
+        return await asyncio.gather(*(ask(agent, "app/auth/jwt.py") for _ in range(5)))
+
+    assert asyncio.run(cohort()) == [PATH] * 5
+    assert asyncio.run(ask(agent, "app/auth/session.py")) == PATH
+    assert len(agent.generations) == 1
+    assert "app/auth/jwt.py" in agent.generations[0]
+
+
+def test_changed_module_is_regenerated(index, agent):
+    asyncio.run(ask(agent, "app/auth/jwt.py"))
+    asyncio.run(ask(agent, "app/db/models.py"))
+    set_blob(index, "app/auth/jwt.py", "b6")
+    asyncio.run(ask(agent, "app/auth/jwt.py"))
+    asyncio.run(ask(agent, "app/db/models.py"))
+    assert len(agent.generations) == 3
+
+
+def test_languages_are_stored_separately(index, agent):
+    asyncio.run(agent.learning_path_for(REPO, "app/auth", "English"))
+    asyncio.run(agent.learning_path_for(REPO, "app/auth", "Hindi"))
+    asyncio.run(agent.learning_path_for(REPO, "app/auth", "Hindi"))
+    assert len(agent.generations) == 2
+
+
+def test_precompute_generates_stale_modules_and_drops_deleted_ones(index, agent, monkeypatch):
+    monkeypatch.setattr(settings, "LEARNING_PATH_LANGUAGES", ["English", "Hindi"])
+    assert asyncio.run(agent.precompute_learning_paths(REPO)) == 4
+    assert asyncio.run(agent.precompute_learning_paths(REPO)) == 0
+
+    with index:
+        index.execute("DELETE FROM files WHERE path = 'app/db/models.py'")
+    assert asyncio.run(learning_paths.stale(REPO, ["English"])) == []
+    assert index.execute("SELECT DISTINCT module FROM learning_paths").fetchall() == [("app/auth",)]
+
+
+def test_unindexed_repository_falls_back_to_the_snippet(monkeypatch, tmp_path, agent):
+    monkeypatch.setattr(settings, "CODE_INDEX_DIR", str(tmp_path))
+    result = asyncio.run(agent.process({"action": "learning_path", "repo": "o/other", "file_path": "x.py", "code_snippet": "x = 1"}, "s"))
+    assert result == PATH
+    assert "x = 1" in agent.generations[0]
@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from app.core.logging_setup import ContextFilter, JsonFormatter, SamplingFilter, log_context
+
+
+def make_record(name="app.test", level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_context_and_extra_fields():
+    record = make_record(user="alice")
+    with log_context(request_id="req-1", session_id="sess-1"):
+        ContextFilter().filter(record)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "req-1"
+    assert entry["session_id"] == "sess-1"
+    assert entry["user"] == "alice"
+    assert "trace_id" not in entry
+
+
+def test_sampling_keeps_warnings_and_applies_rates_to_child_loggers(monkeypatch):
+    sampler = SamplingFilter({"app.noisy": 0.0})
+    assert not sampler.filter(make_record("app.noisy.child"))
+    assert sampler.filter(make_record("app.noisy.child", logging.WARNING))
+    assert sampler.filter(make_record("app.quiet"))
+
+
+def test_import_time_warnings_go_through_the_json_pipeline():
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "AWS_ACCESS_KEY_ID": "", "LOG_FORMAT": "json"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main"],
+        cwd=backend, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    lines = [line for line in result.stderr.splitlines() if "AWS Credentials not found" in line]
+    assert lines, result.stderr
+    assert json.loads(lines[0])["logger"] == "app.services.bedrock_service"
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import time
+import traceback
+
+from app.core import loop_monitor as loop_monitor_module
+from app.core.loop_monitor import LoopMonitor, call_site
+
+
+def block(seconds):
+    time.sleep(seconds)
+
+
+async def monitored(work):
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+    await monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        await work()
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+    return monitor
+
+
+def test_blocking_call_is_reported_once_with_its_call_site():
+    async def work():
+        block(0.4)
+
+    monitor = asyncio.run(monitored(work))
+    report = monitor.report()
+    assert [entry["count"] for entry in report["blocking_calls"]] == [1]
+    site = report["blocking_calls"][0]["call_site"]
+    assert site.startswith("test_loop_monitor.py:") and site.endswith("(block)")
+    assert "block(0.4)" in report["blocking_calls"][0]["stack"]
+    assert report["max_lag_seconds"] >= 0.3
+    assert not monitor.running
+
+
+def test_awaiting_does_not_count_as_blocking():
+    async def work():
+        await asyncio.sleep(0.4)
+
+    monitor = asyncio.run(monitored(work))
+    assert monitor.blocking_calls == {}
+    assert monitor.max_lag < 0.1
+
+
+def test_call_site_prefers_the_innermost_app_frame():
+    app_file = os.path.join(loop_monitor_module.APP_DIR, "core", "security.py")
+    stack = traceback.StackSummary.from_list([
+        ("/usr/lib/python3.11/asyncio/events.py", 80, "_run", None),
+        (app_file, 41, "verify_password", None),
+        ("/site-packages/bcrypt/__init__.py", 90, "checkpw", None),
+    ])
+    assert call_site(stack) == "app/core/security.py:41 (verify_password)"
+    assert call_site(traceback.StackSummary()) == "unknown"
+
+
+def test_report_ranks_sites_and_reset_clears_them():
+    monitor = LoopMonitor(interval=1, threshold=1)
+    for name in ("a", "b", "b"):
+        monitor._record(traceback.StackSummary.from_list([(f"/lib/{name}.py", 1, name, None)]))
+    assert [entry["call_site"] for entry in monitor.report()["blocking_calls"]] == ["b.py:1 (b)", "a.py:1 (a)"]
+    monitor.reset()
+    assert monitor.report()["blocking_calls"] == []
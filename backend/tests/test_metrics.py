@@ -0,0 +1,66 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app import main
+from app.core.metrics import run_in_executor
+from app.core.middleware import MetricsMiddleware
+
+
+def count(method, route, status):
+    labels = {"method": method, "route": route, "status": status}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/agents/{agent_id}")
+    async def agent(agent_id: str):
+        return {"id": agent_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_latency_is_labelled_by_route_template():
+    client = make_client()
+    before = count("GET", "/agents/{agent_id}", "200")
+    client.get("/agents/a1")
+    client.get("/agents/a2")
+    assert count("GET", "/agents/{agent_id}", "200") == before + 2
+    assert count("GET", "/agents/a1", "200") == 0
+
+
+def test_unmatched_and_failing_requests_are_recorded():
+    client = make_client()
+    unmatched = count("GET", "unmatched", "404")
+    failed = count("GET", "/boom", "500")
+    client.get("/no/such/path")
+    client.get("/boom")
+    assert count("GET", "unmatched", "404") == unmatched + 1
+    assert count("GET", "/boom", "500") == failed + 1
+
+
+def test_executor_wait_is_recorded_and_depth_returns_to_zero():
+    waits = REGISTRY.get_sample_value("executor_wait_seconds_count") or 0
+
+    async def run():
+        return await asyncio.gather(*(run_in_executor(pow, 2, n) for n in range(4)))
+
+    assert asyncio.run(run()) == [1, 2, 4, 8]
+    assert REGISTRY.get_sample_value("executor_wait_seconds_count") == waits + 4
+    assert REGISTRY.get_sample_value("executor_queue_depth") == 0
+
+
+def test_metrics_endpoint_exposes_the_instruments():
+    response = TestClient(main.app).get("/metrics")
+    assert response.status_code == 200
+    for name in ("http_request_duration_seconds", "bedrock_call_duration_seconds", "redis_operation_duration_seconds"):
+        assert name in response.text
@@ -0,0 +1,72 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import middleware
+from app.core.middleware import ConditionalGetMiddleware, _choose_encoding, compute_etag, etag_matches
+
+
+@pytest.fixture(autouse=True)
+def no_brotli(monkeypatch):
+    monkeypatch.setattr(middleware, "brotli", None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=0.0", None),
+    ("gzip; q = 0.00", None),
+    ("gzip;q=bogus", None),
+    ("deflate, *;q=0.1", "gzip"),
+    ("*;q=0", None),
+    ("gzip;q=0, *", None),
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding(header, expected):
+    assert _choose_encoding(header) == expected
+
+
+def test_brotli_preferred_when_available(monkeypatch):
+    monkeypatch.setattr(middleware, "brotli", object())
+    assert _choose_encoding("gzip, br") == "br"
+    assert _choose_encoding("gzip, br;q=0.0") == "gzip"
+
+
+def test_weak_etag_matching():
+    etag = compute_etag(b"body")
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag[2:])
+    assert etag_matches(etag, f'"other", {etag}')
+    assert etag_matches(etag, "*")
+    assert not etag_matches(etag, compute_etag(b"other"))
+
+
+@pytest.fixture
+def etag_client():
+    app = FastAPI()
+    app.add_middleware(ConditionalGetMiddleware, paths=["/items"])
+
+    @app.get("/items")
+    async def items():
+        return {"items": [1, 2, 3]}
+
+    return TestClient(app)
+
+
+def test_head_carries_the_get_etag_without_a_body(etag_client):
+    get = etag_client.get("/items")
+    head = etag_client.head("/items")
+    assert head.status_code == 200
+    assert head.headers["etag"] == get.headers["etag"]
+    assert head.content == b""
+
+
+def test_revalidation_returns_not_modified_for_get_and_head(etag_client):
+    etag = etag_client.get("/items").headers["etag"]
+    for method in ("GET", "HEAD"):
+        response = etag_client.request(method, "/items", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from app.agents.base_agent import BaseAgent
+from app.core.events import event_sink
+from app.schemas.agent_output_schema import IntentOutput
+
+LARGE, SMALL = "large-model", "small-model"
+
+
+class FakeBedrock:
+    """Replies per model; records which model was called and whether it streamed"""
+
+    model_id = LARGE
+
+    def __init__(self, replies: dict, tier: str = SMALL):
+        self.replies = replies
+        self.tier = tier
+        self.calls = []
+
+    def model_for(self, agent):
+        return self.tier
+
+    async def invoke_claude(self, prompt, system_prompt=None, temperature=0.5, agent="default", model_id=None):
+        self.calls.append((model_id, "invoke"))
+        return self.replies[model_id]
+
+    async def stream_claude(self, prompt, system_prompt=None, temperature=0.5, agent="default", model_id=None):
+        self.calls.append((model_id, "stream"))
+        text = self.replies[model_id]
+        for start in range(0, len(text), 8):
+            yield text[start:start + 8]
+
+
+class Agent(BaseAgent):
+    async def process(self, input_data, session_id):
+        return {}
+
+
+def reply(confidence: float, target: str = "codebase_sherpa") -> str:
+    return json.dumps({"target_agent": target, "confidence": confidence, "reasoning": "r"})
+
+
+def call(bedrock, stream=True):
+    agent = Agent("router")
+    agent.bedrock = bedrock
+    events = []
+
+    async def sink(event, data):
+        events.append((event, data))
+
+    async def run():
+        with event_sink(sink):
+            return await agent.call_structured("q", "s", IntentOutput, stream=stream, confidence_key="confidence")
+
+    data, _ = asyncio.run(run())
+    return data, events
+
+
+def deltas(events):
+    return "".join(data["text"] for event, data in events if event == "delta")
+
+
+def test_confident_small_reply_is_sent_once_without_escalating():
+    bedrock = FakeBedrock({SMALL: reply(0.9)})
+    data, events = call(bedrock)
+    assert data["confidence"] == 0.9
+    assert bedrock.calls == [(SMALL, "invoke")]
+    assert deltas(events) == reply(0.9)
+    assert ("status", "escalating") not in events
+
+
+def test_low_confidence_escalates_and_streams_only_the_large_reply():
+    bedrock = FakeBedrock({SMALL: reply(0.2), LARGE: reply(0.95, "review_monk")})
+    data, events = call(bedrock)
+    assert data["target_agent"] == "review_monk"
+    assert bedrock.calls == [(SMALL, "invoke"), (LARGE, "stream")]
+    assert ("status", "escalating") in events
+    assert deltas(events) == reply(0.95, "review_monk")
+
+
+def test_invalid_small_reply_escalates():
+    bedrock = FakeBedrock({SMALL: "not json at all", LARGE: reply(0.8)})
+    data, _ = call(bedrock)
+    assert data["confidence"] == 0.8
+    assert [model for model, _ in bedrock.calls] == [SMALL, LARGE]
+
+
+def test_unusable_large_reply_keeps_the_small_answer():
+    bedrock = FakeBedrock({SMALL: reply(0.3), LARGE: "garbled"})
+    data, _ = call(bedrock)
+    assert data["confidence"] == 0.3
+
+
+def test_agents_on_the_large_model_never_escalate():
+    bedrock = FakeBedrock({LARGE: reply(0.1)}, tier=LARGE)
+    data, events = call(bedrock)
+    assert data["confidence"] == 0.1
+    assert bedrock.calls == [(LARGE, "stream")]
+    assert deltas(events) == reply(0.1)
+
+
+def test_unstreamed_calls_emit_nothing():
+    bedrock = FakeBedrock({SMALL: reply(0.9)})
+    _, events = call(bedrock, stream=False)
+    assert deltas(events) == ""
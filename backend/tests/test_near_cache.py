@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from app.core import near_cache
+from app.core.near_cache import MISSING, NearCache
+from app.core.redis_client import NODE_ID
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(near_cache.time, "monotonic", clock)
+    return NearCache(channel="test", **{"max_entries": 3, "ttl": 60, **kwargs}), clock
+
+
+def test_hit_miss_and_per_owner_stats(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    assert cache.get("k", "sherpa") is MISSING
+    cache.put("k", {"v": 1})
+    assert cache.get("k", "sherpa") == {"v": 1}
+    assert cache.stats()["sherpa"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_entries_expire_at_the_shorter_of_ttl_and_expire(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+    cache.put("short", 1, expire=5)
+    cache.put("long", 2, expire=3600)
+    clock.now += 10
+    assert cache.get("short") is MISSING
+    assert cache.get("long") == 2
+    clock.now += 60
+    assert cache.get("long") is MISSING
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    cache.get("a")
+    cache.put("d", "d")
+    assert cache.get("b") is MISSING
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+
+
+def test_invalidation_from_another_worker_drops_the_copy(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache.put("ctx:s:history", ["old"])
+    cache.put("ctx:s:other", ["kept"])
+    cache._handle_invalidation(json.dumps({"node": "other-worker", "keys": ["ctx:s:history"]}))
+    assert cache.get("ctx:s:history") is MISSING
+    assert cache.get("ctx:s:other") == ["kept"]
+
+
+def test_own_invalidations_are_ignored(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache.put("k", "fresh")
+    cache._handle_invalidation(json.dumps({"node": NODE_ID, "keys": ["k"]}))
+    cache._handle_invalidation("not json")
+    assert cache.get("k") == "fresh"
+
+
+def test_publish_invalidation_names_this_node(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    published = []
+
+    async def publish(channel, message):
+        published.append((channel, json.loads(message)))
+
+    monkeypatch.setattr(near_cache.redis_client, "publish", publish)
+    asyncio.run(cache.publish_invalidation(["a", "b"]))
+    assert published == [("test", {"node": NODE_ID, "keys": ["a", "b"]})]
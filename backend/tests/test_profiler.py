@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiler import SamplingProfiler
+from app.core.security import SecurityUtils
+from app.routes import admin_routes
+
+ADMIN = "admin@example.com"
+
+
+def spin(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_profile_captures_work_on_the_event_loop():
+    async def busy():
+        for _ in range(30):
+            spin(0.01)
+            await asyncio.sleep(0)
+
+    async def run():
+        profile, _ = await asyncio.gather(SamplingProfiler().profile(0.2, interval=0.002), busy())
+        return profile
+
+    collapsed, samples = asyncio.run(run())
+    assert samples > 0
+    lines = collapsed.splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == samples
+    assert any("spin (test_profiler.py:" in line and line.startswith("MainThread;") for line in lines)
+
+
+def test_idle_loop_records_no_samples():
+    collapsed, samples = asyncio.run(SamplingProfiler().profile(0.1))
+    assert (collapsed, samples) == ("", 0)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [ADMIN])
+    app = FastAPI()
+    app.include_router(admin_routes.router)
+    return TestClient(app)
+
+
+def auth(email):
+    token = SecurityUtils.create_access_token({"sub": "1", "email": email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_profile_endpoint_returns_collapsed_stacks(client):
+    response = client.get("/api/v1/admin/profile?seconds=0.1&include_idle=true", headers=auth(ADMIN))
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    assert response.headers["Content-Disposition"].endswith('.collapsed"')
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+def test_profile_endpoint_is_admin_only(client):
+    assert client.get("/api/v1/admin/profile?seconds=0.1", headers=auth("dev@example.com")).status_code == 403
+    assert client.get("/api/v1/admin/profile?seconds=0.1").status_code in (401, 403)
+
+
+def test_profile_endpoint_rejects_long_and_concurrent_runs(client, monkeypatch):
+    too_long = settings.PROFILER_MAX_SECONDS + 1
+    assert client.get(f"/api/v1/admin/profile?seconds={too_long}", headers=auth(ADMIN)).status_code == 400
+
+    monkeypatch.setattr(SamplingProfiler, "busy", property(lambda self: True))
+    assert client.get("/api/v1/admin/profile?seconds=0.1", headers=auth(ADMIN)).status_code == 409
@@ -0,0 +1,137 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+from app.core import redis_client as redis_module
+from app.core.config import settings
+from app.core.redis_client import MockRedis, RobustRedisClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(redis_module, "time", types.SimpleNamespace(monotonic=clock, perf_counter=time.perf_counter))
+    return clock
+
+
+class FakeRedis:
+    """Dict-backed client that raises while ``down`` is set"""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+        self.calls = []
+
+    async def get(self, key):
+        self.calls.append("get")
+        if self.down:
+            raise ConnectionError("connection refused")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        self.calls.append("set")
+        if self.down:
+            raise ConnectionError("connection refused")
+        self.data[key] = value
+        return True
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def set(self, key, value, ex=None):
+                self.commands.append((key, value))
+
+            async def execute(self):
+                redis.calls.append(f"pipeline:{len(self.commands)}")
+                if redis.down:
+                    raise ConnectionError("connection refused")
+                redis.data.update(self.commands)
+
+        return Pipeline()
+
+
+@pytest.fixture
+def client(monkeypatch, clock):
+    monkeypatch.setattr(settings, "REDIS_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "REDIS_RETRY_SECONDS", 30)
+    robust = RobustRedisClient()
+    robust._client = FakeRedis()
+    robust._client_created = True
+    return robust
+
+
+def test_fallback_honors_ttl(clock):
+    mock = MockRedis(max_keys=10)
+    asyncio.run(mock.set("k", "v", ex=5))
+    assert asyncio.run(mock.get("k")) == "v"
+    clock.now += 6
+    assert asyncio.run(mock.get("k")) is None
+    assert mock.store == {}
+
+
+def test_fallback_evicts_least_recently_used(clock):
+    mock = MockRedis(max_keys=2)
+    asyncio.run(mock.set("a", 1))
+    asyncio.run(mock.set("b", 2))
+    asyncio.run(mock.get("a"))
+    asyncio.run(mock.set("c", 3))
+    assert list(mock.store) == ["a", "c"]
+
+
+def test_fallback_set_nx(clock):
+    mock = MockRedis()
+    assert asyncio.run(mock.set("k", 1, ex=5, nx=True)) is True
+    assert asyncio.run(mock.set("k", 2, nx=True)) is None
+    clock.now += 6
+    assert asyncio.run(mock.set("k", 3, nx=True)) is True
+
+
+def test_circuit_opens_after_threshold_and_recovers(client, clock):
+    redis = client.client
+    redis.down = True
+    asyncio.run(client.set("k", "v"))
+    assert not client.using_mock  # one error doesn't open the circuit
+    asyncio.run(client.set("k", "v"))
+    assert client.using_mock
+    assert asyncio.run(client.get("k")) == "v"  # served by the fallback
+    assert redis.calls == ["set", "set"]
+
+    redis.down = False
+    clock.now += 31
+    assert not client.using_mock
+    asyncio.run(client.set("k", "fresh"))
+    assert redis.data == {"k": "fresh"}
+    assert client.failures == 0
+
+
+def test_mset_is_one_pipelined_round_trip(client):
+    asyncio.run(client.mset({"a": 1, "b": 2, "c": 3}, ex=60))
+    assert client.client.calls == ["pipeline:3"]
+    assert client.client.data == {"a": 1, "b": 2, "c": 3}
+
+
+def test_failed_mset_lands_in_the_fallback(client):
+    client.client.down = True
+    asyncio.run(client.mset({"a": 1}))
+    assert asyncio.run(client.mock.get("a")) == 1
+    assert client.failures == 1
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.services import review_publisher
+from app.services.review_publisher import REVIEW_MARKER, build_review, diff_path, publish_review
+
+DIFF = """diff --git a/app/x.py b/app/x.py
+--- a/app/x.py
++++ b/app/x.py
+@@ -1,2 +1,3 @@
+ import os
++import sys
+ print(os)
+"""
+
+RESULT = {
+    "summary": "Looks fine",
+    "quality_score": 8,
+    "findings": [{"file": "./app/x.py", "line": 2, "severity": "LOW", "issue": "Unused import"}]
+}
+
+
+class FakeGitHub:
+    def __init__(self, existing=(), create_ok=True):
+        self.calls = []
+        self.reviews = list(existing)
+        self.create_ok = create_ok
+
+    async def create_review(self, repo, pr, sha, body, comments):
+        self.calls.append(("create", comments))
+        if not self.create_ok:
+            return None
+        review = {"id": 99, "user": {"login": "codesherpa-bot"}, "body": body}
+        self.reviews.append(review)
+        return review
+
+    async def list_reviews(self, repo, pr):
+        self.calls.append(("list",))
+        return list(self.reviews)
+
+    async def update_review(self, repo, pr, review_id, body):
+        self.calls.append(("update", review_id))
+        return True
+
+
+@pytest.fixture
+def github(monkeypatch):
+    def install(**kwargs):
+        fake = FakeGitHub(**kwargs)
+        monkeypatch.setattr(review_publisher, "github_service", fake)
+        return fake
+    return install
+
+
+def publish():
+    return asyncio.run(publish_review("o/r", 1, "abcdef1234", RESULT, DIFF))
+
+
+def review(review_id, login, body=f"{REVIEW_MARKER}\nold"):
+    return {"id": review_id, "user": {"login": login}, "body": body}
+
+
+def test_new_review_is_created_before_the_old_one_is_superseded(github):
+    fake = github(existing=[review(1, "codesherpa-bot")])
+    assert publish()
+    assert [call[0] for call in fake.calls] == ["create", "list", "update"]
+    assert fake.calls[-1] == ("update", 1)
+
+
+def test_failed_create_leaves_the_previous_review_alone(github):
+    fake = github(existing=[review(1, "codesherpa-bot")], create_ok=False)
+    assert not publish()
+    assert all(call[0] == "create" for call in fake.calls)
+
+
+def test_only_this_accounts_marked_reviews_are_superseded(github):
+    fake = github(existing=[
+        review(1, "someone-else"),
+        review(2, "codesherpa-bot", body="plain review without the marker"),
+        review(3, "codesherpa-bot", body=f"{REVIEW_MARKER}\n~~Review Monk Analysis~~ — *Superseded by x.*"),
+        review(4, "codesherpa-bot"),
+    ])
+    assert publish()
+    assert [call for call in fake.calls if call[0] == "update"] == [("update", 4)]
+
+
+@pytest.mark.parametrize("reported", ["app/x.py", "./app/x.py", "a/app/x.py", "b/app/x.py", "/app/x.py", " `app/x.py` "])
+def test_finding_paths_are_normalized_to_the_diff(reported):
+    assert diff_path(reported, {"app/x.py": {2}}) == "app/x.py"
+
+
+def test_directory_named_like_a_diff_prefix_is_kept():
+    assert diff_path("a/b.py", {"a/b.py": {1}, "b.py": {1}}) == "a/b.py"
+
+
+def test_normalized_finding_is_anchored_inline():
+    _, comments = build_review(RESULT, {"app/x.py": {1, 2, 3}})
+    assert [(c["path"], c["line"]) for c in comments] == [("app/x.py", 2)]
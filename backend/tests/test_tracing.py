@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import StatusCode
+
+from app.core.middleware import TracingMiddleware
+from app.core.tracing import capture_context, span_from_context, tracer
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+PARENT_ID = "b7ad6b7169203331"
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans():
+    # The global provider can only be installed once per process
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider()
+        trace.set_tracer_provider(provider)
+        provider.add_span_processor(SimpleSpanProcessor(_exporter))
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        with tracer.start_as_current_span("lookup"):
+            return {"id": item_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(TracingMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+def test_request_continues_the_callers_trace(spans):
+    make_client().get("/items/7", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    finished = by_name(spans)
+
+    server = finished["GET /items/{item_id}"]
+    assert format(server.context.trace_id, "032x") == TRACE_ID
+    assert format(server.parent.span_id, "016x") == PARENT_ID
+    assert server.kind == trace.SpanKind.SERVER
+    assert server.attributes["http.route"] == "/items/{item_id}"
+    assert server.attributes["http.status_code"] == 200
+    assert finished["lookup"].parent.span_id == server.context.span_id
+
+
+def test_server_errors_mark_the_span(spans):
+    make_client().get("/boom")
+    server = by_name(spans)["GET /boom"]
+    assert server.status.status_code == StatusCode.ERROR
+
+
+def test_background_work_joins_the_enqueuing_trace(spans):
+    with tracer.start_as_current_span("webhook") as request_span:
+        carrier = capture_context()
+    assert "traceparent" in carrier
+
+    with span_from_context("github.pr_review", carrier, repo="o/r"):
+        pass
+    job = by_name(spans)["github.pr_review"]
+    assert job.context.trace_id == request_span.get_span_context().trace_id
+    assert job.parent.span_id == request_span.get_span_context().span_id
+    assert job.attributes["repo"] == "o/r"
+    assert not trace.get_current_span().get_span_context().is_valid
@@ -0,0 +1,64 @@
+import sqlite3
+import zlib
+
+import pytest
+
+from app.core.config import settings
+from app.services.code_index import _DDL
+from app.services.vector_index import VectorIndex, quantize, tokens
+
+np = pytest.importorskip("numpy")
+
+CHUNKS = [
+    ("app/auth/jwt.py", "def decode_token(token):\n    return jwt.decode(token, SECRET_KEY)"),
+    ("app/db/session.py", "def get_session():\n    return SessionLocal()"),
+    ("app/services/payment.py", "class PaymentGateway:\n    def charge_card(self, amount): ..."),
+]
+
+
+@pytest.fixture
+def index(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "VECTOR_INDEX_ENABLED", True)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_BACKEND", "bruteforce")
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(_DDL)
+    conn.executemany(
+        "INSERT INTO chunks VALUES (?, 1, 2, ?)",
+        [(path, zlib.compress(text.encode())) for path, text in CHUNKS]
+    )
+    return VectorIndex(), conn, str(tmp_path)
+
+
+def test_identifiers_are_split_into_sub_words():
+    assert tokens("decodeToken snake_case") == ["decodetoken", "decode", "token", "snake_case", "snake", "case"]
+
+
+def test_quantization_round_trips_closely():
+    matrix = np.random.default_rng(0).standard_normal((4, 32)).astype(np.float32)
+    vectors, scales = quantize(matrix)
+    assert vectors.dtype == np.int8
+    assert np.allclose(vectors * scales[:, None], matrix, atol=scales.max())
+
+
+def test_only_new_chunks_are_embedded(index):
+    vectors, conn, directory = index
+    assert vectors.refresh(conn, directory) == 3
+    assert vectors.refresh(conn, directory) == 0
+    conn.execute("INSERT INTO chunks VALUES ('app/x.py', 1, 1, ?)", (zlib.compress(b"x = 1"),))
+    assert vectors.refresh(conn, directory) == 1
+
+
+def test_search_ranks_the_matching_chunk_first(index):
+    vectors, conn, directory = index
+    vectors.refresh(conn, directory)
+    chunk_ids = {path: rowid for rowid, path in conn.execute("SELECT rowid, path FROM chunks")}
+
+    results = vectors.search(directory, "where do we decode the jwt token?", k=2)
+    assert len(results) == 2
+    assert results[0][0] == chunk_ids["app/auth/jwt.py"]
+    assert results[0][1] >= results[1][1]
+
+
+def test_search_without_an_export_is_empty(index, tmp_path):
+    vectors, _, _ = index
+    assert vectors.search(str(tmp_path / "missing"), "token", k=3) == []
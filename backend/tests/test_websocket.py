@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.config import settings
+
+
+class SlowOrchestrator:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def process(self, payload, session_id):
+        await asyncio.sleep(self.delay)
+        return {"reply": payload["message"]}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    orchestrator = SlowOrchestrator(0.6)
+    monkeypatch.setattr(main, "get_orchestrator", lambda: orchestrator)
+    monkeypatch.setattr(settings, "WS_HEARTBEAT_INTERVAL_SECONDS", 0.1)
+    monkeypatch.setattr(settings, "WS_IDLE_TIMEOUT_SECONDS", 0.4)
+    return TestClient(main.app)
+
+
+def frames_until(websocket, frame_type):
+    frames = []
+    while True:
+        frame = websocket.receive_json()
+        frames.append(frame)
+        if frame["type"] == frame_type:
+            return frames
+
+
+def test_requests_are_multiplexed_and_tagged(client):
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"request_id": "a", "message": "first"})
+        websocket.send_json({"request_id": "b", "message": "second"})
+        responses = {}
+        while len(responses) < 2:
+            frame = websocket.receive_json()
+            if frame["type"] == "response":
+                responses[frame["request_id"]] = frame["content"]["reply"]
+    assert responses == {"a": "first", "b": "second"}
+
+
+def test_cancel_aborts_the_request(client):
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"request_id": "a", "message": "slow"})
+        websocket.send_json({"type": "cancel", "request_id": "a"})
+        frames = frames_until(websocket, "cancelled")
+    assert frames[-1]["request_id"] == "a"
+    assert not any(frame["type"] == "response" for frame in frames)
+
+
+def test_long_request_does_not_trigger_idle_close_after_its_reply(client):
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"request_id": "a", "message": "slow"})
+        frames_until(websocket, "response")
+        # The request outlived the idle timeout; the socket gets heartbeats, not a close
+        assert websocket.receive_json()["type"] == "heartbeat"
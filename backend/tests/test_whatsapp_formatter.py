@@ -0,0 +1,28 @@
+from app.services.whatsapp_formatter import FENCE, chunk_text
+
+
+def test_short_text_is_one_unnumbered_chunk():
+    assert chunk_text("hello", limit=100) == ["hello"]
+
+
+def test_chunks_respect_limit_and_are_numbered():
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 30 for i in range(20))
+    chunks = chunk_text(text, limit=300)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert chunks[0].startswith(f"(1/{len(chunks)}) ")
+    assert chunks[-1].startswith(f"({len(chunks)}/{len(chunks)}) ")
+
+
+def test_long_line_splits_on_words():
+    chunks = chunk_text("lorem " * 200, limit=200)
+    words = [word for chunk in chunks for word in chunk.split(" ", 1)[1].split()]
+    assert words == ["lorem"] * 200
+
+
+def test_code_block_is_closed_and_reopened_across_chunks():
+    code = "\n".join(f"line_{i} = {i}" for i in range(60))
+    chunks = chunk_text(f"Intro\n\n{FENCE}python\n{code}\n{FENCE}", limit=300)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.count(FENCE) % 2 == 0
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import whatsapp
+from app.core.config import settings
+from app.services.whatsapp_dispatcher import WhatsAppDispatcher
+
+SECRET = "test-app-secret"
+
+
+def message_payload(message_id: str = "wamid.1") -> bytes:
+    return json.dumps({"entry": [{"changes": [{"value": {"messages": [
+        {"id": message_id, "from": "15550001111", "type": "text", "text": {"body": "hi"}}
+    ]}}]}]}).encode()
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Messages handed to the dispatcher; claims always succeed"""
+    messages = []
+
+    async def claim(message_id):
+        return True
+
+    monkeypatch.setattr(settings, "WHATSAPP_APP_SECRET", SECRET)
+    monkeypatch.setattr(whatsapp, "claim_message", claim)
+    monkeypatch.setattr(whatsapp.whatsapp_dispatcher, "submit", lambda message: messages.append(message) or True)
+    return messages
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(whatsapp.router)
+    return TestClient(app)
+
+
+def test_signed_delivery_is_queued(client, submitted):
+    body = message_payload()
+    response = client.post("/webhook", content=body, headers={"X-Hub-Signature-256": sign(body)})
+    assert response.status_code == 200
+    assert response.json() == {"status": "received", "queued": 1}
+    assert [m["id"] for m in submitted] == ["wamid.1"]
+
+
+@pytest.mark.parametrize("signature", ["", "sha256=deadbeef", sign(message_payload(), "other-secret")])
+def test_unsigned_or_forged_delivery_is_rejected(client, submitted, signature):
+    response = client.post("/webhook", content=message_payload(), headers={"X-Hub-Signature-256": signature})
+    assert response.status_code == 401
+    assert submitted == []
+
+
+def test_malformed_body_is_a_bad_request(client, submitted):
+    for body in (b"{not json", b"[]"):
+        response = client.post("/webhook", content=body, headers={"X-Hub-Signature-256": sign(body)})
+        assert response.status_code == 400
+    assert submitted == []
+
+
+def test_failed_handler_clears_in_flight(monkeypatch):
+    dispatcher = WhatsAppDispatcher(max_concurrency=1, max_pending=10)
+
+    async def fail(message):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(dispatcher, "_handle", fail)
+
+    async def run():
+        dispatcher.submit({"id": "wamid.2", "from": "15550001111", "text": "hi"})
+        await asyncio.gather(*dispatcher.workers.values(), return_exceptions=True)
+
+    asyncio.run(run())
+    assert dispatcher.in_flight == {}
+    assert dispatcher.workers == {}